@@ -1,15 +1,34 @@
-from typing import List, Optional
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.jwt import decode_token
-from app.db.deps import get_db
+from app.core.cache import TTLCache
+from app.core.jwt import ACCESS_TOKEN_EXPIRE_HOURS, decode_token
+from app.db.deps import get_async_db, get_db
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+
+# token 哈希 -> user_id（已验签），过期时间不超过 token 自身的 exp
+_token_cache = TTLCache(maxsize=20000, ttl=ACCESS_TOKEN_EXPIRE_HOURS * 3600)
+# user_id -> Principal，用户被修改/删除时失效
+_principal_cache = TTLCache(maxsize=10000, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+class Principal(NamedTuple):
+    id: int
+    username: str
+    role: str
+    warehouse_ids: Optional[str]
+    warehouse_id_list: Tuple[int, ...]
+
 
 def parse_warehouse_ids(raw: Optional[str]) -> List[int]:
     if not raw:
@@ -22,29 +41,83 @@ def parse_warehouse_ids(raw: Optional[str]) -> List[int]:
     return out
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    try:
-        payload = decode_token(token)
-        user_id = int(payload.get("sub"))
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"code": "UNAUTHORIZED", "message": "invalid token"},
-        )
+def _to_principal(user: User) -> Principal:
+    return Principal(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        warehouse_ids=user.warehouse_ids,
+        warehouse_id_list=tuple(parse_warehouse_ids(user.warehouse_ids)),
+    )
+
+
+def invalidate_user(user_id: int) -> None:
+    _principal_cache.pop(user_id)
+
+
+def auth_cache_stats() -> Dict[str, Any]:
+    return {"token": _token_cache.stats(), "principal": _principal_cache.stats()}
 
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_changed(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+
+def _user_id_from_token(token: str) -> int:
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    user_id = _token_cache.get(key)
+    if user_id is None:
+        try:
+            payload = decode_token(token)
+            user_id = int(payload.get("sub"))
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"code": "UNAUTHORIZED", "message": "invalid token"},
+            )
+        exp = payload.get("exp")
+        _token_cache.set(key, user_id, expires_at=float(exp) if exp is not None else None)
+    return user_id
+
+
+def _load_principal(db: Session, user_id: int) -> Principal:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "UNAUTHORIZED", "message": "user not found"},
         )
-    return user
+    principal = _to_principal(user)
+    _principal_cache.set(user_id, principal)
+    return principal
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    user_id = _user_id_from_token(token)
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        principal = _load_principal(db, user_id)
+    return principal
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    # 缓存命中时不触达数据库，也不占用线程池
+    user_id = _user_id_from_token(token)
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        principal = await db.run_sync(_load_principal, user_id)
+    return principal
 
 
-def require_admin(user: User = Depends(get_current_user)) -> User:
+def require_admin(user: Principal = Depends(get_current_user)) -> Principal:
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,76 @@
+import os
+
+# 简化：配置直接从环境变量读取（不引入 pydantic-settings）
+DATABASE_URL = os.getenv("WMS_DATABASE_URL", "sqlite:///./app/db/wms.db")
+
+# 可选的异步数据层：为空时由 DATABASE_URL 推导（sqlite -> sqlite+aiosqlite）
+ASYNC_DATABASE_URL = os.getenv("WMS_ASYNC_DATABASE_URL", "")
+# 启动时选择读接口走 async（AsyncSession）还是同步线程池
+DB_ASYNC = os.getenv("WMS_DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# SQLite 连接参数档位：wal（默认，生产推荐）| default（SQLite 默认 rollback journal）
+DB_PROFILE = os.getenv("WMS_DB_PROFILE", "wal")
+
+# 按仓库分库：每个仓库的库存/出入库/盘点/流水/审计放在独立 SQLite 文件（各自独立写锁），
+# 用户、仓库、商品等共享数据留在 DATABASE_URL 中心库；仅支持文件型 SQLite，开启后不注册 async 读路由
+SHARD_BY_WAREHOUSE = os.getenv("WMS_SHARD_BY_WAREHOUSE", "false").lower() in ("1", "true", "yes")
+SHARD_URL_TEMPLATE = os.getenv("WMS_SHARD_URL_TEMPLATE", "sqlite:///./app/db/wms_wh{warehouse_id}.db")
+# 跨仓列表/导出的并行查询线程数
+SHARD_FANOUT_WORKERS = int(os.getenv("WMS_SHARD_FANOUT_WORKERS", "8"))
+# 跨仓调拨两阶段提交：协调者超过该秒数仍停在 PREPARING 的调拨单由后台按中止处理
+TRANSFER_PREPARE_TIMEOUT = float(os.getenv("WMS_TRANSFER_PREPARE_TIMEOUT", "60"))
+
+DB_POOL_SIZE = int(os.getenv("WMS_DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("WMS_DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("WMS_DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("WMS_DB_POOL_RECYCLE", "1800"))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("WMS_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("WMS_SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("WMS_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# 登录密码校验：bcrypt 成本与专用线程池（超出排队上限直接 429）
+BCRYPT_ROUNDS = int(os.getenv("WMS_BCRYPT_ROUNDS", "12"))
+LOGIN_HASH_WORKERS = int(os.getenv("WMS_LOGIN_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOGIN_HASH_QUEUE = int(os.getenv("WMS_LOGIN_HASH_QUEUE", "32"))
+
+# 库存审计日志：durable（随业务事务批量写入）| write_behind（后台线程批量落库）
+AUDIT_MODE = os.getenv("WMS_AUDIT_MODE", "durable")
+AUDIT_QUEUE_SIZE = int(os.getenv("WMS_AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("WMS_AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("WMS_AUDIT_FLUSH_INTERVAL", "0.5"))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("WMS_AUDIT_ENQUEUE_TIMEOUT", "0.05"))
+
+# 库存流水快照周期（秒），<=0 关闭后台快照
+LEDGER_SNAPSHOT_INTERVAL = float(os.getenv("WMS_LEDGER_SNAPSHOT_INTERVAL", "3600"))
+# 快照保留：最近 N 个 + 最近 N 天每天最后一个，另保留最早的基线快照；KEEP<=0 不清理
+LEDGER_SNAPSHOT_KEEP = int(os.getenv("WMS_LEDGER_SNAPSHOT_KEEP", "24"))
+LEDGER_SNAPSHOT_KEEP_DAYS = int(os.getenv("WMS_LEDGER_SNAPSHOT_KEEP_DAYS", "30"))
+
+# 商品搜索：SQLite 下使用 FTS5 trigram 全文索引（关闭或不可用时回退 LIKE 扫描）
+PRODUCT_SEARCH_FTS = os.getenv("WMS_PRODUCT_SEARCH_FTS", "true").lower() in ("1", "true", "yes")
+
+# 列表总数：带搜索等过滤条件的 COUNT(*) 结果缓存秒数（无过滤/按分类的总数走计数表）
+COUNT_CACHE_TTL = float(os.getenv("WMS_COUNT_CACHE_TTL", "10"))
+
+# 条件 GET：按进程内表版本号生成 ETag；多 worker 部署时各进程版本不共享，应关闭
+HTTP_ETAG = os.getenv("WMS_HTTP_ETAG", "true").lower() in ("1", "true", "yes")
+
+# 每请求 SQL 统计：Server-Timing 响应头 + 按路由滚动汇总（/api/admin/query-stats）
+QUERY_STATS = os.getenv("WMS_QUERY_STATS", "true").lower() in ("1", "true", "yes")
+QUERY_STATS_WINDOW = int(os.getenv("WMS_QUERY_STATS_WINDOW", "500"))
+# 单个请求内同一语句形态重复达到该次数视为疑似 N+1
+QUERY_STATS_N1_THRESHOLD = int(os.getenv("WMS_QUERY_STATS_N1_THRESHOLD", "10"))
+
+# Prometheus 指标：GET /metrics（路由延迟直方图、连接池、SQLite 写锁等待、库存变更计数）
+METRICS = os.getenv("WMS_METRICS", "true").lower() in ("1", "true", "yes")
+
+# 库存写入冲突（乐观锁版本不符 / SQLite 写锁忙）时的自动重试次数与退避基数
+INVENTORY_RETRY_ATTEMPTS = int(os.getenv("WMS_INVENTORY_RETRY_ATTEMPTS", "5"))
+INVENTORY_RETRY_BACKOFF_MS = float(os.getenv("WMS_INVENTORY_RETRY_BACKOFF_MS", "5"))
+
+# 出库单库存占用：创建时占用（可用 -> 锁定），超过该秒数仍未拣货的单据由后台清理释放并取消；<=0 不过期
+RESERVATION_TTL = float(os.getenv("WMS_RESERVATION_TTL", "86400"))
+# 占用过期清理周期（秒），<=0 关闭后台清理
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("WMS_RESERVATION_SWEEP_INTERVAL", "60"))
+RESERVATION_SWEEP_BATCH = int(os.getenv("WMS_RESERVATION_SWEEP_BATCH", "500"))
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response
+
+from app.core import config
+from app.core.versions import VersionKey, versions
+
+
+def compute_etag(key: Sequence[Any], tables: Sequence[VersionKey]) -> Optional[str]:
+    # 须在查询之前取版本号：并发写入时宁可 ETag 偏旧（下次重新拉取），不能让新 ETag 配旧数据
+    if not config.HTTP_ETAG:
+        return None
+    parts = repr((tuple(key), tuple(versions.get(t, s) for t, s in tables)))
+    return '"{}-{}"'.format(versions.boot, hashlib.sha1(parts.encode("utf-8")).hexdigest()[:16])
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    if etag is None:
+        return None
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = [t.strip() for t in header.split(",")]
+    if "*" in tags or etag in tags or ("W/" + etag) in tags:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+
+def with_etag(response: Response, etag: Optional[str]) -> Response:
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
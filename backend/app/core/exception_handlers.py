@@ -5,6 +5,9 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from app.db.shards import UnknownWarehouse
+from app.services.stock import ConcurrentUpdate
+
 
 def _wrap_error(code: str, message: str, data: Any = None) -> Dict[str, Any]:
     return {"code": code, "message": message, "data": data}
@@ -16,7 +19,7 @@ def http_exception_handler(request: Request, exc: StarletteHTTPException) -> JSO
         body = _wrap_error(str(exc.detail.get("code")), str(exc.detail.get("message")), exc.detail.get("data"))
     else:
         body = _wrap_error("ERROR", str(exc.detail), None)
-    return JSONResponse(status_code=exc.status_code, content=body)
+    return JSONResponse(status_code=exc.status_code, content=body, headers=getattr(exc, "headers", None))
 
 
 def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
@@ -24,3 +27,15 @@ def validation_exception_handler(request: Request, exc: RequestValidationError)
         status_code=422,
         content=_wrap_error("VALIDATION_ERROR", "validation error", exc.errors()),
     )
+
+
+def concurrent_update_handler(request: Request, exc: ConcurrentUpdate) -> JSONResponse:
+    return JSONResponse(
+        status_code=409,
+        content=_wrap_error("CONCURRENT_UPDATE", "inventory was modified concurrently, please retry"),
+    )
+
+
+def unknown_warehouse_handler(request: Request, exc: UnknownWarehouse) -> JSONResponse:
+    # 分库模式下按不存在的仓库/单据 id 路由
+    return JSONResponse(status_code=404, content=_wrap_error("NOT_FOUND", "warehouse not found"))
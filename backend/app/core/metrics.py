@@ -0,0 +1,212 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import config
+
+# Prometheus 文本格式指标（进程内自实现，不依赖 prometheus_client）
+# HTTP 指标只在事件循环线程中更新，无需加锁；其余指标来自线程池，按需加锁
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOCK_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+INVENTORY_MUTATION_TYPES = ("inbound_confirm", "ship", "transfer", "stocktake", "reserve", "release")
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        sep = "," if labels else ""
+        out: List[str] = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.http_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.http_requests: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.inventory_mutations: Dict[str, int] = dict.fromkeys(INVENTORY_MUTATION_TYPES, 0)
+        self.lock_wait = Histogram(LOCK_WAIT_BUCKETS)
+        self.busy_errors = 0
+        self._lock = threading.Lock()
+
+    def inventory_mutation(self, kind: str, n: int = 1) -> None:
+        with self._lock:
+            self.inventory_mutations[kind] = self.inventory_mutations.get(kind, 0) + n
+
+    def observe_lock_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.lock_wait.observe(seconds)
+
+    def busy_error(self) -> None:
+        with self._lock:
+            self.busy_errors += 1
+
+    def render(self, engines: Sequence[Tuple[str, Engine]]) -> str:
+        lines: List[str] = []
+
+        lines += [
+            "# HELP wms_http_request_duration_seconds HTTP request latency by route.",
+            "# TYPE wms_http_request_duration_seconds histogram",
+        ]
+        for (method, route), h in list(self.http_latency.items()):
+            lines += h.render("wms_http_request_duration_seconds", f'method="{method}",route="{_escape(route)}"')
+
+        lines += ["# HELP wms_http_requests_total HTTP requests by route and status.", "# TYPE wms_http_requests_total counter"]
+        for (method, route, code), n in list(self.http_requests.items()):
+            lines.append(f'wms_http_requests_total{{method="{method}",route="{_escape(route)}",status="{code}"}} {n}')
+
+        lines += ["# HELP wms_http_requests_in_flight HTTP requests currently being served.", "# TYPE wms_http_requests_in_flight gauge"]
+        for method, n in list(self.in_flight.items()):
+            lines.append(f'wms_http_requests_in_flight{{method="{method}"}} {n}')
+
+        lines += ["# HELP wms_inventory_mutations_total Committed inventory mutations by type.", "# TYPE wms_inventory_mutations_total counter"]
+        for kind, n in list(self.inventory_mutations.items()):
+            lines.append(f'wms_inventory_mutations_total{{type="{kind}"}} {n}')
+
+        lines += [
+            "# HELP wms_sqlite_write_lock_wait_seconds Duration of the first write statement per transaction (write lock acquisition).",
+            "# TYPE wms_sqlite_write_lock_wait_seconds histogram",
+        ]
+        lines += self.lock_wait.render("wms_sqlite_write_lock_wait_seconds", "")
+        lines += [
+            "# HELP wms_sqlite_busy_errors_total Statements that failed with 'database is locked'.",
+            "# TYPE wms_sqlite_busy_errors_total counter",
+            f"wms_sqlite_busy_errors_total {self.busy_errors}",
+        ]
+
+        lines += _pool_lines(engines)
+        lines += [
+            "# HELP wms_process_start_time_seconds Start time of the process since unix epoch.",
+            "# TYPE wms_process_start_time_seconds gauge",
+            f"wms_process_start_time_seconds {self.started_at}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _pool_lines(engines: Sequence[Tuple[str, Engine]]) -> List[str]:
+    gauges = {
+        "size": "Configured pool size.",
+        "checked_out": "Connections currently checked out.",
+        "checked_in": "Idle connections in the pool.",
+        "overflow": "Current overflow connections (negative while below pool size).",
+    }
+    values: Dict[str, List[str]] = {k: [] for k in gauges}
+    for name, eng in engines:
+        pool = eng.pool
+        stats: Dict[str, Any] = {}
+        for key, attr in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+            fn = getattr(pool, attr, None)
+            if fn is not None:
+                stats[key] = fn()
+        for key, v in stats.items():
+            values[key].append(f'wms_db_pool_{key}{{engine="{name}"}} {v}')
+    lines: List[str] = []
+    for key, help_text in gauges.items():
+        lines += [f"# HELP wms_db_pool_{key} {help_text}", f"# TYPE wms_db_pool_{key} gauge"] + values[key]
+    return lines
+
+
+metrics = Metrics()
+
+
+# ---- SQLite 写锁等待：事务内第一条写语句需要拿到写锁（WAL 下即 RESERVED），其耗时基本就是等锁时间 ----
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_write(conn, cursor, statement, parameters, context, executemany) -> None:
+    if not config.METRICS or conn.dialect.name != "sqlite" or conn.info.get("write_locked"):
+        return
+    if statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES):
+        conn.info["write_lock_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_write(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.pop("write_lock_started", None)
+    if started is not None:
+        conn.info["write_locked"] = True
+        metrics.observe_lock_wait(time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+def _end_transaction(conn) -> None:
+    conn.info.pop("write_locked", None)
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(ctx) -> None:
+    conn = ctx.connection
+    if conn is not None:
+        conn.info.pop("write_lock_started", None)
+    if "database is locked" in str(ctx.original_exception):
+        metrics.busy_error()
+
+
+class MetricsMiddleware:
+    # 纯 ASGI：每请求两次 perf_counter + 几次 dict 操作，路由模板在路由匹配后从 scope 取得
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight = metrics.in_flight
+        in_flight[method] = in_flight.get(method, 0) + 1
+        status_holder: List[int] = [500]
+        started = time.perf_counter()
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight[method] -= 1
+            route: Optional[Any] = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            key = (method, path)
+            h = metrics.http_latency.get(key)
+            if h is None:
+                h = metrics.http_latency[key] = Histogram(LATENCY_BUCKETS)
+            h.observe(elapsed)
+            rkey = (method, path, status_holder[0])
+            metrics.http_requests[rkey] = metrics.http_requests.get(rkey, 0) + 1
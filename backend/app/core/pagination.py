@@ -0,0 +1,87 @@
+import heapq
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql import Select
+
+from app.db.shards import UnknownWarehouse, shard_of_id, shard_router, use_warehouse
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+Q = TypeVar("Q", Query, Select)
+
+
+def filter_date_range(q: Q, column: Any, date_from: Optional[date], date_to: Optional[date]) -> Q:
+    # 按天闭区间：[date_from 00:00:00, date_to + 1 天)
+    if date_from is not None:
+        q = q.filter(column >= datetime.combine(date_from, time.min))
+    if date_to is not None:
+        q = q.filter(column < datetime.combine(date_to + timedelta(days=1), time.min))
+    return q
+
+
+def keyset_anchor(db: Session, model: Any, after_id: Optional[int]) -> Optional[datetime]:
+    if after_id is None:
+        return None
+    return db.query(model.created_at).filter(model.id == after_id).scalar()
+
+
+def keyset_rows(q: Query, model: Any, after_id: Optional[int], anchor: Optional[datetime], limit: int) -> List[Any]:
+    # 游标分页：按 (created_at, id) 倒序，配合 (warehouse_id, status, created_at) 复合索引；多取一行判断是否有下一页
+    if after_id is not None:
+        if anchor is None:
+            q = q.filter(model.id < after_id)
+        else:
+            q = q.filter(tuple_(model.created_at, model.id) < tuple_(anchor, after_id))
+    return q.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+
+def _cut(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[int]]:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def keyset_page(db: Session, q: Query, model: Any, after_id: Optional[int], limit: int) -> Tuple[List[Any], Optional[int]]:
+    return _cut(keyset_rows(q, model, after_id, keyset_anchor(db, model, after_id), limit), limit)
+
+
+def sharded_keyset_page(
+    build: Callable[[Session], Query], model: Any, after_id: Optional[int], limit: int
+) -> Tuple[List[Any], Optional[int]]:
+    # 跨仓列表：游标锚点从 after_id 所在分库读取，各分库各取一页后按 (created_at, id) 倒序归并
+    anchor = None
+    if after_id is not None:
+        try:
+            db = shard_router.session(shard_of_id(after_id))
+        except UnknownWarehouse:
+            db = None
+        if db is not None:
+            try:
+                anchor = keyset_anchor(db, model, after_id)
+            finally:
+                db.close()
+    pages = shard_router.fan_out(lambda db: keyset_rows(build(db), model, after_id, anchor, limit))
+    merged = heapq.merge(*pages, key=lambda r: (r.created_at, r.id), reverse=True)
+    return _cut(list(islice(merged, limit + 1)), limit)
+
+
+def warehouse_keyset_page(
+    db: Session,
+    build: Callable[[Session], Query],
+    model: Any,
+    warehouse_id: Optional[int],
+    after_id: Optional[int],
+    limit: int,
+) -> Tuple[List[Any], Optional[int]]:
+    # 分库且未指定仓库时跨库归并；否则在单库（指定仓库时为该仓分库）内分页
+    if shard_router.enabled and warehouse_id is None:
+        return sharded_keyset_page(build, model, after_id, limit)
+    if warehouse_id is not None:
+        use_warehouse(db, warehouse_id)
+    return keyset_page(db, build(db), model, after_id, limit)
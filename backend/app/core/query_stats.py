@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    __slots__ = ("count", "db_time", "shapes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.db_time = 0.0
+        # 同一 SQL 文本（参数已绑定为占位符）即同一语句形态
+        self.shapes: Counter = Counter()
+
+    def suspected_n_plus_one(self, threshold: int) -> Optional[tuple]:
+        if not self.shapes:
+            return None
+        statement, times = self.shapes.most_common(1)[0]
+        return (statement, times) if times >= threshold else None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_sql_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # 开始时间放在本次执行的 context 上：语句出错时 after_cursor_execute 不触发，不会在池化连接上残留
+    if context is not None and _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    started = getattr(context, "_query_started", None)
+    if started is not None:
+        stats.db_time += time.perf_counter() - started
+    stats.count += 1
+    # 分块执行的同一语句（execution_options(batched=True)，如超长 IN 列表分块）不是 N+1，不计入语句形态
+    if context is None or not context.execution_options.get("batched"):
+        stats.shapes[statement] += 1
+
+
+class RouteStats:
+    # 每个路由保留最近 window 个请求的样本，用于滚动均值与 p95
+    def __init__(self, window: int) -> None:
+        self.requests = 0
+        self.n_plus_one = 0
+        self.last_n_plus_one: Optional[Dict[str, Any]] = None
+        self.samples: Deque[tuple] = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        n = len(self.samples)
+        counts = sorted(s[0] for s in self.samples)
+        db_ms = sorted(s[1] for s in self.samples)
+        wall_ms = sorted(s[2] for s in self.samples)
+
+        def p95(values: List[float]) -> float:
+            return values[min(n - 1, int(n * 0.95))] if n else 0
+
+        return {
+            "requests": self.requests,
+            "window": n,
+            "sql_avg": round(sum(counts) / n, 2) if n else 0,
+            "sql_max": counts[-1] if n else 0,
+            "db_ms_avg": round(sum(db_ms) / n, 2) if n else 0,
+            "db_ms_p95": round(p95(db_ms), 2),
+            "wall_ms_avg": round(sum(wall_ms) / n, 2) if n else 0,
+            "wall_ms_p95": round(p95(wall_ms), 2),
+            "n_plus_one": self.n_plus_one,
+            "last_n_plus_one": self.last_n_plus_one,
+        }
+
+
+class QueryStatsRegistry:
+    def __init__(self, window: int, n_plus_one_threshold: int) -> None:
+        self.window = window
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._routes: Dict[str, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: RequestStats, wall: float) -> Optional[tuple]:
+        suspect = stats.suspected_n_plus_one(self.n_plus_one_threshold)
+        with self._lock:
+            rs = self._routes.get(route)
+            if rs is None:
+                rs = self._routes[route] = RouteStats(self.window)
+            rs.requests += 1
+            rs.samples.append((stats.count, stats.db_time * 1000, wall * 1000))
+            if suspect is not None:
+                first = rs.n_plus_one == 0
+                rs.n_plus_one += 1
+                rs.last_n_plus_one = {"statement": suspect[0][:500], "times": suspect[1], "sql_total": stats.count}
+        if suspect is not None and first:
+            logger.warning("suspected N+1 on %s: %s identical statements: %s", route, suspect[1], suspect[0][:200])
+        return suspect
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {k: v.snapshot() for k, v in self._routes.items()}
+        return dict(sorted(routes.items(), key=lambda kv: -kv[1]["db_ms_avg"] * kv[1]["requests"]))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+query_stats = QueryStatsRegistry(config.QUERY_STATS_WINDOW, config.QUERY_STATS_N1_THRESHOLD)
+
+
+class QueryStatsMiddleware:
+    # 纯 ASGI 中间件：统计本请求的 SQL 条数/耗时，写入 Server-Timing 并汇总到路由维度
+    # 流式响应在响应头发出后仍会查询，Server-Timing 只含响应头之前的部分，路由汇总含全部
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not config.QUERY_STATS:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                wall = time.perf_counter() - started
+                value = 'db;dur={:.1f};desc="{} queries", app;dur={:.1f}'.format(stats.db_time * 1000, stats.count, wall * 1000)
+                suspect = stats.suspected_n_plus_one(query_stats.n_plus_one_threshold)
+                if suspect is not None:
+                    value += ', n1;desc="{} repeated"'.format(suspect[1])
+                message.setdefault("headers", []).append((b"server-timing", value.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            label = "{} {}".format(scope["method"], getattr(route, "path", None) or "<unmatched>")
+            query_stats.record(label, stats, time.perf_counter() - started)
@@ -1,5 +1,22 @@
-from typing import Any, Dict
+from typing import Any
 
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 
-def ok(data: Any = None, message: str = "ok") -> Dict[str, Any]:
-    return {"code": "OK", "message": message, "data": data}
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖，缺失时回退标准库 json
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    # orjson 直接序列化；datetime/Decimal/pydantic 等非原生类型交给 jsonable_encoder，输出与默认 JSONResponse 一致
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def ok(data: Any = None, message: str = "ok") -> FastJSONResponse:
+    # 直接返回响应对象，跳过 FastAPI 对返回值的 jsonable_encoder 遍历
+    return FastJSONResponse({"code": "OK", "message": message, "data": data})
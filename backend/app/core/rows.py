@@ -0,0 +1,32 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Query, Session
+
+ColumnFormatter = Callable[[Sequence[Any]], List[Any]]
+
+
+class RowSerializer:
+    # 预编译的行序列化器：只查询需要的列（不构造 ORM 对象），整列套用格式化函数后 zip 成字典
+    def __init__(self, *fields: Tuple[str, Any], formatters: Optional[Dict[str, ColumnFormatter]] = None) -> None:
+        self.keys = tuple(k for k, _ in fields)
+        self.columns = [c for _, c in fields]
+        self._formatters = [(self.keys.index(k), f) for k, f in (formatters or {}).items()]
+
+    def query(self, db: Session) -> Query:
+        return db.query(*self.columns)
+
+    def dump(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        keys = self.keys
+        if not rows:
+            return []
+        if not self._formatters:
+            return [dict(zip(keys, r)) for r in rows]
+        cols = list(zip(*rows))
+        for i, f in self._formatters:
+            cols[i] = f(cols[i])
+        return [dict(zip(keys, r)) for r in zip(*cols)]
+
+    def dump_one(self, row: Optional[Sequence[Any]]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        return self.dump([row])[0]
@@ -1,6 +1,28 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core import config
+
+# min/max 与 default 相同：成本调整后旧哈希会被 needs_update 识别并在登录时重算
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=config.BCRYPT_ROUNDS,
+)
+
+# bcrypt 计算会释放 GIL，专用线程池即可并行；信号量限制“执行中 + 排队”总数
+_hash_pool = ThreadPoolExecutor(max_workers=config.LOGIN_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(config.LOGIN_HASH_WORKERS + config.LOGIN_HASH_QUEUE)
+
+
+class HashPoolBusy(Exception):
+    pass
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -9,3 +31,18 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # 返回 (是否匹配, 需要回写的新哈希或 None)；池满时抛 HashPoolBusy
+    if not _hash_slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_pool, pwd_context.verify_and_update, plain_password, hashed_password)
+    finally:
+        _hash_slots.release()
+
+
+def shutdown_hash_pool() -> None:
+    _hash_pool.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,27 @@
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 
 def fmt(dt: Optional[datetime]) -> Optional[str]:
     if not dt:
         return None
     return dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fmt_many(values: Iterable[Optional[datetime]]) -> List[Optional[str]]:
+    # 整列格式化：isoformat 比 strftime 快得多，且同一时间戳只格式化一次；结果与 fmt 一致
+    seen: Dict[datetime, str] = {}
+    out: List[Optional[str]] = []
+    for dt in values:
+        if not dt:
+            out.append(None)
+            continue
+        s = seen.get(dt)
+        if s is None:
+            s = seen[dt] = dt.isoformat(" ", "seconds") if dt.tzinfo is None else fmt(dt)
+        out.append(s)
+    return out
+
+
+def iso_many(values: Iterable[Optional[datetime]]) -> List[Optional[str]]:
+    return [dt.isoformat() if dt else None for dt in values]
@@ -0,0 +1,81 @@
+import time
+from collections import defaultdict
+from itertools import chain
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# 参与 ETag 的表 -> 细分作用域的列（库存按仓库、商品按 id），写入时同时递增全表版本与作用域版本
+TRACKED_TABLES: Dict[str, str] = {
+    "warehouses": "id",
+    "locations": "warehouse_id",
+    "products": "id",
+    "inventory": "warehouse_id",
+}
+
+_PENDING_KEY = "pending_version_bumps"
+
+VersionKey = Tuple[str, Optional[Any]]
+
+
+class VersionRegistry:
+    # 进程内表版本计数；boot 区分进程实例，重启后旧 ETag 全部失效
+    def __init__(self) -> None:
+        self.boot = format(int(time.time() * 1000), "x")
+        self._versions: Dict[VersionKey, int] = defaultdict(int)
+        self._lock = Lock()
+
+    def bump(self, keys: Iterable[VersionKey]) -> None:
+        with self._lock:
+            tables: Set[str] = set()
+            for table, scope in keys:
+                tables.add(table)
+                if scope is not None:
+                    self._versions[(table, scope)] += 1
+            for table in tables:
+                self._versions[(table, None)] += 1
+
+    def get(self, table: str, scope: Optional[Any] = None) -> int:
+        return self._versions.get((table, scope), 0)
+
+    def stats(self) -> Dict[str, int]:
+        return {table: v for (table, scope), v in self._versions.items() if scope is None}
+
+
+versions = VersionRegistry()
+
+
+def touch(db: Session, table: str, scope: Optional[Any] = None) -> None:
+    # Core 批量写入（不经过 ORM flush）需显式登记，提交后生效
+    db.info.setdefault(_PENDING_KEY, set()).add((table, scope))
+
+
+def _tracked_key(obj: Any) -> Optional[VersionKey]:
+    table = getattr(obj, "__tablename__", None)
+    scope_attr = TRACKED_TABLES.get(table)
+    if scope_attr is None:
+        return None
+    return (table, getattr(obj, scope_attr, None))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(db: Session, flush_context) -> None:
+    keys = [_tracked_key(obj) for obj in chain(db.new, db.deleted)]
+    keys += [_tracked_key(obj) for obj in db.dirty if db.is_modified(obj, include_collections=False)]
+    keys = [k for k in keys if k is not None]
+    if keys:
+        db.info.setdefault(_PENDING_KEY, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_bumps(db: Session) -> None:
+    keys = db.info.pop(_PENDING_KEY, None)
+    if keys:
+        versions.bump(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_bumps(db: Session) -> None:
+    db.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import config
+from app.db.session import SQLALCHEMY_DATABASE_URL, check_profile, engine_kwargs, install_pragmas
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "mysql": "mysql+aiomysql"}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def to_async_url(url: str) -> str:
+    u = make_url(url)
+    if u.get_driver_name() in ("aiosqlite", "asyncpg", "aiomysql", "psycopg"):
+        return url
+    driver = _ASYNC_DRIVERS.get(u.get_backend_name())
+    if not driver:
+        raise ValueError(f"no async driver known for {u.get_backend_name()}")
+    return u.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: Optional[str] = None, profile: Optional[str] = None) -> AsyncEngine:
+    url = url or config.ASYNC_DATABASE_URL or to_async_url(SQLALCHEMY_DATABASE_URL)
+    profile = check_profile(profile)
+    eng = create_async_engine(url, **engine_kwargs(url))
+    install_pragmas(eng.sync_engine, profile)
+    return eng
+
+
+def get_async_engine() -> AsyncEngine:
+    # 延迟创建：未启用 async 时不要求安装 aiosqlite
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
@@ -0,0 +1,108 @@
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import Table, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Executable
+
+
+# 大批量写入：SQLite（qmark）下直接走 DBAPI executemany，绕开逐行的参数编译开销；
+# 其他方言回退到 Core executemany。rows 中各行的键须一致。
+
+
+def _memoized(proc: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    # 批内时间戳等取值高度重复，按值缓存转换结果
+    memo: Dict[Any, Any] = {}
+
+    def cached(v: Any) -> Any:
+        r = memo.get(v, memo)
+        if r is memo:
+            r = memo[v] = proc(v)
+        return r
+
+    return cached
+
+
+def _processors(conn: Connection, table: Table, cols: List[str]) -> List[Optional[Callable[[Any], Any]]]:
+    out: List[Optional[Callable[[Any], Any]]] = []
+    for name in cols:
+        proc = table.c[name].type.bind_processor(conn.dialect)
+        out.append(_memoized(proc) if proc is not None else None)
+    return out
+
+
+def _params(conn: Connection, table: Table, cols: List[str], rows: List[Dict[str, Any]]) -> List[tuple]:
+    procs = _processors(conn, table, cols)
+    if not any(procs):
+        return [tuple(r[c] for c in cols) for r in rows]
+    pairs = list(zip(cols, procs))
+    return [tuple(p(r[c]) if p else r[c] for c, p in pairs) for r in rows]
+
+
+def _tuple_params(conn: Connection, table: Table, cols: List[str], rows: List[tuple]) -> List[tuple]:
+    procs = _processors(conn, table, cols)
+    if not any(procs):
+        return rows
+    idx = [(i, p) for i, p in enumerate(procs) if p]
+    out = []
+    for r in rows:
+        r = list(r)
+        for i, p in idx:
+            r[i] = p(r[i])
+        out.append(tuple(r))
+    return out
+
+
+def _insert_sql(conn: Connection, table: Table, cols: List[str]) -> str:
+    q = conn.dialect.identifier_preparer
+    return "INSERT INTO {} ({}) VALUES ({})".format(
+        q.format_table(table), ", ".join(q.quote(c) for c in cols), ", ".join("?" * len(cols))
+    )
+
+
+def bulk_insert(conn: Connection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    if conn.dialect.paramstyle != "qmark":
+        conn.execute(insert(table), rows)
+        return
+    cols = list(rows[0].keys())
+    conn.exec_driver_sql(_insert_sql(conn, table, cols), _params(conn, table, cols, rows))
+
+
+def bulk_insert_tuples(conn: Connection, table: Table, cols: List[str], rows: List[tuple]) -> None:
+    # 同 bulk_insert，行以元组给出（顺序同 cols），省去大批量生成时的字典开销
+    if not rows:
+        return
+    if conn.dialect.paramstyle != "qmark":
+        conn.execute(insert(table), [dict(zip(cols, r)) for r in rows])
+        return
+    conn.exec_driver_sql(_insert_sql(conn, table, cols), _tuple_params(conn, table, cols, rows))
+
+
+def bulk_execute(conn: Connection, stmt: Executable, rows: List[Dict[str, Any]]) -> int:
+    # 任意 DML（如 upsert）的批量执行：编译一次，按位置参数组装元组走 DBAPI executemany；返回受影响行数。
+    # 语句中的字面量参数（如 version + 1）取编译时的值
+    if not rows:
+        return 0
+    if conn.dialect.paramstyle != "qmark":
+        return conn.execute(stmt, rows).rowcount
+    compiled = stmt.compile(dialect=conn.dialect, column_keys=list(rows[0].keys()))
+    # INSERT 未给出的列由 Python 端默认值补齐（整批取同一个值）
+    defaults = {c.key: c.default for c in getattr(compiled, "insert_prefetch", ()) if c.default is not None}
+    getters: List[Callable[[Dict[str, Any]], Any]] = []
+    for name in compiled.positiontup:
+        bind = compiled.binds[name]
+        proc = bind.type.bind_processor(conn.dialect)
+        if name not in rows[0]:
+            default = defaults.get(name)
+            value = bind.value if default is None else default.arg if default.is_scalar else default.arg(None)
+            const = proc(value) if proc else value
+            getters.append(lambda r, const=const: const)
+        elif proc is not None:
+            getters.append(lambda r, name=name, proc=_memoized(proc): proc(r[name]))
+        else:
+            getters.append(itemgetter(name))
+    params = [tuple(g(r) for g in getters) for r in rows]
+    return conn.exec_driver_sql(compiled.string, params).rowcount
+
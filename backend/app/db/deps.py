@@ -1,5 +1,6 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
+from app.db.async_session import AsyncSessionLocal
 from app.db.session import SessionLocal
 
 
@@ -9,3 +10,11 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator:
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -1,6 +1,12 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import Table, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash
+from app.db.session import Base
+from app.db.shards import shard_router, use_warehouse
 from app.models.inventory import Inventory
 from app.models.location import Location
 from app.models.product import Product
@@ -8,9 +14,60 @@ from app.models.user import User
 from app.models.warehouse import Warehouse
 
 
+def ensure_columns(bind: Engine) -> None:
+    # create_all 不会给已存在的表补列；新增列须可空或带 server_default
+    insp = inspect(bind)
+    existing_tables = set(insp.get_table_names())
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            have = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                ddl = "ALTER TABLE {} ADD COLUMN {} {}".format(
+                    conn.dialect.identifier_preparer.format_table(table),
+                    conn.dialect.identifier_preparer.quote(col.name),
+                    col.type.compile(dialect=conn.dialect),
+                )
+                if col.server_default is not None:
+                    ddl += " DEFAULT {}".format(col.server_default.arg.text)
+                if not col.nullable:
+                    ddl += " NOT NULL"
+                conn.exec_driver_sql(ddl)
+
+
+def merge_duplicate_inventory(bind: Engine) -> None:
+    # 唯一索引建立前，把历史上并发插入产生的同 (仓库, 商品) 多行合并到 id 最小的一行
+    insp = inspect(bind)
+    if not insp.has_table("inventory"):
+        return
+    if any(ix["name"] == "ux_inventory_warehouse_product" for ix in insp.get_indexes("inventory")):
+        return
+    with bind.begin() as conn:
+        conn.exec_driver_sql(
+            """UPDATE inventory SET
+                available_qty = (SELECT SUM(d.available_qty) FROM inventory d
+                                 WHERE d.warehouse_id = inventory.warehouse_id AND d.product_id = inventory.product_id),
+                locked_qty = (SELECT SUM(d.locked_qty) FROM inventory d
+                              WHERE d.warehouse_id = inventory.warehouse_id AND d.product_id = inventory.product_id)
+            WHERE id IN (SELECT MIN(id) FROM inventory GROUP BY warehouse_id, product_id HAVING COUNT(*) > 1)"""
+        )
+        conn.exec_driver_sql("DELETE FROM inventory WHERE id NOT IN (SELECT MIN(id) FROM inventory GROUP BY warehouse_id, product_id)")
+
+
+def ensure_indexes(bind: Engine, tables: Optional[Iterable[Table]] = None) -> None:
+    # create_all 不会给已存在的表补建新索引，这里按需补齐；分库时中心库与各分库只处理各自的表
+    for table in tables if tables is not None else Base.metadata.sorted_tables:
+        for idx in table.indexes:
+            idx.create(bind=bind, checkfirst=True)
+
+
 def init_db(db: Session) -> None:
+    # 各表为空时才写入演示数据；用 LIMIT 1 判空，避免大库启动时全表 count
     # Warehouses
-    if db.query(Warehouse).count() == 0:
+    if db.query(Warehouse.id).first() is None:
         db.add_all([
             Warehouse(id=1, name="WH-A"),
             Warehouse(id=2, name="WH-B"),
@@ -18,7 +75,7 @@ def init_db(db: Session) -> None:
         db.commit()
 
     # Locations
-    if db.query(Location).count() == 0:
+    if db.query(Location.id).first() is None:
         db.add_all([
             Location(warehouse_id=1, code="A-01", name="A区01"),
             Location(warehouse_id=2, code="B-01", name="B区01"),
@@ -26,7 +83,7 @@ def init_db(db: Session) -> None:
         db.commit()
 
     # Users
-    if db.query(User).count() == 0:
+    if db.query(User.id).first() is None:
         db.add_all([
             User(username="admin", password_hash=get_password_hash("admin123"), role="admin", warehouse_ids="1,2"),
             User(username="op_a", password_hash=get_password_hash("op123"), role="operator", warehouse_ids="1"),
@@ -35,19 +92,22 @@ def init_db(db: Session) -> None:
         db.commit()
 
     # Products
-    if db.query(Product).count() == 0:
+    if db.query(Product.id).first() is None:
         p1 = Product(sku="SKU-001", name="测试商品1", category="默认", unit="pcs")
         p2 = Product(sku="SKU-002", name="测试商品2", category="默认", unit="pcs")
         p3 = Product(sku="SKU-003", name="测试商品3", category="默认", unit="pcs")
         db.add_all([p1, p2, p3])
         db.commit()
 
-    # Inventory
-    if db.query(Inventory).count() == 0:
-        products = db.query(Product).all()
-        items = []
-        for p in products:
-            items.append(Inventory(warehouse_id=1, product_id=p.id, available_qty=50, locked_qty=0, warning_threshold=10))
-            items.append(Inventory(warehouse_id=2, product_id=p.id, available_qty=20, locked_qty=0, warning_threshold=5))
-        db.add_all(items)
-        db.commit()
+    # Inventory（分库时逐仓写入各自分库）
+    stock = [(1, 50, 10), (2, 20, 5)]
+    for group in ([[s] for s in stock] if shard_router.enabled else [stock]):
+        use_warehouse(db, group[0][0])
+        if db.query(Inventory.id).first() is None:
+            products = db.query(Product).all()
+            items = []
+            for p in products:
+                for wid, qty, threshold in group:
+                    items.append(Inventory(warehouse_id=wid, product_id=p.id, available_qty=qty, locked_qty=0, warning_threshold=threshold))
+            db.add_all(items)
+            db.commit()
@@ -0,0 +1,363 @@
+"""大规模合成数据生成：商品、库存、历史出入库单，按 Zipf 分布模拟 SKU 热度。
+
+python -m app.db.seed --products 1000000 --warehouses 20 --inbound-orders 500000 --outbound-orders 2000000
+"""
+import argparse
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, func, insert, literal, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.bulk import bulk_insert_tuples
+from app.db.init_db import init_db
+from app.db.session import Base, SessionLocal, create_db_engine
+from app.models.inbound import InboundOrder, InboundOrderItem
+from app.models.inventory import Inventory
+from app.models.ledger import InventoryMovement
+from app.models.location import Location
+from app.models.outbound import OutboundOrder, OutboundOrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.models.warehouse import Warehouse
+from app.services.counting import ensure_counters, rebuild_counters
+from app.services.product_search import ensure_search_index, rebuild_search_index
+
+CATEGORIES = ["五金", "电子", "日用", "食品", "办公", "服装", "家居", "汽配", "母婴", "文体"]
+UNITS = ["pcs", "box", "kg", "set"]
+LOCATIONS_PER_WAREHOUSE = 50
+MAX_ITEMS_PER_ORDER = 5
+
+# 灌数期间推迟维护的表：二级索引先删后建，触发器（计数/全文索引）先删后重建并整体回填
+SEEDED_TABLES = [
+    Warehouse.__table__,
+    Location.__table__,
+    Product.__table__,
+    Inventory.__table__,
+    InventoryMovement.__table__,
+    InboundOrder.__table__,
+    InboundOrderItem.__table__,
+    OutboundOrder.__table__,
+    OutboundOrderItem.__table__,
+]
+
+# 仅在灌数连接上生效：不 fsync、加大页缓存
+_LOAD_PRAGMAS = {"synchronous": "OFF", "cache_size": -512 * 1024, "temp_store": "MEMORY"}
+
+
+class Zipf:
+    # 按排名 1/r^s 加权抽样；rank -> 商品的映射打乱，热门商品不集中在小 id 段
+    def __init__(self, items: Sequence[int], s: float, rng: random.Random) -> None:
+        self.items = list(items)
+        rng.shuffle(self.items)
+        weights = [1.0 / (r ** s) for r in range(1, len(self.items) + 1)]
+        self.cum = list(itertools.accumulate(weights))
+        self.total = self.cum[-1]
+        self.weights = weights
+        self.rng = rng
+
+    def sample(self, k: int) -> List[int]:
+        return self.rng.choices(self.items, cum_weights=self.cum, k=k)
+
+
+class Loader:
+    def __init__(self, conn: Connection, batch_size: int) -> None:
+        self.conn = conn
+        self.batch_size = batch_size
+        self.rows: Dict[str, int] = {}
+
+    def load(self, table: Table, cols: List[str], rows: Iterator[tuple]) -> int:
+        n = 0
+        it = iter(rows)
+        while True:
+            batch = list(itertools.islice(it, self.batch_size))
+            if not batch:
+                break
+            with self.conn.begin():
+                bulk_insert_tuples(self.conn, table, cols, batch)
+            n += len(batch)
+        self.rows[table.name] = self.rows.get(table.name, 0) + n
+        return n
+
+
+def _next_id(conn: Connection, table: Table) -> int:
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _drop_triggers(conn: Connection) -> List[str]:
+    if conn.dialect.name != "sqlite":
+        return []
+    names = [t.name for t in SEEDED_TABLES]
+    with conn.begin():
+        rows = conn.exec_driver_sql(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ({})".format(",".join("?" * len(names))),
+            tuple(names),
+        ).all()
+        for name, _ in rows:
+            conn.exec_driver_sql(f'DROP TRIGGER "{name}"')
+    return [sql for _, sql in rows]
+
+
+def _drop_indexes(conn: Connection) -> None:
+    with conn.begin():
+        for table in SEEDED_TABLES:
+            for idx in table.indexes:
+                idx.drop(bind=conn, checkfirst=True)
+
+
+def _restore(
+    conn: Connection, engine: Engine, triggers: List[str], counters: bool, search_index: bool, log: Callable[[str], None]
+) -> None:
+    t0 = time.perf_counter()
+    with conn.begin():
+        for table in SEEDED_TABLES:
+            for idx in table.indexes:
+                idx.create(bind=conn, checkfirst=True)
+        for sql in triggers:
+            conn.exec_driver_sql(sql)
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA optimize")
+    log(f"indexes rebuilt in {time.perf_counter() - t0:.1f}s")
+    # 触发器在灌数期间不工作，计数表与全文索引整体回填
+    t0 = time.perf_counter()
+    if counters:
+        rebuild_counters(engine)
+    if search_index:
+        rebuild_search_index(engine)
+    log(f"counters and search index rebuilt in {time.perf_counter() - t0:.1f}s")
+
+
+def seed(
+    engine: Engine,
+    products: int,
+    warehouses: int,
+    stock_coverage: float,
+    inbound_orders: int,
+    outbound_orders: int,
+    days: int = 365,
+    zipf_s: float = 1.1,
+    batch_size: int = 50000,
+    seed_: int = 42,
+    open_share: Optional[float] = None,
+    log: Callable[[str], None] = print,
+) -> Dict[str, int]:
+    # open_share：最近多大比例的单据仍未完成（出库单在待拣货/已拣货间均分）；默认入库 10%、出库 15%
+    rng = random.Random(seed_)
+    if open_share is None:
+        inbound_statuses = [("CONFIRMED", 0.9), ("PENDING", 0.1)]
+        outbound_statuses = [("SHIPPED", 0.85), ("PICKED", 0.05), ("PENDING_PICK", 0.1)]
+    else:
+        inbound_statuses = [("CONFIRMED", 1 - open_share), ("PENDING", 1.0)]
+        outbound_statuses = [("SHIPPED", 1 - open_share), ("PICKED", 0.5), ("PENDING_PICK", 0.5)]
+    now = datetime.utcnow().replace(microsecond=0)
+
+    # 基础数据（管理员账号、默认仓库）沿用 init_db，生成数据追加在现有 id 之后
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal(bind=engine)
+    try:
+        init_db(db)
+    finally:
+        db.close()
+    # 先按正常启动流程装好计数/全文索引触发器，灌数时随其他触发器一起摘除
+    counters = ensure_counters(engine)
+    search_index = ensure_search_index(engine)
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            for key, value in _LOAD_PRAGMAS.items():
+                conn.exec_driver_sql(f"PRAGMA {key}={value}")
+        conn.commit()
+        operator_id = conn.execute(select(User.id).where(User.username == "admin")).scalar()
+
+        wid0 = _next_id(conn, Warehouse.__table__)
+        pid0 = _next_id(conn, Product.__table__)
+        iid0 = _next_id(conn, InboundOrder.__table__)
+        oid0 = _next_id(conn, OutboundOrder.__table__)
+        conn.commit()
+
+        triggers = _drop_triggers(conn)
+        _drop_indexes(conn)
+
+        loader = Loader(conn, batch_size)
+        t0 = time.perf_counter()
+        wids = list(range(wid0, wid0 + warehouses))
+        pids = list(range(pid0, pid0 + products))
+        skus = {pid: f"SKU-{pid:08d}" for pid in pids}
+
+        loader.load(Warehouse.__table__, ["id", "name"], ((w, f"WH-{w:04d}") for w in wids))
+        loader.load(
+            Location.__table__,
+            ["warehouse_id", "code", "name"],
+            ((w, f"L{w}-{i:03d}", f"库位{w}-{i}") for w in wids for i in range(1, LOCATIONS_PER_WAREHOUSE + 1)),
+        )
+        loader.load(
+            Product.__table__,
+            ["id", "sku", "name", "category", "unit", "created_at"],
+            (
+                (pid, skus[pid], f"商品 {pid}", CATEGORIES[pid % len(CATEGORIES)], UNITS[pid % len(UNITS)],
+                 now - timedelta(days=days, seconds=products - i))
+                for i, pid in enumerate(pids)
+            ),
+        )
+        log(f"products: {products} rows")
+
+        popularity = Zipf(pids, zipf_s, rng)
+        loader.load(
+            Inventory.__table__,
+            ["warehouse_id", "product_id", "available_qty", "locked_qty", "warning_threshold", "updated_at"],
+            _inventory_rows(rng, popularity, wids, stock_coverage, now),
+        )
+        log(f"inventory: {loader.rows['inventory']} rows")
+        # 初始库存按 SEED 流水记入台账，快照/as-of 查询（上一快照 + 之后的流水）才包含灌入的库存
+        with conn.begin():
+            res = conn.execute(
+                insert(InventoryMovement.__table__).from_select(
+                    ["warehouse_id", "product_id", "delta", "reason", "source_type", "created_at"],
+                    select(
+                        Inventory.warehouse_id, Inventory.product_id, Inventory.available_qty,
+                        literal("SEED"), literal("seed"), literal(now),
+                    ).where(Inventory.warehouse_id >= wid0, Inventory.available_qty != 0),
+                )
+            )
+        loader.rows["inventory_movements"] = res.rowcount
+
+        span = timedelta(days=days).total_seconds()
+        loader.load(
+            InboundOrder.__table__,
+            ["id", "warehouse_id", "status", "created_by", "created_at", "confirmed_at"],
+            (
+                (oid, rng.choice(wids), status, operator_id, created, created + timedelta(hours=2) if status == "CONFIRMED" else None)
+                for oid, created, status in _orders(rng, iid0, inbound_orders, now, span, inbound_statuses)
+            ),
+        )
+        loader.load(
+            InboundOrderItem.__table__,
+            ["inbound_order_id", "product_id", "sku", "quantity", "unit_price"],
+            (
+                (oid, pid, skus[pid], qty, 100 + pid % 9900)
+                for oid, pid, qty in _order_lines(rng, popularity, iid0, inbound_orders, (10, 500))
+            ),
+        )
+        log(f"inbound orders: {inbound_orders} ({loader.rows['inbound_order_items']} lines)")
+
+        loader.load(
+            OutboundOrder.__table__,
+            ["id", "warehouse_id", "status", "created_by", "created_at", "picked_at", "shipped_at"],
+            (
+                (
+                    oid, rng.choice(wids), status, operator_id, created,
+                    created + timedelta(hours=1) if status != "PENDING_PICK" else None,
+                    created + timedelta(hours=4) if status == "SHIPPED" else None,
+                )
+                for oid, created, status in _orders(rng, oid0, outbound_orders, now, span, outbound_statuses)
+            ),
+        )
+        loader.load(
+            OutboundOrderItem.__table__,
+            ["outbound_order_id", "product_id", "sku", "quantity"],
+            ((oid, pid, skus[pid], qty) for oid, pid, qty in _order_lines(rng, popularity, oid0, outbound_orders, (1, 20))),
+        )
+        log(f"outbound orders: {outbound_orders} ({loader.rows['outbound_order_items']} lines)")
+
+        elapsed = time.perf_counter() - t0
+        total = sum(loader.rows.values())
+        log(f"loaded {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+        _restore(conn, engine, triggers, counters, search_index, log)
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+            conn.commit()
+    return loader.rows
+
+
+def _inventory_rows(rng: random.Random, popularity: Zipf, wids: List[int], coverage: float, now: datetime) -> Iterator[tuple]:
+    # 每仓按热度决定是否备货：热门 SKU 几乎每仓都有，长尾 SKU 零星分布；期望覆盖率约为 coverage
+    n = len(popularity.items)
+    scale = coverage * n / popularity.total
+    probs = [min(1.0, w * scale) for w in popularity.weights]
+    # 封顶损失的概率质量均摊到长尾
+    short = coverage * n - sum(probs)
+    tail = sum(1 for p in probs if p < 1.0)
+    bump = short / tail if tail and short > 0 else 0.0
+    probs = [min(1.0, p + bump) if p < 1.0 else p for p in probs]
+    if coverage >= 1.0:
+        # 封顶后仍达不到全覆盖，直接每仓备齐
+        probs = [1.0] * n
+    top = popularity.weights[0]
+    thresholds = (0, 10, 50)
+    for w in wids:
+        rand = rng.random
+        for pid, p, weight in zip(popularity.items, probs, popularity.weights):
+            if p < 1.0 and rand() >= p:
+                continue
+            yield (w, pid, int(rng.expovariate(1.0) * (20 + 5000 * weight / top)), 0, thresholds[pid % 3], now)
+
+
+def _orders(
+    rng: random.Random, start_id: int, n: int, now: datetime, span: float, statuses: List[Tuple[str, float]]
+) -> Iterator[Tuple[int, datetime, str]]:
+    # 单据时间随 id 递增、在 span 内均匀分布；最近的单据更可能处于未完成状态
+    if not n:
+        return
+    begin = now - timedelta(seconds=span)
+    done, done_w = statuses[0]
+    rest = [s for s, _ in statuses[1:]]
+    rest_w = [w for _, w in statuses[1:]]
+    step = span / n
+    for i in range(n):
+        created = begin + timedelta(seconds=int(i * step))
+        recent = i >= n * done_w
+        status = rng.choices(rest, weights=rest_w)[0] if recent and rest else done
+        yield start_id + i, created, status
+
+
+def _order_lines(
+    rng: random.Random, popularity: Zipf, start_id: int, n: int, qty_range: Tuple[int, int]
+) -> Iterator[Tuple[int, int, int]]:
+    lo, hi = qty_range
+    randint = rng.randint
+    for oid in range(start_id, start_id + n):
+        k = randint(1, MAX_ITEMS_PER_ORDER)
+        for pid in set(popularity.sample(k)):
+            yield oid, pid, randint(lo, hi)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a large synthetic WMS dataset (Zipfian SKU popularity)")
+    parser.add_argument("--url", default=None, help="database url (default: WMS_DATABASE_URL)")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--warehouses", type=int, default=10)
+    parser.add_argument("--stock-coverage", type=float, default=0.3, help="expected share of SKUs stocked per warehouse")
+    parser.add_argument("--inbound-orders", type=int, default=100000)
+    parser.add_argument("--outbound-orders", type=int, default=300000)
+    parser.add_argument("--days", type=int, default=365, help="history span of generated orders")
+    parser.add_argument("--zipf", type=float, default=1.1, help="zipf exponent of SKU popularity")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--open-share", type=float, default=None, help="share of recent orders left open")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    engine = create_db_engine(args.url)
+    try:
+        seed(
+            engine,
+            products=args.products,
+            warehouses=args.warehouses,
+            stock_coverage=args.stock_coverage,
+            inbound_orders=args.inbound_orders,
+            outbound_orders=args.outbound_orders,
+            days=args.days,
+            zipf_s=args.zipf,
+            batch_size=args.batch_size,
+            seed_=args.seed,
+            open_share=args.open_share,
+        )
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,79 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app/db/wms.db"
+from app.core import config
+
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+DB_PROFILES = ("wal", "default")
+
+
+def _sqlite_pragmas(profile: str) -> Dict[str, Any]:
+    if profile != "wal":
+        return {}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+        # 负数表示按 KiB 计
+        "cache_size": -config.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": config.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+
+
+def engine_kwargs(url: str) -> Dict[str, Any]:
+    u = make_url(url)
+    kwargs: Dict[str, Any] = {}
+    if u.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False, "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000}
+    # 内存库使用 SingletonThreadPool/StaticPool，不支持池大小参数
+    if u.database not in (None, "", ":memory:"):
+        kwargs.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT,
+            pool_recycle=config.DB_POOL_RECYCLE,
+        )
+    return kwargs
+
+
+def install_pragmas(eng: Engine, profile: str) -> None:
+    if eng.dialect.name != "sqlite":
+        return
+    pragmas = _sqlite_pragmas(profile)
+    if not pragmas:
+        return
+
+    @event.listens_for(eng, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, connection_record) -> None:
+        cur = dbapi_conn.cursor()
+        try:
+            for key, value in pragmas.items():
+                cur.execute(f"PRAGMA {key}={value}")
+        finally:
+            cur.close()
+
+
+def check_profile(profile: Optional[str]) -> str:
+    profile = profile or config.DB_PROFILE
+    if profile not in DB_PROFILES:
+        raise ValueError(f"unknown db profile: {profile}")
+    return profile
+
+
+def create_db_engine(url: Optional[str] = None, profile: Optional[str] = None) -> Engine:
+    url = url or SQLALCHEMY_DATABASE_URL
+    profile = check_profile(profile)
+    eng = create_engine(url, **engine_kwargs(url))
+    install_pragmas(eng, profile)
+    return eng
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-)
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
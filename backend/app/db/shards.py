@@ -0,0 +1,203 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from sqlalchemy import MetaData, Table, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from app.core import config
+from app.db.session import Base, SessionLocal, create_db_engine
+
+T = TypeVar("T")
+
+# 按仓库分库的业务表（均以 warehouse_id 为键，或从属于这些表）；
+# 用户、仓库、库位、商品、计数表与调拨单（两阶段提交的协调日志）留在中心库
+SHARD_TABLES = frozenset(
+    {
+        "inventory",
+        "inbound_orders",
+        "inbound_order_items",
+        "outbound_orders",
+        "outbound_order_items",
+        "stocktakes",
+        "stocktake_items",
+        "inventory_audit_logs",
+        "inventory_movements",
+        "inventory_snapshots",
+        "inventory_snapshot_items",
+        "transfer_legs",
+    }
+)
+
+# 分库内自增 id 从 warehouse_id << 32 起，id 全局唯一且可直接反推所在仓库；
+# 按 id 排序即先按仓库、再按仓内顺序，跨仓结果按仓库顺序拼接即保持 id 顺序
+SHARD_ID_BITS = 32
+
+CENTRAL_SCHEMA = "central"
+
+
+class UnknownWarehouse(Exception):
+    pass
+
+
+def shard_tables() -> List[Table]:
+    return [t for t in Base.metadata.sorted_tables if t.name in SHARD_TABLES]
+
+
+def central_tables() -> List[Table]:
+    return [t for t in Base.metadata.sorted_tables if t.name not in SHARD_TABLES]
+
+
+def shard_of_id(row_id: int) -> int:
+    return row_id >> SHARD_ID_BITS
+
+
+def _create_shard_tables(eng: Engine, warehouse_id: int) -> None:
+    # 分库表用 AUTOINCREMENT 建表，才能把自增起点设为 warehouse_id << 32；
+    # 跨库外键 SQLite 无法约束，建表时去掉（中心库的 create_all 不受影响）
+    existing = set(inspect(eng).get_table_names())
+    md = MetaData()
+    with eng.begin() as conn:
+        for table in shard_tables():
+            if table.name in existing:
+                continue
+            copy = table.to_metadata(md)
+            copy.dialect_options["sqlite"]["autoincrement"] = True
+            conn.execute(CreateTable(copy, include_foreign_key_constraints=[]))
+            for idx in copy.indexes:
+                idx.create(conn)
+            conn.exec_driver_sql(
+                "INSERT INTO sqlite_sequence(name, seq) VALUES (?, ?)", (table.name, warehouse_id << SHARD_ID_BITS)
+            )
+
+
+class ShardRouter:
+    # 每个仓库一个 SQLite 文件，各自独立的写锁；连接上 ATTACH 中心库，
+    # 未带库名的 products/users 等表由 SQLite 按 main -> central 顺序解析，原有联表查询无需改写
+    def __init__(self, enabled: bool, url_template: str, workers: int) -> None:
+        self.enabled = enabled
+        self.url_template = url_template
+        self.workers = workers
+        self._engines: Dict[int, Engine] = {}
+        self._warehouses: Optional[List[int]] = None
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def check(self) -> None:
+        url = make_url(config.DATABASE_URL)
+        if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+            raise ValueError("warehouse sharding requires a file-based SQLite WMS_DATABASE_URL")
+        if make_url(self.url_template.format(warehouse_id=0)).get_backend_name() != "sqlite":
+            raise ValueError("WMS_SHARD_URL_TEMPLATE must be a SQLite URL")
+
+    def warehouse_ids(self, refresh: bool = False) -> List[int]:
+        from app.models.warehouse import Warehouse
+
+        if self._warehouses is None or refresh:
+            db = SessionLocal()
+            try:
+                self._warehouses = sorted(wid for (wid,) in db.query(Warehouse.id).all())
+            finally:
+                db.close()
+        return self._warehouses
+
+    def engine_for(self, warehouse_id: int) -> Engine:
+        eng = self._engines.get(warehouse_id)
+        if eng is not None:
+            return eng
+        if warehouse_id not in self.warehouse_ids() and warehouse_id not in self.warehouse_ids(refresh=True):
+            raise UnknownWarehouse(warehouse_id)
+        with self._lock:
+            eng = self._engines.get(warehouse_id)
+            if eng is None:
+                eng = self._engines[warehouse_id] = self._create(warehouse_id)
+        return eng
+
+    def _create(self, warehouse_id: int) -> Engine:
+        from app.db.init_db import ensure_columns, ensure_indexes
+
+        eng = create_db_engine(self.url_template.format(warehouse_id=warehouse_id))
+        central_path = make_url(config.DATABASE_URL).database
+
+        @event.listens_for(eng, "connect")
+        def _attach_central(dbapi_conn, connection_record) -> None:
+            dbapi_conn.execute(f"ATTACH DATABASE ? AS {CENTRAL_SCHEMA}", (central_path,))
+
+        _create_shard_tables(eng, warehouse_id)
+        ensure_columns(eng)
+        ensure_indexes(eng, shard_tables())
+        return eng
+
+    def engines(self) -> Dict[int, Engine]:
+        return {wid: self.engine_for(wid) for wid in self.warehouse_ids()}
+
+    def session(self, warehouse_id: int) -> Session:
+        return SessionLocal(bind=self.engine_for(warehouse_id))
+
+    def fan_out(self, fn: Callable[[Session], T], warehouse_ids: Optional[Iterable[int]] = None) -> List[T]:
+        # 每个分库一个独立 session 并行执行 fn，结果按仓库顺序返回
+        wids = sorted(set(warehouse_ids)) if warehouse_ids is not None else self.warehouse_ids()
+
+        def run(wid: int) -> T:
+            db = self.session(wid)
+            try:
+                return fn(db)
+            finally:
+                db.close()
+
+        if len(wids) <= 1:
+            return [run(wid) for wid in wids]
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shard-fanout")
+        return list(self._pool.map(run, wids))
+
+    def dispose(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        for eng in self._engines.values():
+            eng.dispose()
+        self._engines.clear()
+
+
+shard_router = ShardRouter(config.SHARD_BY_WAREHOUSE, config.SHARD_URL_TEMPLATE, config.SHARD_FANOUT_WORKERS)
+
+
+def use_warehouse(db: Session, warehouse_id: int) -> Session:
+    # 把请求的 session 切到该仓分库（未分库时不做任何事）；切换前结束当前事务，须在本仓读写之前调用
+    if not shard_router.enabled:
+        return db
+    eng = shard_router.engine_for(warehouse_id)
+    if db.bind is not eng:
+        db.close()
+        db.bind = eng
+    return db
+
+
+def use_shard_of(db: Session, row_id: int) -> Session:
+    # 按单据 id 所属分库切换
+    return use_warehouse(db, shard_of_id(row_id)) if shard_router.enabled else db
+
+
+def for_each_shard(fn: Callable[[Session], T]) -> List[T]:
+    # 后台任务：未分库时在中心库执行一次，分库时逐库执行
+    if not shard_router.enabled:
+        db = SessionLocal()
+        try:
+            return [fn(db)]
+        finally:
+            db.close()
+    return shard_router.fan_out(fn)
+
+
+def on_warehouses(db: Session, warehouse_id: Optional[int], fn: Callable[[Session], T]) -> List[T]:
+    # 读接口：未分库时在当前 session 执行一次；分库时在指定仓分库执行，未指定仓库则逐库执行（结果按仓库顺序）
+    if not shard_router.enabled:
+        return [fn(db)]
+    if warehouse_id is not None:
+        return [fn(use_warehouse(db, warehouse_id))]
+    return shard_router.fan_out(fn)
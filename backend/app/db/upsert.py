@@ -0,0 +1,32 @@
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql.dml import Insert
+
+# INSERT ... ON CONFLICT (keys) DO UPDATE：SQLite 3.24+ 与 PostgreSQL 语法一致
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def upsert(
+    dialect: Dialect,
+    table: Table,
+    keys: Sequence[str],
+    set_: Callable[[Any], Dict[str, Any]],
+    values: Optional[Dict[str, Any]] = None,
+    where: Optional[Callable[[Any], Any]] = None,
+) -> Insert:
+    # set_/where 接收 excluded（待插入的那一行），返回冲突时的 SET 与更新条件；
+    # values 为空时由 execute 传入参数（单行或 executemany）
+    make = _INSERTS.get(dialect.name)
+    if make is None:
+        raise NotImplementedError(f"upsert is not supported on {dialect.name}")
+    stmt = make(table)
+    if values is not None:
+        stmt = stmt.values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[k] for k in keys],
+        set_=set_(stmt.excluded),
+        where=where(stmt.excluded) if where is not None else None,
+    )
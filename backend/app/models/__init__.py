@@ -7,4 +7,7 @@ from app.models.inventory import Inventory
 from app.models.inbound import InboundOrder, InboundOrderItem
 from app.models.outbound import OutboundOrder, OutboundOrderItem
 from app.models.stocktake import Stocktake, StocktakeItem
+from app.models.transfer import TransferLeg, TransferOrder, TransferOrderItem
 from app.models.audit import InventoryAuditLog
+from app.models.ledger import InventoryMovement, InventorySnapshot, InventorySnapshotItem
+from app.models.counter import RowCount
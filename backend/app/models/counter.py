@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.session import Base
+
+
+class RowCount(Base):
+    # 列表总数计数表：由数据库触发器维护（如 products、products:category:<分类>）
+    __tablename__ = "row_counts"
+
+    name = Column(String(150), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,12 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 
 from app.db.session import Base
 
 
 class InboundOrder(Base):
     __tablename__ = "inbound_orders"
+    __table_args__ = (
+        Index("ix_inbound_orders_wh_status_created", "warehouse_id", "status", "created_at"),
+        Index("ix_inbound_orders_wh_created", "warehouse_id", "created_at"),
+        # 不按仓库过滤的列表（全部 / 仅按状态）同样按 (created_at, id) 倒序分页，避免整表排序
+        Index("ix_inbound_orders_created", "created_at", "id"),
+        Index("ix_inbound_orders_status_created", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False, index=True)
@@ -1,15 +1,26 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, text
 
 from app.db.session import Base
 
 
 class Inventory(Base):
     __tablename__ = "inventory"
+    __table_args__ = (
+        # 每个 (仓库, 商品) 只有一行库存，库存写入据此走 INSERT ... ON CONFLICT
+        Index("ux_inventory_warehouse_product", "warehouse_id", "product_id", unique=True),
+        # 部分索引只收录低库存行，由数据库随每次库存写入自动维护
+        Index(
+            "ix_inventory_low_stock",
+            "warehouse_id",
+            sqlite_where=text("available_qty < warning_threshold"),
+            postgresql_where=text("available_qty < warning_threshold"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False, index=True)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
 
     available_qty = Column(Integer, nullable=False, default=0)
@@ -17,4 +28,7 @@ class Inventory(Base):
 
     warning_threshold = Column(Integer, nullable=False, default=0)
 
+    # 乐观并发：多字段/基于读取值的写入带 version 条件，每次变更 +1
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
     updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
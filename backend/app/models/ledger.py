@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class InventoryMovement(Base):
+    # 只追加的库存流水：每次库存变动一行（delta 可正可负）
+    __tablename__ = "inventory_movements"
+    __table_args__ = (Index("ix_inventory_movements_wh_product_id", "warehouse_id", "product_id", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    delta = Column(Integer, nullable=False)
+
+    reason = Column(String(20), nullable=False)  # INBOUND/OUTBOUND/TRANSFER/STOCKTAKE/RESERVE/RELEASE/RESERVATION_EXPIRED/SEED
+    source_type = Column(String(20), nullable=True)  # inbound/outbound/stocktake/transfer/seed
+    source_id = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class InventorySnapshot(Base):
+    # 周期性压缩快照：截至 last_movement_id 的全量库存
+    __tablename__ = "inventory_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime, nullable=False, index=True)
+    last_movement_id = Column(Integer, nullable=False, default=0)
+
+
+class InventorySnapshotItem(Base):
+    __tablename__ = "inventory_snapshot_items"
+    __table_args__ = (Index("ix_inventory_snapshot_items_snap_wh_product", "snapshot_id", "warehouse_id", "product_id"),)
+
+    id = Column(Integer, primary_key=True)
+    snapshot_id = Column(Integer, ForeignKey("inventory_snapshots.id"), nullable=False)
+    warehouse_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    available_qty = Column(Integer, nullable=False, default=0)
@@ -1,12 +1,21 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 
 from app.db.session import Base
 
 
 class OutboundOrder(Base):
     __tablename__ = "outbound_orders"
+    __table_args__ = (
+        Index("ix_outbound_orders_wh_status_created", "warehouse_id", "status", "created_at"),
+        Index("ix_outbound_orders_wh_created", "warehouse_id", "created_at"),
+        # 不按仓库过滤的列表（全部 / 仅按状态）同样按 (created_at, id) 倒序分页，避免整表排序
+        Index("ix_outbound_orders_created", "created_at", "id"),
+        Index("ix_outbound_orders_status_created", "status", "created_at", "id"),
+        # 占用过期清理按 (状态, 占用时间) 范围扫描
+        Index("ix_outbound_orders_status_reserved", "status", "reserved_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False, index=True)
@@ -15,6 +24,8 @@ class OutboundOrder(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     picked_at = Column(DateTime, nullable=True)
     shipped_at = Column(DateTime, nullable=True)
+    # 非空表示该单仍持有库存占用（inventory.locked_qty），发货核销或取消/过期释放后清空
+    reserved_at = Column(DateTime, nullable=True)
 
 
 class OutboundOrderItem(Base):
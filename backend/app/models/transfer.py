@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.db.session import Base
+
+
+class TransferOrder(Base):
+    __tablename__ = "transfer_orders"
+    __table_args__ = (Index("ix_transfer_orders_status_created", "status", "created_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    from_warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False, index=True)
+    to_warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False, index=True)
+    # 单库事务直接 COMPLETED；分库两阶段提交：PREPARING -> COMMITTED -> COMPLETED 或 PREPARING -> ABORTING -> ABORTED
+    status = Column(String(20), nullable=False, default="COMPLETED")
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TransferOrderItem(Base):
+    __tablename__ = "transfer_order_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    transfer_order_id = Column(Integer, ForeignKey("transfer_orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    sku = Column(String(32), nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+
+class TransferLeg(Base):
+    # 两阶段提交的参与者记录，与该仓库存变更同库同事务写入（分库时位于各仓分库）
+    __tablename__ = "transfer_legs"
+    __table_args__ = (Index("ux_transfer_legs_order_warehouse", "transfer_order_id", "warehouse_id", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    # 调拨单在中心库，分库时无法建外键
+    transfer_order_id = Column(Integer, nullable=False)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False)
+    role = Column(String(10), nullable=False)  # SOURCE/DEST
+    status = Column(String(20), nullable=False, default="PREPARED")  # PREPARED/COMMITTED/ABORTED
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,10 +1,20 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import auth_cache_stats, get_current_user, require_admin
+from app.core.query_stats import query_stats
 from app.core.response import ok
+from app.core.timefmt import fmt
+from app.core.versions import versions
 from app.db.deps import get_db
+from app.db.session import engine
+from app.db.shards import shard_router
 from app.models.user import User
+from app.services.audit import audit_recorder
+from app.services.counting import count_stats
+from app.services.ledger import take_snapshot
+from app.services.product_search import fts_enabled, rebuild_search_index
+from app.services.sku_resolver import sku_resolver
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -24,3 +34,55 @@ def list_users(user=Depends(get_current_user), db: Session = Depends(get_db)):
             for u in rows
         ]
     )
+
+
+@router.get("/cache-stats")
+def cache_stats(user=Depends(require_admin)):
+    return ok(
+        {
+            "auth": auth_cache_stats(),
+            "sku_resolver": sku_resolver.stats(),
+            "counts": count_stats(),
+            "versions": versions.stats(),
+        }
+    )
+
+
+@router.get("/audit-stats")
+def audit_stats(user=Depends(require_admin)):
+    return ok(audit_recorder.stats())
+
+
+@router.post("/ledger/snapshot")
+def ledger_snapshot(user=Depends(require_admin), db: Session = Depends(get_db)):
+    def snapshot(db: Session):
+        snap = take_snapshot(db)
+        if snap is None:
+            return None
+        return {"id": snap.id, "taken_at": fmt(snap.taken_at), "last_movement_id": snap.last_movement_id}
+
+    if not shard_router.enabled:
+        data = snapshot(db)
+        return ok(None, message="no new movements") if data is None else ok(data)
+    # 分库：逐库压缩，返回本次新建的各分库快照
+    data = [s for s in shard_router.fan_out(snapshot) if s is not None]
+    return ok(data or None, message="ok" if data else "no new movements")
+
+
+@router.post("/products/search-index/rebuild")
+def rebuild_product_search(user=Depends(require_admin)):
+    if not fts_enabled():
+        return ok(None, message="full-text search not enabled")
+    rebuild_search_index(engine)
+    return ok(True)
+
+
+@router.get("/query-stats")
+def get_query_stats(user=Depends(require_admin)):
+    return ok(query_stats.snapshot())
+
+
+@router.post("/query-stats/reset")
+def reset_query_stats(user=Depends(require_admin)):
+    query_stats.reset()
+    return ok(True)
@@ -1,11 +1,13 @@
 import logging
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.core.jwt import create_access_token
 from app.core.response import ok
-from app.core.security import verify_password
+from app.core.security import HashPoolBusy, verify_and_update_password
 from app.db.deps import get_db
 from app.models.user import User
 from app.schemas.auth import LoginRequest
@@ -15,31 +17,54 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+def _find_user(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.username == username).first()
+
+
+def _save_password_hash(db: Session, user: User, password_hash: str) -> None:
+    user.password_hash = password_hash
+    db.commit()
+
+
 @router.post("/login")
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+async def login(payload: LoginRequest, db: Session = Depends(get_db)):
     # BE15: 敏感信息泄露（日志打印明文密码）
     logger.warning("login attempt user=%s password=%s", payload.username, payload.password)
 
-    user = db.query(User).filter(User.username == payload.username).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+    # 查询走线程池，bcrypt 校验走专用有界线程池，避免登录高峰拖垮其他接口
+    user = await run_in_threadpool(_find_user, db, payload.username)
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await verify_and_update_password(payload.password, user.password_hash)
+        except HashPoolBusy:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={"code": "TOO_MANY_REQUESTS", "message": "login busy, retry later"},
+                headers={"Retry-After": "1"},
+            )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "UNAUTHORIZED", "message": "invalid username or password"},
         )
 
     token = create_access_token({"sub": str(user.id), "role": user.role})
-    return ok(
-        {
-            "access_token": token,
-            "token_type": "bearer",
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "role": user.role,
-                "warehouse_ids": user.warehouse_ids,
-            },
-        }
-    )
+    data = {
+        "access_token": token,
+        "token_type": "bearer",
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "role": user.role,
+            "warehouse_ids": user.warehouse_ids,
+        },
+    }
+
+    # bcrypt 成本调整后透明重算哈希（commit 会使 user 属性过期，故放在最后）
+    if new_hash:
+        await run_in_threadpool(_save_password_hash, db, user, new_hash)
+    return ok(data)
 
 
 @router.post("/logout")
@@ -1,33 +1,51 @@
+from datetime import date
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.export import EXPORT_FORMAT_PATTERN, export_response
+from app.core.metrics import metrics
+from app.core.pagination import DEFAULT_LIMIT, MAX_LIMIT, filter_date_range, warehouse_keyset_page
 from app.core.response import ok
 from app.core.timefmt import fmt
-from app.db.deps import get_db
+from app.db.deps import get_async_db, get_db
+from app.db.shards import use_shard_of, use_warehouse
 from app.models.inbound import InboundOrder, InboundOrderItem
-from app.models.inventory import Inventory
 from app.models.product import Product
 from app.schemas.inbound import InboundCreateRequest, InboundUpdateRequest
+from app.services.audit import audit_recorder
+from app.services.ledger import record_movement
+from app.services.sku_resolver import sku_resolver
+from app.services.stock import adjust_stock, run_with_retry
 
 router = APIRouter(prefix="/api/inbound", tags=["inbound"])
+async_router = APIRouter(prefix="/api/inbound", tags=["inbound"])
 
 
-@router.get("")
-def list_inbound(
-    warehouse_id: Optional[int] = None,
-    user=Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    q = db.query(InboundOrder)
-    if warehouse_id is not None:
-        q = q.filter(InboundOrder.warehouse_id == warehouse_id)
+def _list_inbound(
+    db: Session,
+    warehouse_id: Optional[int],
+    status_: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    after_id: Optional[int],
+    limit: int,
+) -> Dict[str, Any]:
+    def build(db: Session):
+        q = db.query(InboundOrder)
+        if warehouse_id is not None:
+            q = q.filter(InboundOrder.warehouse_id == warehouse_id)
+        if status_:
+            q = q.filter(InboundOrder.status == status_)
+        return filter_date_range(q, InboundOrder.created_at, date_from, date_to)
 
-    rows = q.order_by(InboundOrder.id.desc()).all()
-    return ok(
-        [
+    rows, next_after_id = warehouse_keyset_page(db, build, InboundOrder, warehouse_id, after_id, limit)
+    return {
+        "items": [
             {
                 "id": r.id,
                 "warehouse_id": r.warehouse_id,
@@ -36,8 +54,52 @@ def list_inbound(
                 "confirmed_at": fmt(r.confirmed_at),
             }
             for r in rows
-        ]
-    )
+        ],
+        "next_after_id": next_after_id,
+        "limit": limit,
+    }
+
+
+def _get_inbound(db: Session, inbound_id: int) -> Dict[str, Any]:
+    use_shard_of(db, inbound_id)
+    order = db.query(InboundOrder).filter(InboundOrder.id == inbound_id).first()
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "inbound not found"},
+        )
+
+    items = db.query(InboundOrderItem).filter(InboundOrderItem.inbound_order_id == order.id).all()
+    return {
+        "id": order.id,
+        "warehouse_id": order.warehouse_id,
+        "status": order.status,
+        "created_at": fmt(order.created_at),
+        "confirmed_at": fmt(order.confirmed_at),
+        # FE17/BE21: 不校验是否属于当前用户授权仓库（越权可读）
+        "items": [
+            {
+                "sku": it.sku,
+                "quantity": it.quantity,
+                "unit_price": (it.unit_price or 0) / 100,
+            }
+            for it in items
+        ],
+    }
+
+
+@router.get("")
+def list_inbound(
+    warehouse_id: Optional[int] = None,
+    status_: Optional[str] = Query(default=None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return ok(_list_inbound(db, warehouse_id, status_, date_from, date_to, after_id, limit))
 
 
 @router.post("")
@@ -46,13 +108,15 @@ def create_inbound(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    use_warehouse(db, payload.warehouse_id)
     order = InboundOrder(warehouse_id=payload.warehouse_id, status="PENDING", created_by=user.id)
     db.add(order)
     db.commit()
     db.refresh(order)
 
+    products = sku_resolver.resolve_many(db, [it.sku for it in payload.items])
     for it in payload.items:
-        p = db.query(Product).filter(Product.sku == it.sku).first()
+        p = products.get(it.sku)
         if not p:
             continue
         # BE09: 不校验 quantity > 0
@@ -71,38 +135,66 @@ def create_inbound(
     return {"id": order.id, "warehouse_id": order.warehouse_id, "status": order.status, "created_at": order.created_at.isoformat()}
 
 
+@router.get("/export")
+def export_inbound(
+    format_: str = Query(default="csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    warehouse_id: Optional[int] = None,
+    status_: Optional[str] = Query(default=None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sku: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    # 按明细行导出（无明细的单据也输出一行）
+    stmt = (
+        select(
+            InboundOrder.id,
+            InboundOrder.warehouse_id,
+            InboundOrder.status,
+            InboundOrder.created_at,
+            InboundOrder.confirmed_at,
+            InboundOrderItem.sku,
+            InboundOrderItem.quantity,
+            InboundOrderItem.unit_price,
+        )
+        .outerjoin(InboundOrderItem, InboundOrderItem.inbound_order_id == InboundOrder.id)
+        .order_by(InboundOrder.id, InboundOrderItem.id)
+    )
+    if warehouse_id is not None:
+        stmt = stmt.where(InboundOrder.warehouse_id == warehouse_id)
+    if status_:
+        stmt = stmt.where(InboundOrder.status == status_)
+    if sku:
+        stmt = stmt.where(InboundOrderItem.sku == sku)
+    stmt = filter_date_range(stmt, InboundOrder.created_at, date_from, date_to)
+
+    header = ["id", "warehouse_id", "status", "created_at", "confirmed_at", "sku", "quantity", "unit_price_cents"]
+    return export_response(stmt, header, format_, "inbound_orders", warehouse_id)
+
+
 @router.get("/{inbound_id}")
 def get_inbound(
     inbound_id: int,
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    order = db.query(InboundOrder).filter(InboundOrder.id == inbound_id).first()
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={"code": "NOT_FOUND", "message": "inbound not found"},
-        )
+    return ok(_get_inbound(db, inbound_id))
+
 
+def _confirm_inbound(db: Session, order_id: int, operator_id: int) -> None:
+    order = db.query(InboundOrder).filter(InboundOrder.id == order_id).first()
     items = db.query(InboundOrderItem).filter(InboundOrderItem.inbound_order_id == order.id).all()
-    return ok(
-        {
-            "id": order.id,
-            "warehouse_id": order.warehouse_id,
-            "status": order.status,
-            "created_at": fmt(order.created_at),
-            "confirmed_at": fmt(order.confirmed_at),
-            # FE17/BE21: 不校验是否属于当前用户授权仓库（越权可读）
-            "items": [
-                {
-                    "sku": it.sku,
-                    "quantity": it.quantity,
-                    "unit_price": (it.unit_price or 0) / 100,
-                }
-                for it in items
-            ],
-        }
-    )
+    for it in items:
+        p = db.query(Product).filter(Product.id == it.product_id).first()
+        if not p:
+            continue
+        # BE09 的负数行照原逻辑直接累加（可扣成负数，行不存在时以负数新建）
+        old_qty, new_qty = adjust_stock(db, order.warehouse_id, p.id, it.quantity or 0, create=True, check=False)
+        audit_recorder.record(db, "INBOUND", order.warehouse_id, p.sku, old_qty, new_qty, operator_id=operator_id)
+        record_movement(db, order.warehouse_id, p.id, it.quantity or 0, "INBOUND", "inbound", order.id)
+
+    order.status = "CONFIRMED"
+    db.commit()
 
 
 @router.put("/{inbound_id}/confirm")
@@ -111,31 +203,14 @@ def confirm_inbound(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    use_shard_of(db, inbound_id)
     order = db.query(InboundOrder).filter(InboundOrder.id == inbound_id).first()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "inbound not found"})
 
     # BE14: 不校验状态，允许重复确认
-    items = db.query(InboundOrderItem).filter(InboundOrderItem.inbound_order_id == order.id).all()
-    for it in items:
-        p = db.query(Product).filter(Product.id == it.product_id).first()
-        if not p:
-            continue
-        inv = (
-            db.query(Inventory)
-            .filter(Inventory.warehouse_id == order.warehouse_id)
-            .filter(Inventory.product_id == p.id)
-            .first()
-        )
-        if not inv:
-            inv = Inventory(warehouse_id=order.warehouse_id, product_id=p.id, available_qty=0, locked_qty=0)
-            db.add(inv)
-            db.commit()
-            db.refresh(inv)
-        inv.available_qty = (inv.available_qty or 0) + (it.quantity or 0)
-
-    order.status = "CONFIRMED"
-    db.commit()
+    run_with_retry(db, _confirm_inbound, order.id, user.id)
+    metrics.inventory_mutation("inbound_confirm")
     return ok(True)
 
 
@@ -146,6 +221,7 @@ def update_inbound_items(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    use_shard_of(db, inbound_id)
     order = db.query(InboundOrder).filter(InboundOrder.id == inbound_id).first()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "inbound not found"})
@@ -154,8 +230,9 @@ def update_inbound_items(
     db.query(InboundOrderItem).filter(InboundOrderItem.inbound_order_id == order.id).delete()
     db.commit()
 
+    products = sku_resolver.resolve_many(db, [it.sku for it in payload.items])
     for it in payload.items:
-        p = db.query(Product).filter(Product.sku == it.sku).first()
+        p = products.get(it.sku)
         if not p:
             continue
         db.add(
@@ -170,3 +247,26 @@ def update_inbound_items(
     db.commit()
 
     return ok(True)
+
+
+@async_router.get("")
+async def list_inbound_async(
+    warehouse_id: Optional[int] = None,
+    status_: Optional[str] = Query(default=None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return ok(await db.run_sync(_list_inbound, warehouse_id, status_, date_from, date_to, after_id, limit))
+
+
+@async_router.get("/{inbound_id:int}")
+async def get_inbound_async(
+    inbound_id: int,
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return ok(await db.run_sync(_get_inbound, inbound_id))
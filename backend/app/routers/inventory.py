@@ -1,28 +1,56 @@
-from typing import Any, Dict, List, Optional
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.etag import compute_etag, not_modified, with_etag
+from app.core.export import EXPORT_FORMAT_PATTERN, export_response
+from app.core.metrics import metrics
+from app.core.pagination import filter_date_range
 from app.core.response import ok
-from app.db.deps import get_db
+from app.core.rows import RowSerializer
+from app.core.timefmt import fmt
+from app.db.deps import get_async_db, get_db
+from app.db.shards import on_warehouses, shard_router, use_warehouse
+from app.models.audit import InventoryAuditLog
 from app.models.inventory import Inventory
 from app.models.product import Product
 from app.models.stocktake import Stocktake, StocktakeItem
+from app.models.transfer import TransferOrder, TransferOrderItem
 from app.models.warehouse import Warehouse
-from app.schemas.inventory import StocktakeSubmitRequest, TransferRequest, WarningThresholdUpdate
+from app.schemas.inventory import StocktakeSubmitRequest, TransferOrderCreateRequest, TransferRequest, WarningThresholdUpdate
+from app.services.audit import audit_recorder
+from app.services.ledger import AsOfOutOfRange, record_movement, stock_as_of
+from app.services.sku_resolver import ResolvedProduct, sku_resolver
+from app.services.stock import InsufficientStock, adjust_stock, run_with_retry, set_warning_threshold
+from app.services.stocktake import apply_stocktake
+from app.services.transfer import apply_transfer, apply_transfer_2pc
 
 router = APIRouter(prefix="/api/inventory", tags=["inventory"])
+async_router = APIRouter(prefix="/api/inventory", tags=["inventory"])
 
+INVENTORY_ROW = RowSerializer(
+    ("id", Inventory.id),
+    ("warehouse_id", Inventory.warehouse_id),
+    ("sku", Product.sku),
+    ("product_name", Product.name),
+    ("available_qty", Inventory.available_qty),
+    ("locked_qty", Inventory.locked_qty),
+    ("warning_threshold", Inventory.warning_threshold),
+)
+WARNING_ROW = RowSerializer(
+    *zip(INVENTORY_ROW.keys, INVENTORY_ROW.columns),
+    ("shortage", Inventory.warning_threshold - Inventory.available_qty),
+)
 
-@router.get("")
-def list_inventory(
-    warehouse_id: Optional[int] = None,
-    sku: Optional[str] = None,
-    user=Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
+
+def _list_inventory(db: Session, warehouse_id: Optional[int], sku: Optional[str]) -> List[Dict[str, Any]]:
     # BE16: sku 过滤使用字符串拼接 SQL（SQL 注入风险）
     if sku:
         sql = text(
@@ -35,27 +63,160 @@ def list_inventory(
             """
         )
         rows = db.execute(sql).mappings().all()
-        return ok([dict(r) for r in rows])
+        return [dict(r) for r in rows]
 
-    q = db.query(Inventory, Product).join(Product, Product.id == Inventory.product_id)
+    q = INVENTORY_ROW.query(db).join(Product, Product.id == Inventory.product_id)
     if warehouse_id is not None:
         q = q.filter(Inventory.warehouse_id == warehouse_id)
+    return INVENTORY_ROW.dump(q.all())
+
+
+def _inventory_etag(warehouse_id: Optional[int], sku: Optional[str]) -> Optional[str]:
+    # sku 过滤走跨仓 SQL（忽略 warehouse_id），此时依赖全表库存版本；列表含商品名，也依赖商品版本
+    scope = None if sku else warehouse_id
+    return compute_etag(("inventory", warehouse_id, sku), [("inventory", scope), ("products", None)])
+
+
+@router.get("")
+def list_inventory(
+    request: Request,
+    warehouse_id: Optional[int] = None,
+    sku: Optional[str] = None,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    etag = _inventory_etag(warehouse_id, sku)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    # sku 过滤跨仓（见 BE16），分库时同样逐库查询
+    parts = on_warehouses(db, None if sku else warehouse_id, lambda db: _list_inventory(db, warehouse_id, sku))
+    return with_etag(ok([r for part in parts for r in part]), etag)
+
+
+def _list_warnings(db: Session, warehouse_id: Optional[int]) -> List[Dict[str, Any]]:
+    # 条件需与 ix_inventory_low_stock 的 WHERE 完全一致才能命中部分索引
+    q = (
+        WARNING_ROW.query(db)
+        .join(Product, Product.id == Inventory.product_id)
+        .filter(Inventory.available_qty < Inventory.warning_threshold)
+    )
+    if warehouse_id is not None:
+        q = q.filter(Inventory.warehouse_id == warehouse_id)
+    return WARNING_ROW.dump(q.order_by(Inventory.warehouse_id, Inventory.id).all())
+
+
+@router.get("/warnings")
+def list_warnings(
+    warehouse_id: Optional[int] = None,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    parts = on_warehouses(db, warehouse_id, lambda db: _list_warnings(db, warehouse_id))
+    return ok([r for part in parts for r in part])
+
 
-    rows = q.all()
-    out: List[Dict[str, Any]] = []
-    for inv, p in rows:
-        out.append(
+@router.get("/as-of")
+def inventory_as_of(
+    ts: datetime,
+    warehouse_id: Optional[int] = None,
+    sku: Optional[str] = None,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    product_ids = None
+    if sku:
+        p = sku_resolver.resolve(db, sku)
+        if not p:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "product not found"})
+        product_ids = [p.id]
+
+    try:
+        stock: Dict[Tuple[int, int], int] = {}
+        for part in on_warehouses(db, warehouse_id, lambda db: stock_as_of(db, ts, warehouse_id, product_ids)):
+            stock.update(part)
+    except AsOfOutOfRange:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "BAD_REQUEST", "message": "ts is earlier than the first inventory snapshot"},
+        )
+
+    names = {}
+    if stock:
+        pids = {pid for _, pid in stock}
+        names = {r.id: r for r in db.query(Product.id, Product.sku, Product.name).filter(Product.id.in_(pids)).all()}
+    return ok(
+        [
             {
-                "id": inv.id,
-                "warehouse_id": inv.warehouse_id,
-                "sku": p.sku,
-                "product_name": p.name,
-                "available_qty": inv.available_qty,
-                "locked_qty": inv.locked_qty,
-                "warning_threshold": inv.warning_threshold,
+                "warehouse_id": wid,
+                "product_id": pid,
+                "sku": names[pid].sku if pid in names else None,
+                "product_name": names[pid].name if pid in names else None,
+                "available_qty": qty,
             }
+            for (wid, pid), qty in sorted(stock.items())
+        ]
+    )
+
+
+@router.get("/export")
+def export_inventory(
+    format_: str = Query(default="csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    warehouse_id: Optional[int] = None,
+    sku: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    stmt = (
+        select(
+            Inventory.id,
+            Inventory.warehouse_id,
+            Product.sku,
+            Product.name,
+            Inventory.available_qty,
+            Inventory.locked_qty,
+            Inventory.warning_threshold,
+            Inventory.updated_at,
         )
-    return ok(out)
+        .join(Product, Product.id == Inventory.product_id)
+        .order_by(Inventory.id)
+    )
+    if warehouse_id is not None:
+        stmt = stmt.where(Inventory.warehouse_id == warehouse_id)
+    if sku:
+        stmt = stmt.where(Product.sku.contains(sku))
+
+    header = ["id", "warehouse_id", "sku", "product_name", "available_qty", "locked_qty", "warning_threshold", "updated_at"]
+    return export_response(stmt, header, format_, "inventory", warehouse_id)
+
+
+@router.get("/audit-logs/export")
+def export_audit_logs(
+    format_: str = Query(default="csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    warehouse_id: Optional[int] = None,
+    sku: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    user=Depends(get_current_user),
+):
+    stmt = select(
+        InventoryAuditLog.id,
+        InventoryAuditLog.warehouse_id,
+        InventoryAuditLog.operator_id,
+        InventoryAuditLog.action,
+        InventoryAuditLog.sku,
+        InventoryAuditLog.old_qty,
+        InventoryAuditLog.new_qty,
+        InventoryAuditLog.delta,
+        InventoryAuditLog.created_at,
+    ).order_by(InventoryAuditLog.id)
+    if warehouse_id is not None:
+        stmt = stmt.where(InventoryAuditLog.warehouse_id == warehouse_id)
+    if sku:
+        stmt = stmt.where(InventoryAuditLog.sku == sku)
+    stmt = filter_date_range(stmt, InventoryAuditLog.created_at, date_from, date_to)
+
+    header = ["id", "warehouse_id", "operator_id", "action", "sku", "old_qty", "new_qty", "delta", "created_at"]
+    return export_response(stmt, header, format_, "inventory_audit_logs", warehouse_id)
 
 
 @router.put("/warning-threshold")
@@ -64,27 +225,31 @@ def update_warning_threshold(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    p = db.query(Product).filter(Product.sku == payload.sku).first()
+    p = sku_resolver.resolve(db, payload.sku)
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "product not found"})
 
-    inv = (
-        db.query(Inventory)
-        .filter(Inventory.warehouse_id == payload.warehouse_id)
-        .filter(Inventory.product_id == p.id)
-        .first()
-    )
-    if not inv:
-        inv = Inventory(warehouse_id=payload.warehouse_id, product_id=p.id, available_qty=0, locked_qty=0)
-        db.add(inv)
-        db.commit()
-        db.refresh(inv)
-
-    inv.warning_threshold = payload.warning_threshold
+    use_warehouse(db, payload.warehouse_id)
+    set_warning_threshold(db, payload.warehouse_id, p.id, payload.warning_threshold)
     db.commit()
     return ok(True)
 
 
+def _transfer_leg(db: Session, warehouse_id: int, p: ResolvedProduct, delta: int, operator_id: int) -> None:
+    # 单边原子增减并提交；源仓不足时不做任何修改
+    use_warehouse(db, warehouse_id)
+    try:
+        changed = adjust_stock(db, warehouse_id, p.id, delta, create=delta > 0)
+    except InsufficientStock:
+        changed = None
+    if changed is None:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"code": "INSUFFICIENT_STOCK", "message": "insufficient stock"})
+    audit_recorder.record(db, "TRANSFER", warehouse_id, p.sku, changed[0], changed[1], operator_id=operator_id)
+    record_movement(db, warehouse_id, p.id, delta, "TRANSFER", "transfer")
+    db.commit()
+
+
 @router.post("/transfer")
 def transfer_inventory(
     payload: TransferRequest,
@@ -94,85 +259,222 @@ def transfer_inventory(
     if payload.quantity <= 0:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail={"code": "VALIDATION_ERROR", "message": "quantity must be >0"})
 
-    p = db.query(Product).filter(Product.sku == payload.sku).first()
+    p = sku_resolver.resolve(db, payload.sku)
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "product not found"})
 
-    src = (
-        db.query(Inventory)
-        .filter(Inventory.warehouse_id == payload.from_warehouse_id)
-        .filter(Inventory.product_id == p.id)
-        .first()
-    )
-    if not src or (src.available_qty or 0) < payload.quantity:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"code": "INSUFFICIENT_STOCK", "message": "insufficient stock"})
-
     # BE10: 非原子 —— 先扣源仓并 commit，再做目标仓（若后续报错会导致数据不一致）
-    src.available_qty = (src.available_qty or 0) - payload.quantity
-    db.commit()
+    run_with_retry(db, _transfer_leg, payload.from_warehouse_id, p, -payload.quantity, user.id)
 
     # 故意把目标仓存在性校验放在 commit 之后
     dst_wh = db.query(Warehouse).filter(Warehouse.id == payload.to_warehouse_id).first()
     if not dst_wh:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "destination warehouse not found"})
 
-    dst = (
-        db.query(Inventory)
-        .filter(Inventory.warehouse_id == payload.to_warehouse_id)
-        .filter(Inventory.product_id == p.id)
-        .first()
+    run_with_retry(db, _transfer_leg, payload.to_warehouse_id, p, payload.quantity, user.id)
+    metrics.inventory_mutation("transfer")
+
+    return ok(True)
+
+
+def _validate_transfer_order(db: Session, payload: TransferOrderCreateRequest) -> List[Dict[str, Any]]:
+    # 全部行一次性校验：仓库、数量、SKU（批量解析），任一不通过则整单拒绝
+    if payload.from_warehouse_id == payload.to_warehouse_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"code": "VALIDATION_ERROR", "message": "source and destination warehouse must differ"},
+        )
+    bad_qty = [it.sku for it in payload.items if it.quantity <= 0]
+    if bad_qty:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"code": "VALIDATION_ERROR", "message": "quantity must be >0", "data": bad_qty},
+        )
+    wids = {payload.from_warehouse_id, payload.to_warehouse_id}
+    found = {wid for (wid,) in db.query(Warehouse.id).filter(Warehouse.id.in_(wids)).all()}
+    if found != wids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "warehouse not found", "data": sorted(wids - found)},
+        )
+    products = sku_resolver.resolve_many(db, [it.sku for it in payload.items])
+    missing = list(dict.fromkeys(it.sku for it in payload.items if it.sku not in products))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "NOT_FOUND", "message": "product not found", "data": missing},
+        )
+    return [{"product_id": products[it.sku].id, "sku": it.sku, "quantity": it.quantity} for it in payload.items]
+
+
+def _transfer_shortage(item_rows: List[Dict[str, Any]], exc: InsufficientStock) -> HTTPException:
+    skus = {r["product_id"]: r["sku"] for r in item_rows}
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "code": "INSUFFICIENT_STOCK",
+            "message": "insufficient stock",
+            "data": [{"sku": skus[pid], "requested": qty, "available": have} for pid, qty, have in exc.shortages],
+        },
     )
-    if not dst:
-        dst = Inventory(warehouse_id=payload.to_warehouse_id, product_id=p.id, available_qty=0, locked_qty=0)
-        db.add(dst)
-        db.commit()
-        db.refresh(dst)
 
-    dst.available_qty = (dst.available_qty or 0) + payload.quantity
+
+def _create_transfer_order(
+    db: Session, payload: TransferOrderCreateRequest, item_rows: List[Dict[str, Any]], operator_id: int
+) -> Dict[str, Any]:
+    order = TransferOrder(
+        from_warehouse_id=payload.from_warehouse_id,
+        to_warehouse_id=payload.to_warehouse_id,
+        status="COMPLETED",
+        created_by=operator_id,
+    )
+    db.add(order)
+    db.flush()
+    try:
+        summary = apply_transfer(db, order.id, payload.from_warehouse_id, payload.to_warehouse_id, item_rows, operator_id)
+    except InsufficientStock as exc:
+        db.rollback()
+        raise _transfer_shortage(item_rows, exc)
+    data = {"id": order.id, "status": order.status, **summary}
     db.commit()
+    return data
 
-    # BE18: 缺少审计日志（不写入 InventoryAuditLog）
-    return ok(True)
 
+@router.post("/transfer-orders")
+def create_transfer_order(
+    payload: TransferOrderCreateRequest,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    item_rows = _validate_transfer_order(db, payload)
+    if shard_router.enabled:
+        # 两仓分属不同分库：两阶段提交
+        try:
+            result = apply_transfer_2pc(db, payload.from_warehouse_id, payload.to_warehouse_id, item_rows, user.id)
+        except InsufficientStock as exc:
+            raise _transfer_shortage(item_rows, exc)
+    else:
+        result = run_with_retry(db, _create_transfer_order, payload, item_rows, user.id)
+    metrics.inventory_mutation("transfer")
+    return ok(result)
 
-@router.post("/stocktake")
-def submit_stocktake(
-    payload: StocktakeSubmitRequest,
+
+@router.get("/transfer-orders/{transfer_id}")
+def get_transfer_order(
+    transfer_id: int,
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    order = db.query(TransferOrder).filter(TransferOrder.id == transfer_id).first()
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "transfer order not found"})
+    items = (
+        db.query(TransferOrderItem.sku, TransferOrderItem.quantity)
+        .filter(TransferOrderItem.transfer_order_id == order.id)
+        .order_by(TransferOrderItem.id)
+        .all()
+    )
+    return ok(
+        {
+            "id": order.id,
+            "from_warehouse_id": order.from_warehouse_id,
+            "to_warehouse_id": order.to_warehouse_id,
+            "status": order.status,
+            "created_at": fmt(order.created_at),
+            "items": [{"sku": sku, "quantity": qty} for sku, qty in items],
+        }
+    )
+
+
+def _get_or_create_stocktake(db: Session, warehouse_id: int, stocktake_id: Optional[int]) -> Stocktake:
     # BE22: 允许重复提交（不校验 status）
-    if payload.stocktake_id is not None:
-        st = db.query(Stocktake).filter(Stocktake.id == payload.stocktake_id).first()
+    if stocktake_id is not None:
+        st = db.query(Stocktake).filter(Stocktake.id == stocktake_id).first()
         if not st:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "stocktake not found"})
-    else:
-        st = Stocktake(warehouse_id=payload.warehouse_id, status="SUBMITTED")
-        db.add(st)
-        db.commit()
-        db.refresh(st)
-
-    # 保存盘点明细（简化：每次提交都追加 item）
-    for it in payload.items:
-        p = db.query(Product).filter(Product.sku == it.sku).first()
-        if not p:
-            continue
-        db.add(StocktakeItem(stocktake_id=st.id, product_id=p.id, sku=it.sku, counted_qty=it.counted_qty))
+        return st
+    st = Stocktake(warehouse_id=warehouse_id, status="SUBMITTED")
+    db.add(st)
+    db.flush()
+    return st
 
-        inv = (
-            db.query(Inventory)
-            .filter(Inventory.warehouse_id == payload.warehouse_id)
-            .filter(Inventory.product_id == p.id)
-            .first()
+
+def _iter_stocktake_csv(upload: UploadFile) -> Iterator[Tuple[str, int]]:
+    # 逐行解析上传的 CSV（表头：sku,counted_qty）
+    reader = csv.reader(io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""))
+    header = [h.strip().lower() for h in next(reader, [])]
+    if header[:2] != ["sku", "counted_qty"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"code": "VALIDATION_ERROR", "message": "csv header must be sku,counted_qty"},
         )
-        if not inv:
-            inv = Inventory(warehouse_id=payload.warehouse_id, product_id=p.id, available_qty=0, locked_qty=0)
-            db.add(inv)
-            db.commit()
-            db.refresh(inv)
+    for lineno, row in enumerate(reader, start=2):
+        if not row or not row[0].strip():
+            continue
+        try:
+            yield row[0].strip(), int(row[1])
+        except (IndexError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"code": "VALIDATION_ERROR", "message": f"invalid csv row at line {lineno}"},
+            )
 
-        # 简化：盘点直接覆盖可用库存
-        inv.available_qty = it.counted_qty
 
+def _submit_stocktake(
+    db: Session, warehouse_id: int, stocktake_id: Optional[int], lines: List[Tuple[str, int]], operator_id: int
+) -> Dict[str, Any]:
+    st = _get_or_create_stocktake(db, warehouse_id, stocktake_id)
+    # 保存盘点明细（简化：每次提交都追加 item；盘点直接覆盖可用库存）
+    summary = apply_stocktake(db, st.id, warehouse_id, lines, operator_id)
     db.commit()
-    return ok({"stocktake_id": st.id, "status": st.status})
+    return {"stocktake_id": st.id, "status": st.status, "variance": summary}
+
+
+@router.post("/stocktake")
+def submit_stocktake(
+    payload: StocktakeSubmitRequest,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    lines = [(it.sku, it.counted_qty) for it in payload.items]
+    use_warehouse(db, payload.warehouse_id)
+    result = run_with_retry(db, _submit_stocktake, payload.warehouse_id, payload.stocktake_id, lines, user.id)
+    metrics.inventory_mutation("stocktake")
+    return ok(result)
+
+
+@router.post("/stocktake/upload")
+def upload_stocktake(
+    file: UploadFile = File(...),
+    warehouse_id: int = Form(...),
+    stocktake_id: Optional[int] = Form(default=None),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    # 冲突重试需要重放明细，先完整解析上传文件
+    lines = list(_iter_stocktake_csv(file))
+    use_warehouse(db, warehouse_id)
+    result = run_with_retry(db, _submit_stocktake, warehouse_id, stocktake_id, lines, user.id)
+    metrics.inventory_mutation("stocktake")
+    return ok(result)
+
+
+@async_router.get("")
+async def list_inventory_async(
+    request: Request,
+    warehouse_id: Optional[int] = None,
+    sku: Optional[str] = None,
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag = _inventory_etag(warehouse_id, sku)
+    return not_modified(request, etag) or with_etag(ok(await db.run_sync(_list_inventory, warehouse_id, sku)), etag)
+
+
+@async_router.get("/warnings")
+async def list_warnings_async(
+    warehouse_id: Optional[int] = None,
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return ok(await db.run_sync(_list_warnings, warehouse_id))
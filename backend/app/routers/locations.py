@@ -1,23 +1,39 @@
-from fastapi import APIRouter, Depends
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.etag import compute_etag, not_modified, with_etag
 from app.core.response import ok
-from app.db.deps import get_db
+from app.core.rows import RowSerializer
+from app.db.deps import get_async_db, get_db
 from app.models.location import Location
 
 router = APIRouter(prefix="/api/locations", tags=["locations"])
+async_router = APIRouter(prefix="/api/locations", tags=["locations"])
+
+LOCATION_ROW = RowSerializer(
+    ("id", Location.id),
+    ("warehouse_id", Location.warehouse_id),
+    ("code", Location.code),
+    ("name", Location.name),
+)
+
+
+def _list_locations(db: Session) -> List[Dict[str, Any]]:
+    return LOCATION_ROW.dump(LOCATION_ROW.query(db).order_by(Location.id).all())
+
+
+def _get_location(db: Session, location_id: int) -> Optional[Dict[str, Any]]:
+    return LOCATION_ROW.dump_one(LOCATION_ROW.query(db).filter(Location.id == location_id).first())
 
 
 @router.get("")
-def list_locations(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = db.query(Location).order_by(Location.id).all()
-    return ok(
-        [
-            {"id": r.id, "warehouse_id": r.warehouse_id, "code": r.code, "name": r.name}
-            for r in rows
-        ]
-    )
+def list_locations(request: Request, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    etag = compute_etag(("locations",), [("locations", None)])
+    return not_modified(request, etag) or with_etag(ok(_list_locations(db)), etag)
 
 
 @router.get("/{location_id}")
@@ -26,7 +42,21 @@ def get_location(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    row = db.query(Location).filter(Location.id == locationId).first()
-    if not row:
-        return ok(None)
-    return ok({"id": row.id, "warehouse_id": row.warehouse_id, "code": row.code, "name": row.name})
+    return ok(_get_location(db, locationId))
+
+
+@async_router.get("")
+async def list_locations_async(
+    request: Request, user=Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    etag = compute_etag(("locations",), [("locations", None)])
+    return not_modified(request, etag) or with_etag(ok(await db.run_sync(_list_locations)), etag)
+
+
+@async_router.get("/{location_id:int}")
+async def get_location_async(
+    locationId: int,  # 与同步版保持一致（BE02）
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return ok(await db.run_sync(_get_location, locationId))
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import metrics
+from app.db import async_session
+from app.db.session import engine
+from app.db.shards import shard_router
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics")
+def prometheus_metrics():
+    engines = [("sync", engine)]
+    # async 引擎按需创建，未启用时不输出
+    if async_session._async_engine is not None:
+        engines.append(("async", async_session._async_engine.sync_engine))
+    if shard_router.enabled:
+        engines.extend((f"wh{wid}", eng) for wid, eng in shard_router.engines().items())
+    return PlainTextResponse(metrics.render(engines), media_type=PROMETHEUS_CONTENT_TYPE)
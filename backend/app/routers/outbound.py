@@ -1,36 +1,83 @@
-from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import bindparam, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.export import EXPORT_FORMAT_PATTERN, export_response
+from app.core.metrics import metrics
+from app.core.pagination import DEFAULT_LIMIT, MAX_LIMIT, filter_date_range, warehouse_keyset_page
 from app.core.response import ok
 from app.core.timefmt import fmt
-from app.db.deps import get_db
+from app.core.versions import touch
+from app.db.deps import get_async_db, get_db
+from app.db.shards import UnknownWarehouse, shard_of_id, shard_router, use_shard_of, use_warehouse
 from app.models.inventory import Inventory
 from app.models.outbound import OutboundOrder, OutboundOrderItem
 from app.models.product import Product
-from app.schemas.outbound import OutboundCreateRequest
+from app.schemas.outbound import OutboundCreateRequest, OutboundShipBatchRequest
+from app.services.audit import audit_recorder
+from app.services.ledger import record_movement
+from app.services.sku_resolver import sku_resolver
+from app.services.reservation import order_lines, release_orders, reserve_order
+from app.services.stock import (
+    InsufficientStock,
+    VersionConflict,
+    adjust_stock,
+    consume_reserved,
+    deduct_stock,
+    run_with_retry,
+)
 
 router = APIRouter(prefix="/api/outbound", tags=["outbound"])
+async_router = APIRouter(prefix="/api/outbound", tags=["outbound"])
 
 
-@router.get("")
-def list_outbound(
-    warehouse_id: Optional[int] = None,
-    user=Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    q = db.query(OutboundOrder)
-    if warehouse_id is not None:
-        q = q.filter(OutboundOrder.warehouse_id == warehouse_id)
+def _list_outbound(
+    db: Session,
+    warehouse_id: Optional[int],
+    status_: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    after_id: Optional[int],
+    limit: int,
+) -> Dict[str, Any]:
+    def build(db: Session):
+        q = db.query(OutboundOrder)
+        if warehouse_id is not None:
+            q = q.filter(OutboundOrder.warehouse_id == warehouse_id)
+        if status_:
+            q = q.filter(OutboundOrder.status == status_)
+        return filter_date_range(q, OutboundOrder.created_at, date_from, date_to)
 
-    orders = q.order_by(OutboundOrder.id.desc()).all()
+    orders, next_after_id = warehouse_keyset_page(db, build, OutboundOrder, warehouse_id, after_id, limit)
+
+    def load_items(db: Session) -> List[OutboundOrderItem]:
+        return (
+            db.query(OutboundOrderItem)
+            .filter(OutboundOrderItem.outbound_order_id.in_(ids))
+            .order_by(OutboundOrderItem.id)
+            .all()
+        )
+
+    # 当前页的明细一次 IN 查询批量加载（修复 BE17 的 N+1）；跨仓页按所在分库各查一次
+    items_by_order: Dict[int, List[OutboundOrderItem]] = defaultdict(list)
+    ids = [o.id for o in orders]
+    if ids:
+        if shard_router.enabled and warehouse_id is None:
+            parts = shard_router.fan_out(load_items, {shard_of_id(i) for i in ids})
+        else:
+            parts = [load_items(db)]
+        for items in parts:
+            for it in items:
+                items_by_order[it.outbound_order_id].append(it)
 
-    # BE17: N+1 查询 —— 每个订单单独查询 items
     out: List[Dict[str, Any]] = []
     for o in orders:
-        items = db.query(OutboundOrderItem).filter(OutboundOrderItem.outbound_order_id == o.id).all()
         out.append(
             {
                 "id": o.id,
@@ -40,12 +87,103 @@ def list_outbound(
                 "picked_at": fmt(o.picked_at),
                 "shipped_at": fmt(o.shipped_at),
                 "items": [
-                    {"sku": it.sku, "quantity": it.quantity, "product_id": it.product_id} for it in items
+                    {"sku": it.sku, "quantity": it.quantity, "product_id": it.product_id}
+                    for it in items_by_order[o.id]
                 ],
             }
         )
 
-    return ok(out)
+    return {"items": out, "next_after_id": next_after_id, "limit": limit}
+
+
+@router.get("")
+def list_outbound(
+    warehouse_id: Optional[int] = None,
+    status_: Optional[str] = Query(default=None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return ok(_list_outbound(db, warehouse_id, status_, date_from, date_to, after_id, limit))
+
+
+@router.get("/export")
+def export_outbound(
+    format_: str = Query(default="csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    warehouse_id: Optional[int] = None,
+    status_: Optional[str] = Query(default=None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sku: Optional[str] = None,
+    user=Depends(get_current_user),
+):
+    # 按明细行导出（无明细的单据也输出一行）
+    stmt = (
+        select(
+            OutboundOrder.id,
+            OutboundOrder.warehouse_id,
+            OutboundOrder.status,
+            OutboundOrder.created_at,
+            OutboundOrder.picked_at,
+            OutboundOrder.shipped_at,
+            OutboundOrderItem.sku,
+            OutboundOrderItem.quantity,
+        )
+        .outerjoin(OutboundOrderItem, OutboundOrderItem.outbound_order_id == OutboundOrder.id)
+        .order_by(OutboundOrder.id, OutboundOrderItem.id)
+    )
+    if warehouse_id is not None:
+        stmt = stmt.where(OutboundOrder.warehouse_id == warehouse_id)
+    if status_:
+        stmt = stmt.where(OutboundOrder.status == status_)
+    if sku:
+        stmt = stmt.where(OutboundOrderItem.sku == sku)
+    stmt = filter_date_range(stmt, OutboundOrder.created_at, date_from, date_to)
+
+    header = ["id", "warehouse_id", "status", "created_at", "picked_at", "shipped_at", "sku", "quantity"]
+    return export_response(stmt, header, format_, "outbound_orders", warehouse_id)
+
+
+def _create_outbound(db: Session, payload: OutboundCreateRequest, operator_id: int) -> Tuple[Dict[str, Any], bool]:
+    products = sku_resolver.resolve_many(db, [it.sku for it in payload.items])
+    lines = [(it, products[it.sku]) for it in payload.items if it.sku in products]
+    need: Dict[int, int] = defaultdict(int)
+    skus: Dict[int, str] = {}
+    for it, p in lines:
+        if it.quantity > 0:
+            need[p.id] += it.quantity
+        skus[p.id] = p.sku
+
+    order = OutboundOrder(
+        warehouse_id=payload.warehouse_id,
+        status="PENDING_PICK",
+        created_by=operator_id,
+        reserved_at=datetime.utcnow() if need else None,
+    )
+    db.add(order)
+    db.flush()
+    # 整单一条语句占用本仓库存（可用 -> 锁定），任一行不足则整单回滚
+    try:
+        reserve_order(db, order, need, skus, operator_id)
+    except InsufficientStock as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "code": "INSUFFICIENT_STOCK",
+                "message": "insufficient stock",
+                "data": [{"sku": skus.get(pid), "requested": qty, "available": have} for pid, qty, have in exc.shortages],
+            },
+        )
+    db.add_all(
+        [OutboundOrderItem(outbound_order_id=order.id, product_id=p.id, sku=it.sku, quantity=it.quantity) for it, p in lines]
+    )
+    data = {"id": order.id, "warehouse_id": order.warehouse_id, "status": order.status}
+    db.commit()
+    return data, bool(need)
 
 
 @router.post("")
@@ -54,20 +192,24 @@ def create_outbound(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    order = OutboundOrder(warehouse_id=payload.warehouse_id, status="PENDING_PICK", created_by=user.id)
-    db.add(order)
-    db.commit()
-    db.refresh(order)
+    use_warehouse(db, payload.warehouse_id)
+    data, reserved = run_with_retry(db, _create_outbound, payload, user.id)
+    if reserved:
+        metrics.inventory_mutation("reserve")
+    return ok(data)
 
-    for it in payload.items:
-        p = db.query(Product).filter(Product.sku == it.sku).first()
-        if not p:
-            continue
-        # BE12: 不校验库存是否充足
-        db.add(OutboundOrderItem(outbound_order_id=order.id, product_id=p.id, sku=it.sku, quantity=it.quantity))
-    db.commit()
 
-    return ok({"id": order.id, "warehouse_id": order.warehouse_id, "status": order.status})
+def _claim(db: Session, order: OutboundOrder, **values: Any) -> None:
+    # 以读取时的状态与占用为条件改写单据，期间被其他请求改过则回滚重试
+    held = OutboundOrder.reserved_at.is_not(None) if order.reserved_at is not None else OutboundOrder.reserved_at.is_(None)
+    res = db.execute(
+        update(OutboundOrder)
+        .where(OutboundOrder.id == order.id, OutboundOrder.status == order.status, held)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if res.rowcount != 1:
+        raise VersionConflict()
 
 
 @router.put("/{outbound_id}/pick")
@@ -76,6 +218,7 @@ def pick_outbound(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    use_shard_of(db, outbound_id)
     order = db.query(OutboundOrder).filter(OutboundOrder.id == outbound_id).first()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "outbound not found"})
@@ -86,25 +229,113 @@ def pick_outbound(
     return ok(True)
 
 
+def _delete_outbound(db: Session, outbound_id: int, operator_id: int) -> Optional[bool]:
+    # 返回是否释放了占用；单据不存在返回 None
+    order = db.query(OutboundOrder).filter(OutboundOrder.id == outbound_id).first()
+    if not order:
+        return None
+    released = order.reserved_at is not None
+    if released:
+        _claim(db, order, reserved_at=None)
+        release_orders(db, [order], "RELEASE", operator_id)
+    db.query(OutboundOrderItem).filter(OutboundOrderItem.outbound_order_id == order.id).delete()
+    db.delete(order)
+    db.commit()
+    return released
+
+
 @router.delete("/{outbound_id}")
 def delete_outbound(
     outbound_id: int,
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    order = db.query(OutboundOrder).filter(OutboundOrder.id == outbound_id).first()
-    if not order:
+    use_shard_of(db, outbound_id)
+    released = run_with_retry(db, _delete_outbound, outbound_id, user.id)
+    if released is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "NOT_FOUND", "message": "outbound not found"},
         )
+    if released:
+        metrics.inventory_mutation("release")
+    return ok(True)
 
-    db.query(OutboundOrderItem).filter(OutboundOrderItem.outbound_order_id == order.id).delete()
-    db.delete(order)
+
+def _cancel_outbound(db: Session, outbound_id: int, operator_id: int) -> Optional[str]:
+    # 返回取消前的状态；已发货不可取消，重复取消幂等
+    order = db.query(OutboundOrder).filter(OutboundOrder.id == outbound_id).first()
+    if not order:
+        return None
+    before = order.status
+    if before in ("SHIPPED", "CANCELED"):
+        return before
+    _claim(db, order, status="CANCELED", reserved_at=None)
+    if order.reserved_at is not None:
+        release_orders(db, [order], "RELEASE", operator_id)
     db.commit()
+    return before
+
+
+@router.put("/{outbound_id}/cancel")
+def cancel_outbound(
+    outbound_id: int,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    use_shard_of(db, outbound_id)
+    before = run_with_retry(db, _cancel_outbound, outbound_id, user.id)
+    if before is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "outbound not found"})
+    if before == "SHIPPED":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "OUTBOUND_STATUS_CONFLICT", "message": "shipped outbound cannot be canceled"},
+        )
+    if before != "CANCELED":
+        metrics.inventory_mutation("release")
     return ok(True)
 
 
+def _deduct_unchecked(db: Session, order_id: int, lines: List[Tuple[int, int]], operator_id: int) -> None:
+    order = db.query(OutboundOrder).filter(OutboundOrder.id == order_id).first()
+    for product_id, qty in lines:
+        p = db.query(Product).filter(Product.id == product_id).first()
+        if not p:
+            continue
+        # 原逻辑不校验库存是否足够，保持允许扣成负数
+        changed = adjust_stock(db, order.warehouse_id, p.id, -qty, check=False)
+        if changed:
+            audit_recorder.record(db, "OUTBOUND", order.warehouse_id, p.sku, changed[0], changed[1], operator_id=operator_id)
+            record_movement(db, order.warehouse_id, p.id, -qty, "OUTBOUND", "outbound", order.id)
+    db.commit()
+
+
+def _ship_outbound(db: Session, outbound_id: int, operator_id: int) -> bool:
+    # 持有占用的单据核销锁定量；无占用（历史单据、已取消后又拣货）的直接扣可用库存。已发货的重复调用不再扣减
+    order = db.query(OutboundOrder).filter(OutboundOrder.id == outbound_id).first()
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "outbound not found"})
+    if order.status == "SHIPPED":
+        return False
+    need = order_lines(db, [order.id])[order.id]
+    _claim(db, order, status="SHIPPED", shipped_at=datetime.utcnow(), reserved_at=None)
+    if order.reserved_at is not None:
+        consume_reserved(db, order.warehouse_id, need)
+    else:
+        try:
+            changed = deduct_stock(db, order.warehouse_id, need)
+        except InsufficientStock:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"code": "INSUFFICIENT_STOCK", "message": "insufficient stock"})
+        skus = dict(db.query(Product.id, Product.sku).filter(Product.id.in_(list(changed))).all()) if changed else {}
+        for pid, (old, new) in changed.items():
+            audit_recorder.record(db, "OUTBOUND", order.warehouse_id, skus.get(pid), old, new, operator_id=operator_id)
+            record_movement(db, order.warehouse_id, pid, new - old, "OUTBOUND", "outbound", order.id)
+    db.commit()
+    return True
+
+
 @router.put("/{outbound_id}/ship")
 def ship_outbound(
     outbound_id: int,
@@ -112,6 +343,7 @@ def ship_outbound(
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    use_shard_of(db, outbound_id)
     order = db.query(OutboundOrder).filter(OutboundOrder.id == outbound_id).first()
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "outbound not found"})
@@ -120,23 +352,182 @@ def ship_outbound(
 
     if simulate_fail:
         # BE08: 先扣库存并提交，再失败（不回滚）
-        for it in items:
-            p = db.query(Product).filter(Product.id == it.product_id).first()
-            if not p:
-                continue
-            inv = (
-                db.query(Inventory)
-                .filter(Inventory.warehouse_id == order.warehouse_id)
-                .filter(Inventory.product_id == p.id)
-                .first()
-            )
-            if inv:
-                inv.available_qty = (inv.available_qty or 0) - (it.quantity or 0)
-        db.commit()
+        run_with_retry(db, _deduct_unchecked, order.id, [(it.product_id, it.quantity or 0) for it in items], user.id)
+        metrics.inventory_mutation("ship")
 
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail={"code": "SHIP_FAILED", "message": "carrier error"})
 
-    # BE07: 发货成功但不扣减库存
-    order.status = "SHIPPED"
-    db.commit()
+    if run_with_retry(db, _ship_outbound, order.id, user.id):
+        metrics.inventory_mutation("ship")
     return ok(True)
+
+
+def _ship_batch(db: Session, ids: List[int], operator_id: int) -> Tuple[Dict[int, Dict[str, Any]], int]:
+    # 批量发货：一次查询加载全部明细，按 (仓库, 商品) 汇总扣减，单事务提交
+    orders = {o.id: o for o in db.query(OutboundOrder).filter(OutboundOrder.id.in_(ids)).all()}
+
+    results: Dict[int, Dict[str, Any]] = {}
+    candidates: List[int] = []
+    for oid in ids:
+        o = orders.get(oid)
+        if not o:
+            results[oid] = {"id": oid, "code": "NOT_FOUND", "message": "outbound not found"}
+        elif o.status != "PICKED":
+            results[oid] = {"id": oid, "code": "OUTBOUND_STATUS_CONFLICT", "message": f"status is {o.status}"}
+        else:
+            candidates.append(oid)
+
+    lines: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    skus: Dict[int, str] = {}
+    if candidates:
+        rows = (
+            db.query(
+                OutboundOrderItem.outbound_order_id,
+                OutboundOrderItem.product_id,
+                OutboundOrderItem.sku,
+                OutboundOrderItem.quantity,
+            )
+            .filter(OutboundOrderItem.outbound_order_id.in_(candidates))
+            .all()
+        )
+        for oid, product_id, sku, qty in rows:
+            if qty and qty > 0:
+                lines[oid][product_id] += qty
+            skus[product_id] = sku
+
+    keys = {(orders[oid].warehouse_id, pid) for oid in candidates for pid in lines[oid]}
+    stock: Dict[Tuple[int, int], List[int]] = {}
+    if keys:
+        inv_rows = (
+            db.query(Inventory.id, Inventory.warehouse_id, Inventory.product_id, Inventory.available_qty)
+            .filter(tuple_(Inventory.warehouse_id, Inventory.product_id).in_(list(keys)))
+            .all()
+        )
+        for inv_id, wid, pid, qty in inv_rows:
+            stock[(wid, pid)] = [inv_id, qty or 0]
+    stock_keys = {v[0]: k for k, v in stock.items()}
+
+    # 持有占用的单据直接核销锁定量；其余按请求顺序逐单分配可用库存：单内所有行都满足才扣减，否则整单失败（不超卖）
+    deductions: Dict[int, int] = defaultdict(int)
+    consumed: Dict[int, int] = defaultdict(int)
+    shipped: List[int] = []
+    for oid in candidates:
+        wid = orders[oid].warehouse_id
+        need = lines[oid]
+        if orders[oid].reserved_at is not None and all((wid, pid) in stock for pid in need):
+            for pid, qty in need.items():
+                consumed[stock[(wid, pid)][0]] += qty
+            shipped.append(oid)
+            results[oid] = {"id": oid, "code": "OK", "message": "ok"}
+        elif orders[oid].reserved_at is None and all(
+            (wid, pid) in stock and stock[(wid, pid)][1] - deductions[stock[(wid, pid)][0]] >= qty
+            for pid, qty in need.items()
+        ):
+            for pid, qty in need.items():
+                deductions[stock[(wid, pid)][0]] += qty
+            shipped.append(oid)
+            results[oid] = {"id": oid, "code": "OK", "message": "ok"}
+        else:
+            results[oid] = {"id": oid, "code": "INSUFFICIENT_STOCK", "message": "insufficient stock"}
+
+    if shipped:
+        now = datetime.utcnow()
+        # 分配基于读取到的库存；写回用带下限条件的原子扣减（单次 executemany），
+        # 期间库存被其他事务扣到不足时整批回滚重新分配。只核销占用的行（b_qty=0）不校验可用量，
+        # 与单笔发货一致，可用量已为负时持有占用的单据仍可发货
+        inv_table = Inventory.__table__
+        params = [
+            {"b_id": inv_id, "b_qty": deductions.get(inv_id, 0), "b_lock": consumed.get(inv_id, 0), "b_now": now}
+            for inv_id in set(deductions) | set(consumed)
+        ]
+        res = db.execute(
+            update(inv_table)
+            .where(
+                inv_table.c.id == bindparam("b_id"),
+                or_(bindparam("b_qty") == 0, inv_table.c.available_qty >= bindparam("b_qty")),
+            )
+            .values(
+                available_qty=inv_table.c.available_qty - bindparam("b_qty"),
+                locked_qty=inv_table.c.locked_qty - bindparam("b_lock"),
+                version=inv_table.c.version + 1,
+                updated_at=bindparam("b_now"),
+            ),
+            params,
+        )
+        if res.rowcount != len(params):
+            raise VersionConflict()
+        # 已持有这些行的写锁，读回的即本次扣减后的值；只核销占用的行可用量不变，不记审计
+        deducted = [r for r in params if r["b_qty"]]
+        new_qty = dict(db.query(Inventory.id, Inventory.available_qty).filter(Inventory.id.in_([r["b_id"] for r in deducted])).all())
+        for r in deducted:
+            wid, pid = stock_keys[r["b_id"]]
+            after = new_qty[r["b_id"]]
+            audit_recorder.record(db, "OUTBOUND", wid, skus.get(pid), after + r["b_qty"], after, operator_id=operator_id)
+        for r in params:
+            touch(db, "inventory", stock_keys[r["b_id"]][0])
+        # 流水按单据逐行记录，保留来源单号
+        for oid in shipped:
+            if orders[oid].reserved_at is not None:
+                continue
+            for pid, qty in lines[oid].items():
+                record_movement(db, orders[oid].warehouse_id, pid, -qty, "OUTBOUND", "outbound", oid)
+        res = db.execute(
+            update(OutboundOrder)
+            .where(OutboundOrder.id.in_(shipped), OutboundOrder.status == "PICKED")
+            .values(status="SHIPPED", shipped_at=now, reserved_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount != len(shipped):
+            raise VersionConflict()
+        db.commit()
+
+    return results, len(shipped)
+
+
+@router.post("/ship-batch")
+def ship_outbound_batch(
+    payload: OutboundShipBatchRequest,
+    user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    ids = list(dict.fromkeys(payload.ids))
+    if shard_router.enabled:
+        # 分库：按单号所在分库分组，每库一个事务（跨库不保证整批原子）
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        for oid in ids:
+            by_shard[shard_of_id(oid)].append(oid)
+        results, shipped = {}, 0
+        for wid, group in sorted(by_shard.items()):
+            try:
+                use_warehouse(db, wid)
+            except UnknownWarehouse:
+                results.update({oid: {"id": oid, "code": "NOT_FOUND", "message": "outbound not found"} for oid in group})
+                continue
+            part, n = run_with_retry(db, _ship_batch, group, user.id)
+            results.update(part)
+            shipped += n
+    else:
+        results, shipped = run_with_retry(db, _ship_batch, ids, user.id)
+    if shipped:
+        metrics.inventory_mutation("ship", shipped)
+    return ok(
+        {
+            "shipped": shipped,
+            "failed": len(ids) - shipped,
+            "results": [results[oid] for oid in ids],
+        }
+    )
+
+
+@async_router.get("")
+async def list_outbound_async(
+    warehouse_id: Optional[int] = None,
+    status_: Optional[str] = Query(default=None, alias="status"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return ok(await db.run_sync(_list_outbound, warehouse_id, status_, date_from, date_to, after_id, limit))
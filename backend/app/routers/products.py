@@ -1,19 +1,98 @@
 import math
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.etag import compute_etag, not_modified, with_etag
 from app.core.response import ok
-from app.core.timefmt import fmt
-from app.db.deps import get_db
+from app.core.rows import RowSerializer
+from app.core.timefmt import fmt, fmt_many, iso_many
+from app.db.deps import get_async_db, get_db
+from app.db.shards import on_warehouses
 from app.models.inventory import Inventory
 from app.models.product import Product
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.services import product_search
+from app.services.counting import PRODUCTS, count_total, counter_name, invalidate_counts
+from app.services.sku_resolver import sku_resolver
 
 router = APIRouter(prefix="/api/products", tags=["products"])
+async_router = APIRouter(prefix="/api/products", tags=["products"])
+
+_PRODUCT_FIELDS = (
+    ("id", Product.id),
+    ("sku", Product.sku),
+    ("name", Product.name),
+    ("category", Product.category),
+    ("unit", Product.unit),
+    ("image_url", Product.image_url),
+    ("created_at", Product.created_at),
+)
+# BE06: 列表返回 ISO 时间；详情返回 YYYY-MM-DD HH:mm:ss
+PRODUCT_LIST_ROW = RowSerializer(*_PRODUCT_FIELDS, formatters={"created_at": iso_many})
+PRODUCT_ROW = RowSerializer(*_PRODUCT_FIELDS, formatters={"created_at": fmt_many})
+
+
+def _list_products(
+    db: Session,
+    q: Optional[str],
+    category: Optional[str],
+    page: int,
+    page_size: int,
+    order_by: Optional[str],
+    include_total: bool = True,
+) -> Dict[str, Any]:
+    query = PRODUCT_LIST_ROW.query(db)
+    fts = None
+    if q:
+        # 全文索引可用时按相关度排序；否则回退 LIKE 全表扫描
+        if product_search.use_fts(q):
+            fts = product_search.match_subquery(q)
+            query = query.join(fts, fts.c.product_id == Product.id)
+        else:
+            query = query.filter(or_(Product.name.contains(q), Product.sku.contains(q)))
+    if category:
+        query = query.filter(Product.category == category)
+
+    # order_by 未校验；未指定时搜索按相关度、否则按 id
+    if order_by:
+        query = query.order_by(getattr(Product, order_by))
+    elif fts is not None:
+        query = query.order_by(fts.c.rank, Product.id)
+    else:
+        query = query.order_by(Product.id)
+
+    # 总数：无关键词时读计数表，有关键词时短期缓存；include_total=false 时跳过（无限滚动只看 has_more）
+    total = total_pages = None
+    if include_total:
+        counter = None if q else counter_name(PRODUCTS, category)
+        total = count_total(db, query, counter, (PRODUCTS, q, category))
+        # BE04: page_size=0 会导致除零异常
+        total_pages = math.ceil(total / page_size)
+    # 多取一行判断是否还有下一页
+    rows = query.offset((page - 1) * page_size).limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    return {
+        "items": PRODUCT_LIST_ROW.dump(rows),
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "has_more": has_more,
+    }
+
+
+def _get_product(db: Session, product_id: int) -> Dict[str, Any]:
+    p = PRODUCT_ROW.dump_one(PRODUCT_ROW.query(db).filter(Product.id == product_id).first())
+    if not p:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "product not found"})
+    return p
 
 
 @router.get("")
@@ -22,40 +101,12 @@ def list_products(
     category: Optional[str] = None,
     page: int = 1,
     page_size: int = 20,
-    order_by: str = "id",  # BE13: 未白名单校验，非法字段可能导致 500
+    order_by: Optional[str] = None,  # BE13: 未白名单校验，非法字段可能导致 500
+    include_total: bool = True,
     db: Session = Depends(get_db),
 ):
     # BE19: 列表接口未鉴权（按 PRD 应登录后访问）
-    query = db.query(Product)
-    if q:
-        query = query.filter(or_(Product.name.contains(q), Product.sku.contains(q)))
-    if category:
-        query = query.filter(Product.category == category)
-
-    # order_by 未校验
-    query = query.order_by(getattr(Product, order_by))
-
-    total = query.count()
-    # BE04: page_size=0 会导致除零异常
-    total_pages = math.ceil(total / page_size)
-    rows = query.offset((page - 1) * page_size).limit(page_size).all()
-
-    items = []
-    for p in rows:
-        # BE06: 这里返回 ISO 时间；其他接口可能返回 YYYY-MM-DD HH:mm:ss
-        items.append(
-            {
-                "id": p.id,
-                "sku": p.sku,
-                "name": p.name,
-                "category": p.category,
-                "unit": p.unit,
-                "image_url": p.image_url,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-            }
-        )
-
-    return ok({"items": items, "total": total, "page": page, "page_size": page_size, "total_pages": total_pages})
+    return ok(_list_products(db, q, category, page, page_size, order_by, include_total))
 
 
 @router.post("")
@@ -75,6 +126,8 @@ def create_product(
     db.add(p)
     db.commit()
     db.refresh(p)
+    sku_resolver.invalidate(p.sku)
+    invalidate_counts()
 
     return ok(
         {
@@ -91,25 +144,13 @@ def create_product(
 
 @router.get("/{product_id}")
 def get_product(
+    request: Request,
     product_id: int,
     user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    p = db.query(Product).filter(Product.id == product_id).first()
-    if not p:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "product not found"})
-
-    return ok(
-        {
-            "id": p.id,
-            "sku": p.sku,
-            "name": p.name,
-            "category": p.category,
-            "unit": p.unit,
-            "image_url": p.image_url,
-            "created_at": fmt(p.created_at),
-        }
-    )
+    etag = compute_etag(("product", product_id), [("products", product_id)])
+    return not_modified(request, etag) or with_etag(ok(_get_product(db, product_id)), etag)
 
 
 @router.put("/{product_id}")
@@ -133,6 +174,8 @@ def update_product(
         p.image_url = payload.image_url
 
     db.commit()
+    sku_resolver.invalidate(p.sku)
+    invalidate_counts()
     return ok(True)
 
 
@@ -146,11 +189,42 @@ def delete_product(
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"code": "NOT_FOUND", "message": "product not found"})
 
-    inv_rows = db.query(Inventory).filter(Inventory.product_id == p.id).all()
-    qty_sum = sum((r.available_qty or 0) + (r.locked_qty or 0) for r in inv_rows)
+    def stock_of(db: Session) -> int:
+        inv_rows = db.query(Inventory).filter(Inventory.product_id == p.id).all()
+        return sum((r.available_qty or 0) + (r.locked_qty or 0) for r in inv_rows)
+
+    # 分库时各仓分库分别汇总
+    qty_sum = sum(on_warehouses(db, None, stock_of))
     if qty_sum > 0:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"code": "PRODUCT_HAS_STOCK", "message": "product has stock"})
 
     db.delete(p)
+    sku_resolver.invalidate(p.sku)
+    invalidate_counts()
     # BE05: 缺少 commit，返回成功但实际未删除
     return ok(True)
+
+
+@async_router.get("")
+async def list_products_async(
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 20,
+    order_by: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # 与同步版保持一致（BE19/BE13/BE04）
+    return ok(await db.run_sync(_list_products, q, category, page, page_size, order_by, include_total))
+
+
+@async_router.get("/{product_id:int}")
+async def get_product_async(
+    request: Request,
+    product_id: int,
+    user=Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag = compute_etag(("product", product_id), [("products", product_id)])
+    return not_modified(request, etag) or with_etag(ok(await db.run_sync(_get_product, product_id)), etag)
@@ -1,15 +1,36 @@
-from fastapi import APIRouter, Depends
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.etag import compute_etag, not_modified, with_etag
 from app.core.response import ok
-from app.db.deps import get_db
+from app.core.rows import RowSerializer
+from app.db.deps import get_async_db, get_db
 from app.models.warehouse import Warehouse
 
 router = APIRouter(prefix="/api/warehouses", tags=["warehouses"])
+# async 读接口：WMS_DB_ASYNC 开启时在 main 中优先注册
+async_router = APIRouter(prefix="/api/warehouses", tags=["warehouses"])
+
+WAREHOUSE_ROW = RowSerializer(("id", Warehouse.id), ("name", Warehouse.name))
+
+
+def _list_warehouses(db: Session) -> List[Dict[str, Any]]:
+    return WAREHOUSE_ROW.dump(WAREHOUSE_ROW.query(db).order_by(Warehouse.id).all())
 
 
 @router.get("")
-def list_warehouses(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    rows = db.query(Warehouse).order_by(Warehouse.id).all()
-    return ok([{"id": w.id, "name": w.name} for w in rows])
+def list_warehouses(request: Request, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    etag = compute_etag(("warehouses",), [("warehouses", None)])
+    return not_modified(request, etag) or with_etag(ok(_list_warehouses(db)), etag)
+
+
+@async_router.get("")
+async def list_warehouses_async(
+    request: Request, user=Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)
+):
+    etag = compute_etag(("warehouses",), [("warehouses", None)])
+    return not_modified(request, etag) or with_etag(ok(await db.run_sync(_list_warehouses)), etag)
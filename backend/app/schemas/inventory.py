@@ -25,3 +25,14 @@ class StocktakeSubmitRequest(BaseModel):
     warehouse_id: int
     items: List[StocktakeItemInput]
     stocktake_id: Optional[int] = None
+
+
+class TransferItemInput(BaseModel):
+    sku: str = Field(min_length=1, max_length=32)
+    quantity: int
+
+
+class TransferOrderCreateRequest(BaseModel):
+    from_warehouse_id: int
+    to_warehouse_id: int
+    items: List[TransferItemInput] = Field(min_length=1)
@@ -11,3 +11,7 @@ class OutboundItemInput(BaseModel):
 class OutboundCreateRequest(BaseModel):
     warehouse_id: int
     items: List[OutboundItemInput]
+
+
+class OutboundShipBatchRequest(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=1000)
@@ -0,0 +1,191 @@
+import logging
+import queue
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.db.bulk import bulk_insert
+from app.db.session import engine
+from app.db.shards import shard_router
+from app.models.audit import InventoryAuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_MODES = ("durable", "write_behind")
+
+_PENDING_KEY = "pending_audit_rows"
+
+
+class AuditRecorder:
+    # 审计记录先暂存在 session.info 中，随事务提交统一落库：
+    # - durable：before_commit 中用 executemany 批量插入，与业务变更同一事务
+    # - write_behind：after_commit 后入有界队列，由后台线程批量写入
+    # 事务回滚时暂存记录一并丢弃
+    def __init__(
+        self,
+        mode: str = "durable",
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 0.05,
+    ) -> None:
+        if mode not in AUDIT_MODES:
+            raise ValueError(f"unknown audit mode: {mode}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+        self.backpressure = 0
+        self.errors = 0
+
+    def record(
+        self,
+        db: Session,
+        action: str,
+        warehouse_id: Optional[int],
+        sku: Optional[str],
+        old_qty: Optional[int],
+        new_qty: Optional[int],
+        operator_id: Optional[int] = None,
+    ) -> None:
+        delta = None
+        if old_qty is not None and new_qty is not None:
+            delta = new_qty - old_qty
+        db.info.setdefault(_PENDING_KEY, []).append(
+            {
+                "warehouse_id": warehouse_id,
+                "operator_id": operator_id,
+                "action": action,
+                "sku": sku,
+                "old_qty": old_qty,
+                "new_qty": new_qty,
+                "delta": delta,
+                "created_at": datetime.utcnow(),
+            }
+        )
+
+    # ---- session 钩子 ----
+
+    def _before_commit(self, db: Session) -> None:
+        if self.mode != "durable":
+            return
+        rows = db.info.pop(_PENDING_KEY, None)
+        if rows:
+            bulk_insert(db.connection(), InventoryAuditLog.__table__, rows)
+            self.recorded += len(rows)
+            self.written += len(rows)
+            self.batches += 1
+
+    def _after_commit(self, db: Session) -> None:
+        if self.mode != "write_behind":
+            return
+        rows = db.info.pop(_PENDING_KEY, None)
+        if rows:
+            self._enqueue(rows)
+
+    def _after_rollback(self, db: Session) -> None:
+        db.info.pop(_PENDING_KEY, None)
+
+    # ---- write-behind ----
+
+    def _enqueue(self, rows: List[Dict[str, Any]]) -> None:
+        self._ensure_started()
+        self.recorded += len(rows)
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.enqueue_timeout)
+            except queue.Full:
+                # 背压：队列满时由调用方线程同步写入剩余记录，不丢审计
+                self.backpressure += 1
+                self._write(rows[i:])
+                return
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _drain(self, first: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._write(self._drain(first))
+        # 停止前清空队列
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        # 分库时审计表在各仓分库，按仓库分组写入
+        groups: Dict[Optional[int], List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            groups[row["warehouse_id"] if shard_router.enabled else None].append(row)
+        for wid, part in groups.items():
+            try:
+                with (engine if wid is None else shard_router.engine_for(wid)).begin() as conn:
+                    bulk_insert(conn, InventoryAuditLog.__table__, part)
+                self.written += len(part)
+                self.batches += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("audit write failed, rows=%s", len(part))
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "backpressure": self.backpressure,
+            "errors": self.errors,
+        }
+
+
+audit_recorder = AuditRecorder(
+    mode=config.AUDIT_MODE,
+    queue_size=config.AUDIT_QUEUE_SIZE,
+    batch_size=config.AUDIT_BATCH_SIZE,
+    flush_interval=config.AUDIT_FLUSH_INTERVAL,
+    enqueue_timeout=config.AUDIT_ENQUEUE_TIMEOUT,
+)
+
+event.listen(Session, "before_commit", audit_recorder._before_commit)
+event.listen(Session, "after_commit", audit_recorder._after_commit)
+event.listen(Session, "after_rollback", audit_recorder._after_rollback)
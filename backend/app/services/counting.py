@@ -0,0 +1,97 @@
+import logging
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Query, Session
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.models.counter import RowCount
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS = "products"
+
+# 商品总数与分类计数随 products 增删改由触发器同步（与业务写入同一事务）
+_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS products_count_ai AFTER INSERT ON products BEGIN
+        INSERT INTO row_counts(name, count) VALUES ('products', 1)
+            ON CONFLICT(name) DO UPDATE SET count = count + 1;
+        INSERT INTO row_counts(name, count) SELECT 'products:category:' || new.category, 1 WHERE new.category IS NOT NULL
+            ON CONFLICT(name) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_count_ad AFTER DELETE ON products BEGIN
+        UPDATE row_counts SET count = count - 1 WHERE name = 'products';
+        UPDATE row_counts SET count = count - 1 WHERE name = 'products:category:' || old.category;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_count_au AFTER UPDATE OF category ON products
+        WHEN old.category IS NOT new.category BEGIN
+        UPDATE row_counts SET count = count - 1 WHERE name = 'products:category:' || old.category;
+        INSERT INTO row_counts(name, count) SELECT 'products:category:' || new.category, 1 WHERE new.category IS NOT NULL
+            ON CONFLICT(name) DO UPDATE SET count = count + 1;
+    END""",
+]
+
+_SEED = [
+    "DELETE FROM row_counts WHERE name = 'products' OR name LIKE 'products:%'",
+    "INSERT INTO row_counts(name, count) SELECT 'products', count(*) FROM products",
+    "INSERT INTO row_counts(name, count) SELECT 'products:category:' || category, count(*) FROM products "
+    "WHERE category IS NOT NULL GROUP BY category",
+]
+
+# 过滤查询（关键词搜索等）的 COUNT(*) 短期缓存，键为过滤条件
+_count_cache = TTLCache(maxsize=4096, ttl=config.COUNT_CACHE_TTL)
+
+_enabled = False
+
+
+def ensure_counters(bind: Engine) -> bool:
+    # 仅 SQLite 使用触发器维护计数；其他后端总数全部走缓存的 COUNT(*)
+    global _enabled
+    _enabled = False
+    if bind.dialect.name != "sqlite":
+        return False
+    try:
+        with bind.begin() as conn:
+            # 首次安装触发器时按现有数据初始化计数，与触发器在同一事务中
+            fresh = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'products_count_ai'").first() is None
+            for ddl in _TRIGGERS:
+                conn.exec_driver_sql(ddl)
+            if fresh:
+                for sql in _SEED:
+                    conn.exec_driver_sql(sql)
+    except OperationalError:
+        logger.warning("row count triggers unavailable, list totals fall back to cached COUNT(*)")
+        return False
+    _enabled = True
+    return True
+
+
+def rebuild_counters(bind: Engine) -> None:
+    with bind.begin() as conn:
+        for sql in _SEED:
+            conn.exec_driver_sql(sql)
+
+
+def counter_name(table: str, category: Optional[str] = None) -> str:
+    return f"{table}:category:{category}" if category else table
+
+
+def count_total(db: Session, query: Query, counter: Optional[str], cache_key: Hashable) -> int:
+    # 有维护计数的（无过滤/仅按分类）直接读计数表；其他过滤条件按键缓存 COUNT(*)
+    if counter is not None and _enabled:
+        return db.query(RowCount.count).filter(RowCount.name == counter).scalar() or 0
+    total = _count_cache.get(cache_key)
+    if total is None:
+        total = query.order_by(None).count()
+        _count_cache.set(cache_key, total)
+    return total
+
+
+def invalidate_counts() -> None:
+    _count_cache.clear()
+
+
+def count_stats() -> Dict[str, Any]:
+    return {"counters": _enabled, "cache": _count_cache.stats()}
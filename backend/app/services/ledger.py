@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.db.bulk import bulk_insert
+from app.db.shards import for_each_shard
+from app.models.inventory import Inventory
+from app.models.ledger import InventoryMovement, InventorySnapshot, InventorySnapshotItem
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending_ledger_rows"
+
+
+class AsOfOutOfRange(Exception):
+    pass
+
+
+def record_movement(
+    db: Session,
+    warehouse_id: int,
+    product_id: int,
+    delta: int,
+    reason: str,
+    source_type: Optional[str] = None,
+    source_id: Optional[int] = None,
+) -> None:
+    # 与库存变更同一事务：暂存后在 before_commit 中批量写入
+    if not delta:
+        return
+    db.info.setdefault(_PENDING_KEY, []).append(
+        {
+            "warehouse_id": warehouse_id,
+            "product_id": product_id,
+            "delta": delta,
+            "reason": reason,
+            "source_type": source_type,
+            "source_id": source_id,
+            "created_at": datetime.utcnow(),
+        }
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _flush_movements(db: Session) -> None:
+    rows = db.info.pop(_PENDING_KEY, None)
+    if rows:
+        bulk_insert(db.connection(), InventoryMovement.__table__, rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_movements(db: Session) -> None:
+    db.info.pop(_PENDING_KEY, None)
+
+
+def take_snapshot(db: Session) -> Optional[InventorySnapshot]:
+    # 首个快照取当前库存表作为基线；之后由上一快照 + 区间流水压缩得到，与流水严格一致
+    last_id = db.query(func.coalesce(func.max(InventoryMovement.id), 0)).scalar()
+    prev = db.query(InventorySnapshot).order_by(InventorySnapshot.id.desc()).first()
+    if prev is not None and prev.last_movement_id >= last_id:
+        return None
+
+    snap = InventorySnapshot(taken_at=datetime.utcnow(), last_movement_id=last_id)
+    db.add(snap)
+    db.flush()
+
+    items = InventorySnapshotItem.__table__
+    cols = ["snapshot_id", "warehouse_id", "product_id", "available_qty"]
+    if prev is None:
+        src = select(literal(snap.id), Inventory.warehouse_id, Inventory.product_id, Inventory.available_qty)
+    else:
+        parts = union_all(
+            select(items.c.warehouse_id, items.c.product_id, items.c.available_qty.label("qty")).where(
+                items.c.snapshot_id == prev.id
+            ),
+            select(InventoryMovement.warehouse_id, InventoryMovement.product_id, InventoryMovement.delta.label("qty")).where(
+                InventoryMovement.id > prev.last_movement_id, InventoryMovement.id <= last_id
+            ),
+        ).subquery()
+        src = select(literal(snap.id), parts.c.warehouse_id, parts.c.product_id, func.sum(parts.c.qty)).group_by(
+            parts.c.warehouse_id, parts.c.product_id
+        )
+    db.execute(insert(items).from_select(cols, src))
+    db.commit()
+    prune_snapshots(db, snap.taken_at)
+    return snap
+
+
+def prune_snapshots(db: Session, now: Optional[datetime] = None) -> int:
+    # 每个快照都是全量库存，按保留策略删除旧快照，快照表大小不随运行时间增长。
+    # 最早的基线快照始终保留，as-of 可查询的时间范围不变（更早区间回放的流水更多）
+    if config.LEDGER_SNAPSHOT_KEEP <= 0:
+        return 0
+    snaps = db.query(InventorySnapshot.id, InventorySnapshot.taken_at).order_by(InventorySnapshot.id).all()
+    if len(snaps) <= config.LEDGER_SNAPSHOT_KEEP + 1:
+        return 0
+    keep = {snaps[0].id} | {s.id for s in snaps[-config.LEDGER_SNAPSHOT_KEEP :]}
+    cutoff = (now or datetime.utcnow()) - timedelta(days=config.LEDGER_SNAPSHOT_KEEP_DAYS)
+    daily: Dict[Any, int] = {}
+    for s in snaps:
+        if s.taken_at >= cutoff:
+            daily[s.taken_at.date()] = s.id
+    keep |= set(daily.values())
+    drop = [s.id for s in snaps if s.id not in keep]
+    if drop:
+        db.execute(delete(InventorySnapshotItem).where(InventorySnapshotItem.snapshot_id.in_(drop)))
+        db.execute(delete(InventorySnapshot).where(InventorySnapshot.id.in_(drop)))
+        db.commit()
+    return len(drop)
+
+
+def ensure_baseline_snapshot(db: Session) -> None:
+    if db.query(InventorySnapshot.id).first() is None:
+        take_snapshot(db)
+
+
+def stock_as_of(
+    db: Session,
+    ts: datetime,
+    warehouse_id: Optional[int] = None,
+    product_ids: Optional[Iterable[int]] = None,
+) -> Dict[Tuple[int, int], int]:
+    # 最近快照 + 快照之后、ts 之前的流水；只扫描一个快照周期内的流水
+    snap = (
+        db.query(InventorySnapshot)
+        .filter(InventorySnapshot.taken_at <= ts)
+        .order_by(InventorySnapshot.taken_at.desc(), InventorySnapshot.id.desc())
+        .first()
+    )
+    if snap is None:
+        raise AsOfOutOfRange()
+
+    pids = list(product_ids) if product_ids is not None else None
+    out: Dict[Tuple[int, int], int] = defaultdict(int)
+
+    base = db.query(InventorySnapshotItem.warehouse_id, InventorySnapshotItem.product_id, InventorySnapshotItem.available_qty).filter(
+        InventorySnapshotItem.snapshot_id == snap.id
+    )
+    moves = db.query(InventoryMovement.warehouse_id, InventoryMovement.product_id, func.sum(InventoryMovement.delta)).filter(
+        InventoryMovement.id > snap.last_movement_id, InventoryMovement.created_at <= ts
+    )
+    if warehouse_id is not None:
+        base = base.filter(InventorySnapshotItem.warehouse_id == warehouse_id)
+        moves = moves.filter(InventoryMovement.warehouse_id == warehouse_id)
+    if pids is not None:
+        base = base.filter(InventorySnapshotItem.product_id.in_(pids))
+        moves = moves.filter(InventoryMovement.product_id.in_(pids))
+
+    for wid, pid, qty in base.all():
+        out[(wid, pid)] += qty or 0
+    for wid, pid, qty in moves.group_by(InventoryMovement.warehouse_id, InventoryMovement.product_id).all():
+        out[(wid, pid)] += qty or 0
+    return dict(out)
+
+
+class SnapshotScheduler:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ledger-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            # 分库时逐库压缩各自的流水
+            try:
+                for_each_shard(take_snapshot)
+            except Exception:
+                logger.exception("ledger snapshot failed")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+
+snapshot_scheduler = SnapshotScheduler(config.LEDGER_SNAPSHOT_INTERVAL)
@@ -0,0 +1,92 @@
+import argparse
+import logging
+
+from sqlalchemy import column, select, table
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import Subquery
+
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "products_fts"
+# trigram 分词至少需要 3 个字符，更短的关键词回退 LIKE
+MIN_FTS_QUERY_LEN = 3
+
+# 外部内容表：索引只存倒排，不复制商品行；由触发器与 products 保持同步
+_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "sku, name, category, content='products', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, sku, name, category) VALUES (new.id, new.sku, new.name, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, sku, name, category) VALUES ('delete', old.id, old.sku, old.name, old.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF sku, name, category ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, sku, name, category) VALUES ('delete', old.id, old.sku, old.name, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, sku, name, category) VALUES (new.id, new.sku, new.name, new.category);
+    END""",
+]
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"), column(FTS_TABLE))
+
+_enabled = False
+
+
+def fts_enabled() -> bool:
+    return _enabled
+
+
+def ensure_search_index(bind: Engine) -> bool:
+    # 仅 SQLite 且编译了 FTS5 时启用；其他后端或关闭配置时保持 LIKE 扫描
+    global _enabled
+    _enabled = False
+    if not config.PRODUCT_SEARCH_FTS or bind.dialect.name != "sqlite":
+        return False
+    try:
+        with bind.begin() as conn:
+            created = conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).first() is None
+            for ddl in _DDL:
+                conn.exec_driver_sql(ddl)
+            # 已有库首次建索引时从 products 全量构建
+            if created:
+                conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    except OperationalError:
+        logger.warning("sqlite fts5/trigram not available, product search falls back to LIKE")
+        return False
+    _enabled = True
+    return True
+
+
+def rebuild_search_index(bind: Engine) -> None:
+    with bind.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def use_fts(q: str) -> bool:
+    return _enabled and len(q) >= MIN_FTS_QUERY_LEN
+
+
+def match_subquery(q: str) -> Subquery:
+    # 整体作为短语匹配（trigram 下等价于子串包含），rank 为 bm25 相关度（越小越相关）
+    phrase = '"' + q.replace('"', '""') + '"'
+    return (
+        select(_fts.c.rowid.label("product_id"), _fts.c.rank.label("rank"))
+        .where(_fts.c[FTS_TABLE].match(phrase))
+        .subquery("fts")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="products 全文索引维护")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from app.db.session import engine
+
+    if not ensure_search_index(engine):
+        raise SystemExit("full-text search is not available on this database")
+    rebuild_search_index(engine)
+    print("products_fts rebuilt")
@@ -0,0 +1,161 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.db.shards import for_each_shard, shard_router
+from app.models.outbound import OutboundOrder, OutboundOrderItem
+from app.models.product import Product
+from app.services.audit import audit_recorder
+from app.services.ledger import record_movement
+from app.services.stock import VersionConflict, release_stock, reserve_stock, run_with_retry
+from app.services.transfer import recover_transfers
+
+logger = logging.getLogger(__name__)
+
+# 库存流水记录的是可用量：占用/释放是可用量的变化，发货核销占用只减锁定量、不再记流水
+
+
+def order_lines(db: Session, order_ids: Iterable[int]) -> Dict[int, Dict[int, int]]:
+    # {单号: {商品: 数量}}，同一商品多行合并；只计正数量（占用与核销口径一致）
+    ids = list(order_ids)
+    lines: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    if not ids:
+        return lines
+    rows = (
+        db.query(OutboundOrderItem.outbound_order_id, OutboundOrderItem.product_id, OutboundOrderItem.quantity)
+        .filter(OutboundOrderItem.outbound_order_id.in_(ids))
+        .all()
+    )
+    for oid, pid, qty in rows:
+        if qty and qty > 0:
+            lines[oid][pid] += qty
+    return lines
+
+
+def _sku_map(db: Session, product_ids: Iterable[int]) -> Dict[int, str]:
+    ids = list(set(product_ids))
+    if not ids:
+        return {}
+    return dict(db.query(Product.id, Product.sku).filter(Product.id.in_(ids)).all())
+
+
+def reserve_order(db: Session, order: OutboundOrder, qty: Dict[int, int], skus: Dict[int, str], operator_id: Optional[int]) -> None:
+    # 单据已带 reserved_at 并 flush（有 id）；整单一条语句占用，缺货抛 InsufficientStock 由调用方回滚
+    if not qty:
+        return
+    changed = reserve_stock(db, order.warehouse_id, qty)
+    for pid, (old, new) in changed.items():
+        audit_recorder.record(db, "RESERVE", order.warehouse_id, skus.get(pid), old, new, operator_id=operator_id)
+        record_movement(db, order.warehouse_id, pid, new - old, "RESERVE", "outbound", order.id)
+
+
+def release_orders(db: Session, held: List[OutboundOrder], reason: str, operator_id: Optional[int]) -> None:
+    # 释放多张（均持有占用的）单据：按仓库汇总后每仓一条语句，流水仍按单据逐行记录；
+    # 清空 reserved_at 与提交由调用方负责
+    if not held:
+        return
+    lines = order_lines(db, [o.id for o in held])
+    by_wh: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    for o in held:
+        for pid, qty in lines[o.id].items():
+            by_wh[o.warehouse_id][pid] += qty
+    skus = _sku_map(db, [pid for o in held for pid in lines[o.id]])
+    for wid, qty in by_wh.items():
+        for pid, (old, new) in release_stock(db, wid, qty).items():
+            audit_recorder.record(db, reason, wid, skus.get(pid), old, new, operator_id=operator_id)
+    for o in held:
+        for pid, qty in lines[o.id].items():
+            record_movement(db, o.warehouse_id, pid, qty, reason, "outbound", o.id)
+
+
+def _sweep_batch(db: Session, cutoff: datetime, limit: int) -> int:
+    orders = (
+        db.query(OutboundOrder)
+        .filter(OutboundOrder.status == "PENDING_PICK", OutboundOrder.reserved_at < cutoff)
+        .order_by(OutboundOrder.reserved_at)
+        .limit(limit)
+        .all()
+    )
+    if not orders:
+        return 0
+    ids = [o.id for o in orders]
+    # 先按读取时的状态认领：期间被拣货/取消的单据使行数不符，回滚重读
+    res = db.execute(
+        update(OutboundOrder)
+        .where(OutboundOrder.id.in_(ids), OutboundOrder.status == "PENDING_PICK", OutboundOrder.reserved_at.is_not(None))
+        .values(status="CANCELED", reserved_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    if res.rowcount != len(ids):
+        raise VersionConflict()
+    release_orders(db, orders, "RESERVATION_EXPIRED", None)
+    db.commit()
+    return len(orders)
+
+
+def sweep_expired(db: Session, now: Optional[datetime] = None) -> int:
+    # 过期仍未拣货的单据：释放占用并取消；分批提交，单批写事务保持短小
+    if config.RESERVATION_TTL <= 0:
+        return 0
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=config.RESERVATION_TTL)
+    limit = max(1, config.RESERVATION_SWEEP_BATCH)
+    total = 0
+    while True:
+        n = run_with_retry(db, _sweep_batch, cutoff, limit)
+        total += n
+        if n:
+            metrics.inventory_mutation("release", n)
+        if n < limit:
+            return total
+
+
+class ReservationSweeper:
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        # 分库时同一线程还负责补完中断的跨仓调拨
+        if self.interval <= 0 or self._thread is not None:
+            return
+        if config.RESERVATION_TTL <= 0 and not shard_router.enabled:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                n = sum(for_each_shard(sweep_expired))
+                if n:
+                    logger.info("released %d expired outbound reservations", n)
+            except Exception:
+                logger.exception("reservation sweep failed")
+            if shard_router.enabled:
+                db = SessionLocal()
+                try:
+                    recover_transfers(db)
+                except Exception:
+                    db.rollback()
+                    logger.exception("transfer recovery failed")
+                finally:
+                    db.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+
+reservation_sweeper = ReservationSweeper(config.RESERVATION_SWEEP_INTERVAL)
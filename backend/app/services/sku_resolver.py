@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+
+IN_CHUNK_SIZE = 900
+
+
+class ResolvedProduct(NamedTuple):
+    id: int
+    sku: str
+    name: str
+    unit: Optional[str]
+
+
+class SkuResolver:
+    # 进程内 SKU -> 商品 的有界 LRU；商品增删改时由 products 路由负责失效
+    def __init__(self, maxsize: int = 50000) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, ResolvedProduct]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, db: Session, sku: str) -> Optional[ResolvedProduct]:
+        return self.resolve_many(db, [sku]).get(sku)
+
+    def resolve_many(self, db: Session, skus: Iterable[str]) -> Dict[str, ResolvedProduct]:
+        out: Dict[str, ResolvedProduct] = {}
+        missing: List[str] = []
+        with self._lock:
+            for sku in dict.fromkeys(skus):
+                hit = self._data.get(sku)
+                if hit is None:
+                    missing.append(sku)
+                    continue
+                self._data.move_to_end(sku)
+                out[sku] = hit
+            self.hits += len(out)
+            self.misses += len(missing)
+
+        if not missing:
+            return out
+
+        # IN 查询补齐未命中（超大批量按 SQLite 变量上限分块）；SKU 可能重复（BE11），与 .first() 保持一致取最小 id
+        loaded: Dict[str, ResolvedProduct] = {}
+        stmt = (
+            select(Product.id, Product.sku, Product.name, Product.unit)
+            .order_by(Product.id.desc())
+            .execution_options(batched=True)
+        )
+        for i in range(0, len(missing), IN_CHUNK_SIZE):
+            rows = db.execute(stmt.where(Product.sku.in_(missing[i : i + IN_CHUNK_SIZE]))).tuples()
+            for r in rows:
+                loaded[r[1]] = ResolvedProduct._make(r)
+
+        # 超过容量的一次性大批量（如整仓盘点）不写入缓存，避免把热点 SKU 全部挤出
+        if len(loaded) <= self.maxsize // 2:
+            with self._lock:
+                for sku, rp in loaded.items():
+                    self._data[sku] = rp
+                    self._data.move_to_end(sku)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+        out.update(loaded)
+        return out
+
+    def invalidate(self, *skus: str) -> None:
+        with self._lock:
+            for sku in skus:
+                self._data.pop(sku, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+sku_resolver = SkuResolver()
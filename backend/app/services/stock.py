@@ -0,0 +1,265 @@
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import bindparam, case, select, tuple_, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.core.versions import touch
+from app.db.bulk import bulk_execute
+from app.db.upsert import upsert
+from app.models.inventory import Inventory
+
+T = TypeVar("T")
+
+_inv = Inventory.__table__
+INVENTORY_KEY = ("warehouse_id", "product_id")
+
+
+class InsufficientStock(Exception):
+    # shortages：[(商品, 需求, 可用)]，按行批量操作时给出缺货明细
+    def __init__(self, shortages: Optional[List[Tuple[int, int, int]]] = None) -> None:
+        super().__init__(shortages)
+        self.shortages = shortages or []
+
+
+class ConcurrentUpdate(Exception):
+    # 乐观锁版本不符或 SQLite 写锁冲突，重试次数用尽
+    pass
+
+
+class VersionConflict(Exception):
+    # 带 version 条件的更新未命中：期间有其他事务改过该行，整体回滚后重试
+    pass
+
+
+def adjust_stock(
+    db: Session,
+    warehouse_id: int,
+    product_id: int,
+    delta: int,
+    create: bool = False,
+    check: bool = True,
+) -> Optional[Tuple[int, int]]:
+    # 原子增减可用库存，返回 (变更前, 变更后)；不读回 Python 再写，并发 worker 不会丢更新。
+    # 入库类（create 且 delta >= 0，或 create 且不校验）单条 upsert：行不存在则插入，存在则累加；
+    # 扣减带 available_qty + delta >= 0 条件，不足时抛 InsufficientStock，行不存在时返回 None
+    now = datetime.utcnow()
+    if create and (delta >= 0 or not check):
+        stmt = upsert(
+            db.get_bind().dialect,
+            _inv,
+            INVENTORY_KEY,
+            lambda new: {
+                "available_qty": _inv.c.available_qty + new.available_qty,
+                "version": _inv.c.version + 1,
+                "updated_at": new.updated_at,
+            },
+            values={"warehouse_id": warehouse_id, "product_id": product_id, "available_qty": delta, "locked_qty": 0, "updated_at": now},
+        )
+        new_qty = db.execute(stmt.returning(_inv.c.available_qty)).scalar()
+    else:
+        stmt = (
+            update(_inv)
+            .where(_inv.c.warehouse_id == warehouse_id, _inv.c.product_id == product_id)
+            .values(available_qty=_inv.c.available_qty + delta, version=_inv.c.version + 1, updated_at=now)
+            .returning(_inv.c.available_qty)
+        )
+        if check and delta < 0:
+            stmt = stmt.where(_inv.c.available_qty + delta >= 0)
+        new_qty = db.execute(stmt).scalar()
+        if new_qty is None:
+            exists = db.execute(
+                select(_inv.c.id).where(_inv.c.warehouse_id == warehouse_id, _inv.c.product_id == product_id)
+            ).first()
+            if exists is not None or create:
+                raise InsufficientStock()
+            return None
+    touch(db, "inventory", warehouse_id)
+    return new_qty - delta, new_qty
+
+
+def set_warning_threshold(db: Session, warehouse_id: int, product_id: int, threshold: int) -> None:
+    # 单字段覆盖写；行不存在时插入空库存行
+    db.execute(
+        upsert(
+            db.get_bind().dialect,
+            _inv,
+            INVENTORY_KEY,
+            lambda new: {
+                "warning_threshold": new.warning_threshold,
+                "version": _inv.c.version + 1,
+                "updated_at": new.updated_at,
+            },
+            values={
+                "warehouse_id": warehouse_id,
+                "product_id": product_id,
+                "available_qty": 0,
+                "locked_qty": 0,
+                "warning_threshold": threshold,
+                "updated_at": datetime.utcnow(),
+            },
+        )
+    )
+    touch(db, "inventory", warehouse_id)
+
+
+def set_counted_stock(db: Session, warehouse_id: int, rows: List[Tuple[int, int, Optional[int]]]) -> None:
+    # 盘点覆盖写：rows 为 (商品, 盘点数, 读取时的 version；读取时无行为 None)，一次 executemany upsert。
+    # 只在版本未变时覆盖；读取后被改过、或期间被别人插入的行不会写入，计数不符即 VersionConflict
+    if not rows:
+        return
+    now = datetime.utcnow()
+    stmt = upsert(
+        db.get_bind().dialect,
+        _inv,
+        INVENTORY_KEY,
+        lambda new: {"available_qty": new.available_qty, "version": _inv.c.version + 1, "updated_at": new.updated_at},
+        where=lambda new: _inv.c.version == bindparam("expected_version"),
+    )
+    params = [
+        {
+            "warehouse_id": warehouse_id,
+            "product_id": pid,
+            "available_qty": qty,
+            "locked_qty": 0,
+            "warning_threshold": 0,
+            "updated_at": now,
+            "expected_version": -1 if version is None else version,
+        }
+        for pid, qty, version in rows
+    ]
+    if bulk_execute(db.connection(), stmt, params) != len(params):
+        raise VersionConflict()
+    touch(db, "inventory", warehouse_id)
+
+
+def _move_lines(
+    db: Session,
+    warehouse_id: int,
+    qty: Dict[int, int],
+    available_sign: int,
+    locked_sign: int,
+    check: bool,
+) -> Dict[int, Tuple[int, int]]:
+    # 本仓多行一条 UPDATE：数量按 product_id 走 CASE，available/locked 按符号移动，返回 {商品: (变更前可用, 变更后可用)}。
+    # check 时每行带 available_qty >= 数量 条件；命中行数不足即有行缺货，已改动的行由调用方回滚整个事务
+    if not qty:
+        return {}
+    n = case(qty, value=_inv.c.product_id)
+    values = {"version": _inv.c.version + 1, "updated_at": datetime.utcnow()}
+    for col, sign in (("available_qty", available_sign), ("locked_qty", locked_sign)):
+        if sign:
+            values[col] = _inv.c[col] + n if sign > 0 else _inv.c[col] - n
+    stmt = (
+        update(_inv)
+        .where(_inv.c.warehouse_id == warehouse_id, _inv.c.product_id.in_(list(qty)))
+        .values(values)
+        .returning(_inv.c.product_id, _inv.c.available_qty)
+    )
+    if check:
+        stmt = stmt.where(_inv.c.available_qty >= n)
+    rows = db.execute(stmt).all()
+    if check and len(rows) != len(qty):
+        hit = {pid for pid, _ in rows}
+        missing = [pid for pid in qty if pid not in hit]
+        have = dict(
+            db.execute(
+                select(_inv.c.product_id, _inv.c.available_qty).where(
+                    _inv.c.warehouse_id == warehouse_id, _inv.c.product_id.in_(missing)
+                )
+            ).all()
+        )
+        raise InsufficientStock([(pid, qty[pid], have.get(pid, 0)) for pid in missing])
+    touch(db, "inventory", warehouse_id)
+    return {pid: (new_qty - available_sign * qty[pid], new_qty) for pid, new_qty in rows}
+
+
+def reserve_stock(db: Session, warehouse_id: int, qty: Dict[int, int]) -> Dict[int, Tuple[int, int]]:
+    # 占用：可用 -> 锁定，任一行不足则 InsufficientStock（全有或全无）
+    return _move_lines(db, warehouse_id, qty, -1, 1, check=True)
+
+
+def release_stock(db: Session, warehouse_id: int, qty: Dict[int, int]) -> Dict[int, Tuple[int, int]]:
+    # 释放占用：锁定 -> 可用
+    return _move_lines(db, warehouse_id, qty, 1, -1, check=False)
+
+
+def consume_reserved(db: Session, warehouse_id: int, qty: Dict[int, int]) -> Dict[int, Tuple[int, int]]:
+    # 发货核销占用：只减锁定量，可用量在占用时已扣过
+    return _move_lines(db, warehouse_id, qty, 0, -1, check=False)
+
+
+def deduct_stock(db: Session, warehouse_id: int, qty: Dict[int, int]) -> Dict[int, Tuple[int, int]]:
+    # 无占用的单据直接扣可用，任一行不足则 InsufficientStock
+    return _move_lines(db, warehouse_id, qty, -1, 0, check=True)
+
+
+def lock_stock_rows(db: Session, keys: List[Tuple[int, int]]) -> Dict[Tuple[int, int], int]:
+    # 按 (仓库, 商品) 规范顺序读取并加行锁（PostgreSQL FOR UPDATE；SQLite 整库单写者，忽略该子句，
+    # 读后写时快照已过期会 SQLITE_BUSY 由 run_with_retry 重试）。所有多仓多行写入按同一顺序加锁，互不死锁
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(_inv.c.warehouse_id, _inv.c.product_id, _inv.c.available_qty)
+        .where(tuple_(_inv.c.warehouse_id, _inv.c.product_id).in_(sorted(set(keys))))
+        .order_by(_inv.c.warehouse_id, _inv.c.product_id)
+        .with_for_update()
+    ).all()
+    return {(wid, pid): qty or 0 for wid, pid, qty in rows}
+
+
+def add_stock(db: Session, warehouse_id: int, qty: Dict[int, int]) -> None:
+    # 本仓多行入账：一次 executemany upsert（按商品顺序），行不存在则插入
+    if not qty:
+        return
+    stmt = upsert(
+        db.get_bind().dialect,
+        _inv,
+        INVENTORY_KEY,
+        lambda new: {
+            "available_qty": _inv.c.available_qty + new.available_qty,
+            "version": _inv.c.version + 1,
+            "updated_at": new.updated_at,
+        },
+    )
+    now = datetime.utcnow()
+    params = [
+        {
+            "warehouse_id": warehouse_id,
+            "product_id": pid,
+            "available_qty": qty[pid],
+            "locked_qty": 0,
+            "warning_threshold": 0,
+            "updated_at": now,
+        }
+        for pid in sorted(qty)
+    ]
+    bulk_execute(db.connection(), stmt, params)
+    touch(db, "inventory", warehouse_id)
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, VersionConflict):
+        return True
+    # WAL 下读事务升级为写事务时若快照已过期会立即 SQLITE_BUSY，回滚重来即可
+    return isinstance(exc, OperationalError) and "database is locked" in str(exc.orig)
+
+
+def run_with_retry(db: Session, fn: Callable[..., T], *args) -> T:
+    # fn 负责完整的读-改-写与 commit；冲突时回滚（暂存的审计/流水随之丢弃）并退避重试
+    attempts = max(1, config.INVENTORY_RETRY_ATTEMPTS)
+    for attempt in range(attempts):
+        try:
+            return fn(db, *args)
+        except (VersionConflict, OperationalError) as exc:
+            db.rollback()
+            if not _retryable(exc):
+                raise
+            if attempt == attempts - 1:
+                raise ConcurrentUpdate() from exc
+            time.sleep(config.INVENTORY_RETRY_BACKOFF_MS / 1000 * (2 ** attempt) * random.random())
+    raise ConcurrentUpdate()
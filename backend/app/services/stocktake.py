@@ -0,0 +1,92 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.bulk import bulk_insert
+from app.models.inventory import Inventory
+from app.models.stocktake import StocktakeItem
+from app.services.audit import audit_recorder
+from app.services.ledger import record_movement
+from app.services.sku_resolver import IN_CHUNK_SIZE, sku_resolver
+from app.services.stock import set_counted_stock
+
+# 盘点商品数不足本仓库存行的 1/FULL_SCAN_RATIO 时按商品分块 IN 查询，否则整仓扫描更快
+FULL_SCAN_RATIO = 6
+
+
+def apply_stocktake(
+    db: Session,
+    stocktake_id: int,
+    warehouse_id: int,
+    lines: Iterable[Tuple[str, int]],
+    operator_id: int,
+) -> Dict[str, Any]:
+    # 集合式盘点：批量解析 SKU、批量加载相关库存、单次遍历计算差异，再批量写入（不提交）
+    lines = list(lines)
+    products = sku_resolver.resolve_many(db, [sku for sku, _ in lines])
+
+    # 明细逐行追加；同一 SKU 多次出现时以最后一次为准覆盖库存
+    item_rows: List[Dict[str, Any]] = []
+    counted: Dict[int, int] = {}
+    skipped = 0
+    for sku, qty in lines:
+        p = products.get(sku)
+        if not p:
+            skipped += 1
+            continue
+        item_rows.append({"stocktake_id": stocktake_id, "product_id": p.id, "sku": sku, "counted_qty": qty})
+        counted[p.id] = qty
+
+    current = _load_current(db, warehouse_id, list(counted))
+
+    # 盘点数是实物数（可用 + 出库单占用），占用保持不变，可用量 = 盘点数 - 占用
+    # (商品, 新可用量, 读取时的 version)：有变化的已有行与尚无库存行的商品一起 upsert
+    writes: List[Tuple[int, int, Optional[int]]] = []
+    changed = surplus = shortage = 0
+    sku_by_pid = {p.id: p.sku for p in products.values()}
+    for pid, counted_qty in counted.items():
+        old_qty, locked, version = current.get(pid, (0, 0, None))
+        qty = counted_qty - locked
+        if version is None or qty != old_qty:
+            writes.append((pid, qty, version))
+        delta = qty - old_qty
+        if delta:
+            changed += 1
+            if delta > 0:
+                surplus += delta
+            else:
+                shortage -= delta
+            audit_recorder.record(db, "STOCKTAKE", warehouse_id, sku_by_pid[pid], old_qty, qty, operator_id=operator_id)
+            record_movement(db, warehouse_id, pid, delta, "STOCKTAKE", "stocktake", stocktake_id)
+
+    # 差异按读取时的库存计算，写回带 version 条件；期间有其他变更则由调用方回滚重试
+    set_counted_stock(db, warehouse_id, writes)
+    bulk_insert(db.connection(), StocktakeItem.__table__, item_rows)
+
+    return {
+        "lines": len(lines),
+        "skipped": skipped,
+        "products": len(counted),
+        "changed": changed,
+        "surplus_qty": surplus,
+        "shortage_qty": shortage,
+        "net_variance": surplus - shortage,
+    }
+
+
+def _load_current(db: Session, warehouse_id: int, product_ids: List[int]) -> Dict[int, Tuple[int, int, Optional[int]]]:
+    q = db.query(Inventory.product_id, Inventory.available_qty, Inventory.locked_qty, Inventory.version).filter(
+        Inventory.warehouse_id == warehouse_id
+    )
+    if len(product_ids) > IN_CHUNK_SIZE:
+        rows = db.query(func.count()).select_from(Inventory).filter(Inventory.warehouse_id == warehouse_id).scalar() or 0
+        if len(product_ids) * FULL_SCAN_RATIO >= rows:
+            return {pid: (qty or 0, locked or 0, version) for pid, qty, locked, version in q.all()}
+
+    current: Dict[int, Tuple[int, int, Optional[int]]] = {}
+    q = q.execution_options(batched=True)
+    for i in range(0, len(product_ids), IN_CHUNK_SIZE):
+        for pid, qty, locked, version in q.filter(Inventory.product_id.in_(product_ids[i : i + IN_CHUNK_SIZE])):
+            current[pid] = (qty or 0, locked or 0, version)
+    return current
@@ -0,0 +1,250 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.db.bulk import bulk_insert
+from app.db.shards import for_each_shard, shard_router
+from app.models.transfer import TransferLeg, TransferOrder, TransferOrderItem
+from app.services.audit import audit_recorder
+from app.services.ledger import record_movement
+from app.services.stock import (
+    InsufficientStock,
+    add_stock,
+    consume_reserved,
+    deduct_stock,
+    lock_stock_rows,
+    release_stock,
+    reserve_stock,
+    run_with_retry,
+)
+
+logger = logging.getLogger(__name__)
+
+# 分库两阶段提交的决议：协调者在中心库把调拨单从 PREPARING 改为 COMMITTED/ABORTING，之后各分支只按决议收尾
+_FINAL = {"COMMITTED": "COMPLETED", "ABORTING": "ABORTED"}
+
+
+def apply_transfer(
+    db: Session,
+    transfer_id: int,
+    from_warehouse_id: int,
+    to_warehouse_id: int,
+    item_rows: List[Dict[str, Any]],
+    operator_id: int,
+) -> Dict[str, Any]:
+    # 多行调拨单：两仓所有行按 (仓库, 商品) 顺序加锁读取，校验源仓全部充足后
+    # 按仓库顺序各一条语句扣减/入账，明细与审计、流水随同一事务提交（不提交）
+    qty: Dict[int, int] = {}
+    skus: Dict[int, str] = {}
+    for r in item_rows:
+        qty[r["product_id"]] = qty.get(r["product_id"], 0) + r["quantity"]
+        skus[r["product_id"]] = r["sku"]
+
+    stock = lock_stock_rows(db, [(w, pid) for w in (from_warehouse_id, to_warehouse_id) for pid in qty])
+    shortages = [
+        (pid, q, stock.get((from_warehouse_id, pid), 0))
+        for pid, q in sorted(qty.items())
+        if stock.get((from_warehouse_id, pid), 0) < q
+    ]
+    if shortages:
+        raise InsufficientStock(shortages)
+
+    for wid in sorted((from_warehouse_id, to_warehouse_id)):
+        if wid == from_warehouse_id:
+            deduct_stock(db, wid, qty)
+        else:
+            add_stock(db, wid, qty)
+
+    for wid, sign in ((from_warehouse_id, -1), (to_warehouse_id, 1)):
+        for pid, q in qty.items():
+            old = stock.get((wid, pid), 0)
+            audit_recorder.record(db, "TRANSFER", wid, skus[pid], old, old + sign * q, operator_id=operator_id)
+            record_movement(db, wid, pid, sign * q, "TRANSFER", "transfer", transfer_id)
+    bulk_insert(db.connection(), TransferOrderItem.__table__, [dict(r, transfer_order_id=transfer_id) for r in item_rows])
+
+    return {"lines": len(item_rows), "products": len(qty), "quantity": sum(qty.values())}
+
+
+def _lines(db: Session, transfer_id: int) -> Tuple[Dict[int, int], Dict[int, str]]:
+    # 调拨明细在中心库；分库连接上也可直接读取（central 库已 ATTACH）
+    qty: Dict[int, int] = {}
+    skus: Dict[int, str] = {}
+    rows = (
+        db.query(TransferOrderItem.product_id, TransferOrderItem.sku, TransferOrderItem.quantity)
+        .filter(TransferOrderItem.transfer_order_id == transfer_id)
+        .all()
+    )
+    for pid, sku, q in rows:
+        qty[pid] = qty.get(pid, 0) + q
+        skus[pid] = sku
+    return qty, skus
+
+
+def _prepare_source(db: Session, transfer_id: int, warehouse_id: int, operator_id: int) -> None:
+    # 源仓预留：可用 -> 锁定（不足则 InsufficientStock，本分库不留痕迹），与分支记录同一事务提交
+    qty, skus = _lines(db, transfer_id)
+    for pid, (old, new) in reserve_stock(db, warehouse_id, qty).items():
+        audit_recorder.record(db, "TRANSFER", warehouse_id, skus[pid], old, new, operator_id=operator_id)
+        record_movement(db, warehouse_id, pid, new - old, "TRANSFER", "transfer", transfer_id)
+    db.add(TransferLeg(transfer_order_id=transfer_id, warehouse_id=warehouse_id, role="SOURCE"))
+    db.commit()
+
+
+def _prepare_dest(db: Session, transfer_id: int, warehouse_id: int) -> None:
+    db.add(TransferLeg(transfer_order_id=transfer_id, warehouse_id=warehouse_id, role="DEST"))
+    db.commit()
+
+
+def _finish_leg(db: Session, transfer_id: int, warehouse_id: int, commit: bool, operator_id: Optional[int]) -> None:
+    # 按决议收尾一个分支；以 PREPARED 为条件改状态，重复执行（协调者与后台恢复并发）只生效一次
+    leg = (
+        db.query(TransferLeg)
+        .filter(TransferLeg.transfer_order_id == transfer_id, TransferLeg.warehouse_id == warehouse_id)
+        .first()
+    )
+    if leg is None or leg.status != "PREPARED":
+        db.rollback()
+        return
+    res = db.execute(
+        update(TransferLeg)
+        .where(TransferLeg.id == leg.id, TransferLeg.status == "PREPARED")
+        .values(status="COMMITTED" if commit else "ABORTED")
+        .execution_options(synchronize_session=False)
+    )
+    if res.rowcount != 1:
+        db.rollback()
+        return
+    qty, skus = _lines(db, transfer_id)
+    if leg.role == "SOURCE":
+        if commit:
+            consume_reserved(db, warehouse_id, qty)
+        else:
+            for pid, (old, new) in release_stock(db, warehouse_id, qty).items():
+                audit_recorder.record(db, "RELEASE", warehouse_id, skus[pid], old, new, operator_id=operator_id)
+                record_movement(db, warehouse_id, pid, new - old, "RELEASE", "transfer", transfer_id)
+    elif commit:
+        stock = lock_stock_rows(db, [(warehouse_id, pid) for pid in qty])
+        add_stock(db, warehouse_id, qty)
+        for pid, q in qty.items():
+            old = stock.get((warehouse_id, pid), 0)
+            audit_recorder.record(db, "TRANSFER", warehouse_id, skus[pid], old, old + q, operator_id=operator_id)
+            record_movement(db, warehouse_id, pid, q, "TRANSFER", "transfer", transfer_id)
+    db.commit()
+
+
+def _on_shard(warehouse_id: int, fn, *args) -> Any:
+    sdb = shard_router.session(warehouse_id)
+    try:
+        return run_with_retry(sdb, fn, *args)
+    finally:
+        sdb.close()
+
+
+def _decide(db: Session, order: TransferOrder, decision: str) -> str:
+    # 只有仍在 PREPARING 时才能写入决议；已被后台恢复判为中止的按已有决议执行
+    res = db.execute(
+        update(TransferOrder)
+        .where(TransferOrder.id == order.id, TransferOrder.status == "PREPARING")
+        .values(status=decision)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if res.rowcount == 1:
+        return decision
+    return db.query(TransferOrder.status).filter(TransferOrder.id == order.id).scalar()
+
+
+def _finish(db: Session, order: TransferOrder, decision: str, operator_id: Optional[int]) -> str:
+    if decision in _FINAL:
+        for wid in sorted((order.from_warehouse_id, order.to_warehouse_id)):
+            _on_shard(wid, _finish_leg, order.id, wid, decision == "COMMITTED", operator_id)
+        db.execute(
+            update(TransferOrder)
+            .where(TransferOrder.id == order.id, TransferOrder.status == decision)
+            .values(status=_FINAL[decision])
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return _FINAL[decision]
+    return decision
+
+
+def apply_transfer_2pc(
+    db: Session,
+    from_warehouse_id: int,
+    to_warehouse_id: int,
+    item_rows: List[Dict[str, Any]],
+    operator_id: int,
+) -> Dict[str, Any]:
+    # 分库时的跨仓调拨（db 为中心库 session）：调拨单与明细先以 PREPARING 落中心库，
+    # 源仓预留、目标仓登记分支后写入决议，再逐库收尾。任一阶段中断由 recover_transfers 按决议补完
+    order = TransferOrder(
+        from_warehouse_id=from_warehouse_id, to_warehouse_id=to_warehouse_id, status="PREPARING", created_by=operator_id
+    )
+    db.add(order)
+    db.flush()
+    bulk_insert(db.connection(), TransferOrderItem.__table__, [dict(r, transfer_order_id=order.id) for r in item_rows])
+    db.commit()
+
+    shortages = None
+    try:
+        _on_shard(from_warehouse_id, _prepare_source, order.id, from_warehouse_id, operator_id)
+        _on_shard(to_warehouse_id, _prepare_dest, order.id, to_warehouse_id)
+        decision = "COMMITTED"
+    except InsufficientStock as exc:
+        shortages = exc.shortages
+        decision = "ABORTING"
+    except Exception:
+        logger.exception("transfer %s prepare failed", order.id)
+        decision = "ABORTING"
+
+    status = _finish(db, order, _decide(db, order, decision), operator_id)
+    if shortages is not None:
+        raise InsufficientStock(shortages)
+    qty = [r["quantity"] for r in item_rows]
+    return {
+        "id": order.id,
+        "status": status,
+        "lines": len(item_rows),
+        "products": len({r["product_id"] for r in item_rows}),
+        "quantity": sum(qty),
+    }
+
+
+def _recover_legs(db: Session, cutoff: datetime) -> int:
+    # 分库内超时仍 PREPARED 的分支：调拨单已有决议的按决议收尾（协调者在写决议后中断）
+    legs = (
+        db.query(TransferLeg.transfer_order_id, TransferLeg.warehouse_id, TransferOrder.status)
+        .join(TransferOrder, TransferOrder.id == TransferLeg.transfer_order_id)
+        .filter(TransferLeg.status == "PREPARED", TransferLeg.created_at < cutoff)
+        .all()
+    )
+    db.rollback()
+    n = 0
+    for transfer_id, wid, status in legs:
+        if status in ("COMMITTED", "COMPLETED", "ABORTING", "ABORTED"):
+            run_with_retry(db, _finish_leg, transfer_id, wid, status in ("COMMITTED", "COMPLETED"), None)
+            n += 1
+    return n
+
+
+def recover_transfers(db: Session, now: Optional[datetime] = None) -> int:
+    # 后台恢复（db 为中心库 session）：超时未决的判为中止，已决未完成的逐库补完
+    if not shard_router.enabled:
+        return 0
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=config.TRANSFER_PREPARE_TIMEOUT)
+    db.execute(
+        update(TransferOrder)
+        .where(TransferOrder.status == "PREPARING", TransferOrder.created_at < cutoff)
+        .values(status="ABORTING")
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    pending = db.query(TransferOrder).filter(TransferOrder.status.in_(list(_FINAL))).order_by(TransferOrder.id).all()
+    for order in pending:
+        _finish(db, order, order.status, None)
+    return len(pending) + sum(for_each_shard(lambda sdb: _recover_legs(sdb, cutoff)))
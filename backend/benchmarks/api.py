@@ -0,0 +1,242 @@
+"""全部路由的并发延迟压测：合成数据 + 进程内 uvicorn + 异步 HTTP 客户端。
+
+按 OpenAPI 枚举所有路由，逐个以 --concurrency 个并发客户端发送 --requests 个请求，
+统计 p50/p95/p99 延迟、吞吐与每请求 SQL 语句数，结果写入 JSON，可用 benchmarks.compare 对比两次运行。
+
+用法（在 backend/ 目录下）：
+    python -m benchmarks.api --products 5000 --orders 2000 --requests 200 --concurrency 16 --out bench.json
+    python -m benchmarks.api --routes "inventory|outbound" --async-db --out bench-async.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+import uvicorn
+
+# 当前请求对应的路由标签：由 ASGI 包装层按请求头设置，SQL 计数时读取（随 contextvars 传入线程池）
+_route_label: ContextVar[Optional[str]] = ContextVar("bench_route", default=None)
+ROUTE_HEADER = "x-bench-route"
+
+
+class SqlCounter:
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        label = _route_label.get()
+        if label is not None:
+            with self._lock:
+                self.counts[label] += 1
+
+
+class RouteLabel:
+    # 纯 ASGI 包装：不改动被测应用的中间件栈
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        label = None
+        if scope["type"] == "http":
+            raw = dict(scope["headers"]).get(ROUTE_HEADER.encode())
+            label = raw.decode() if raw else None
+        token = _route_label.set(label)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _route_label.reset(token)
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+async def _bench_route(client, method, path, build, ds, rng, args, headers, sql: SqlCounter) -> Dict[str, Any]:
+    label = f"{method} {path}"
+    req_headers = {**headers, ROUTE_HEADER: label}
+
+    async def send(i: int) -> int:
+        req = build(ds, rng, i)
+        url = path.format(**req.get("path", {}))
+        r = await client.request(
+            method,
+            url,
+            params=req.get("params"),
+            json=req.get("json"),
+            data=req.get("data"),
+            files=req.get("files"),
+            headers=req_headers,
+        )
+        return r.status_code
+
+    for i in range(args.warmup):
+        await send(-1 - i)
+    sql.counts[label] = 0
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    indices = iter(range(args.requests))
+
+    async def worker() -> None:
+        for i in indices:
+            started = time.perf_counter()
+            code = await send(i)
+            latencies.append(time.perf_counter() - started)
+            statuses[code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "requests": n,
+        "concurrency": args.concurrency,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "errors": sum(v for k, v in statuses.items() if k >= 400),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / n * 1000, 2) if n else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 2) if n else 0.0,
+        "rps": round(n / wall, 1) if wall else 0.0,
+        "sql_total": sql.counts[label],
+        "sql_per_request": round(sql.counts[label] / n, 2) if n else 0.0,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # 环境变量已在 main() 中设置；此时再导入应用，使其连到临时数据库
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import seed_dataset
+
+    wms = importlib.import_module("main")
+    from app.db.session import engine
+
+    # 库存下限按请求数留足：即使某接口的全部请求都落在同一 (仓库, SKU) 上也不缺货
+    stock_floor = (args.requests + args.warmup) * 100
+    ds = seed_dataset(engine, args.warehouses, args.products, args.orders, seed=args.seed, stock_floor=stock_floor)
+    sql = SqlCounter()
+    event.listen(Engine, "before_cursor_execute", sql.on_execute)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(RouteLabel(wms.app), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="bench-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    routes = [
+        (method.upper(), path)
+        for path, ops in wms.app.openapi()["paths"].items()
+        for method in ops
+    ]
+    pattern = re.compile(args.routes) if args.routes else None
+    rng = random.Random(args.seed)
+    endpoints: Dict[str, Any] = {}
+    uncovered: List[str] = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+            r = await client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+            headers = {"Authorization": f"Bearer {r.json()['data']['access_token']}"}
+            for method, path in routes:
+                label = f"{method} {path}"
+                if pattern and not pattern.search(label):
+                    continue
+                build = SCENARIOS.get((method, path))
+                if build is None:
+                    uncovered.append(label)
+                    continue
+                endpoints[label] = await _bench_route(client, method, path, build, ds, rng, args, headers, sql)
+                e = endpoints[label]
+                print(f"{label:<55} p50={e['p50_ms']:>8}ms p95={e['p95_ms']:>8}ms rps={e['rps']:>8} sql/req={e['sql_per_request']}")
+    finally:
+        server.should_exit = True
+        thread.join(10)
+        event.remove(Engine, "before_cursor_execute", sql.on_execute)
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "args": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+        "endpoints": endpoints,
+        "uncovered": uncovered,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency/throughput benchmark for every API route")
+    parser.add_argument("--warehouses", type=int, default=4)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--routes", default="", help="regex on 'METHOD /path' to select endpoints")
+    parser.add_argument("--async-db", action="store_true", help="serve read endpoints via AsyncSession (WMS_DB_ASYNC)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="", help="write results JSON to this file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="wms-bench-api-")
+    os.environ["WMS_DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ.setdefault("WMS_LEDGER_SNAPSHOT_INTERVAL", "0")
+    if args.async_db:
+        os.environ["WMS_DB_ASYNC"] = "true"
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if results["uncovered"]:
+        print("uncovered routes (add to benchmarks/scenarios.py):", ", ".join(results["uncovered"]))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
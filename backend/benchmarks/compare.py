@@ -0,0 +1,72 @@
+"""对比两次 benchmarks.api 的结果 JSON。
+
+用法（在 backend/ 目录下）：
+    python -m benchmarks.compare base.json new.json --max-regression 20
+
+p95 延迟上升超过 --max-regression 百分比，或每请求 SQL 语句数增加的接口记为回归，存在回归时退出码为 1。
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "rps", "sql_per_request"]
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pct(old: float, new: float) -> Optional[float]:
+    if not old:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], max_regression: float) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for label in sorted(set(base["endpoints"]) | set(new["endpoints"])):
+        a = base["endpoints"].get(label)
+        b = new["endpoints"].get(label)
+        row: Dict[str, Any] = {"endpoint": label, "base": a, "new": b, "regressions": []}
+        if a and b:
+            p95 = _pct(a["p95_ms"], b["p95_ms"])
+            if p95 is not None and p95 > max_regression:
+                row["regressions"].append(f"p95 +{p95:.0f}%")
+            if b["sql_per_request"] > a["sql_per_request"]:
+                row["regressions"].append(f"sql/req {a['sql_per_request']} -> {b['sql_per_request']}")
+        rows.append(row)
+    return rows
+
+
+def _fmt_cell(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]], metric: str) -> str:
+    if not a:
+        return f"{b[metric]} (new)"
+    if not b:
+        return f"{a[metric]} (gone)"
+    pct = _pct(a[metric], b[metric])
+    suffix = f" ({pct:+.0f}%)" if pct is not None else ""
+    return f"{b[metric]}{suffix}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Diff two benchmarks.api result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed p95 increase in percent")
+    args = parser.parse_args()
+
+    rows = compare(_load(args.base), _load(args.new), args.max_regression)
+    print(f"{'endpoint':<55}" + "".join(f"{m:>22}" for m in METRICS))
+    for row in rows:
+        cells = "".join(f"{_fmt_cell(row['base'], row['new'], m):>22}" for m in METRICS)
+        flag = "  REGRESSION: " + ", ".join(row["regressions"]) if row["regressions"] else ""
+        print(f"{row['endpoint']:<55}{cells}{flag}")
+
+    if any(row["regressions"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""SQLite 连接档位并发读写对比。
+
+用法（在 backend/ 目录下）：
+    python -m benchmarks.db_profiles --seconds 5 --readers 8 --writers 4
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+import app.models  # noqa: F401
+from app.db.session import DB_PROFILES, Base, create_db_engine
+from app.models.inventory import Inventory
+
+
+def run_profile(profile: str, seconds: float, readers: int, writers: int, rows: int) -> Dict[str, Any]:
+    tmpdir = tempfile.mkdtemp(prefix=f"wms-bench-{profile}-")
+    eng = create_db_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", profile=profile)
+    Base.metadata.create_all(bind=eng)
+    with eng.begin() as conn:
+        conn.execute(
+            insert(Inventory.__table__),
+            [{"warehouse_id": 1 + i % 2, "product_id": i + 1, "available_qty": 100, "locked_qty": 0, "warning_threshold": 0} for i in range(rows)],
+        )
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader() -> None:
+        n = 0
+        while not stop.is_set():
+            with eng.connect() as conn:
+                conn.execute(text("SELECT available_qty FROM inventory WHERE id = :id"), {"id": random.randint(1, rows)}).scalar()
+            n += 1
+        with lock:
+            counts["reads"] += n
+
+    def writer() -> None:
+        n = err = 0
+        while not stop.is_set():
+            try:
+                with eng.begin() as conn:
+                    conn.execute(
+                        text("UPDATE inventory SET available_qty = available_qty + 1 WHERE id = :id"),
+                        {"id": random.randint(1, rows)},
+                    )
+                n += 1
+            except OperationalError:
+                err += 1
+        with lock:
+            counts["writes"] += n
+            counts["errors"] += err
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    eng.dispose()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return {
+        "profile": profile,
+        "seconds": round(elapsed, 3),
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "lock_errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare SQLite db profiles under concurrent read/write load")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--profiles", nargs="*", default=list(DB_PROFILES))
+    args = parser.parse_args()
+
+    results = [run_profile(p, args.seconds, args.readers, args.writers, args.rows) for p in args.profiles]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""每个路由的请求构造：(METHOD, 路径模板) -> 请求参数。
+
+会改变单据状态的接口从 Dataset 的状态池中逐个取用 id，池耗尽后随机取（结果计入非 2xx 状态码）。
+新增路由若未在此登记，压测结果中会列入 uncovered。
+"""
+import random
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.seed import Dataset
+
+Request = Dict[str, Any]
+Scenario = Callable[[Dataset, random.Random, int], Request]
+
+SCENARIOS: Dict[Tuple[str, str], Scenario] = {}
+
+
+def scenario(method: str, path: str) -> Callable[[Scenario], Scenario]:
+    def register(fn: Scenario) -> Scenario:
+        SCENARIOS[(method, path)] = fn
+        return fn
+
+    return register
+
+
+def _take(pool: List[int], rng: random.Random, fallback: List[int]) -> int:
+    return pool.pop() if pool else rng.choice(fallback)
+
+
+def _items(ds: Dataset, rng: random.Random, n: int, key: str = "quantity") -> List[Dict[str, Any]]:
+    return [{"sku": sku, key: rng.randint(1, 20)} for sku in rng.sample(ds.skus, min(n, len(ds.skus)))]
+
+
+def _counted(ds: Dataset, rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    # 盘点数不低于库存下限，盘点后其他写接口仍有足够库存
+    floor = max(ds.stock_floor, 1)
+    return [{"sku": sku, "counted_qty": rng.randint(floor, 2 * floor)} for sku in rng.sample(ds.skus, min(n, len(ds.skus)))]
+
+
+# ---- health / auth ----
+
+@scenario("GET", "/api/health")
+def _health(ds, rng, i):
+    return {}
+
+
+@scenario("POST", "/api/auth/login")
+def _login(ds, rng, i):
+    return {"json": {"username": "admin", "password": "admin123"}}
+
+
+@scenario("POST", "/api/auth/logout")
+def _logout(ds, rng, i):
+    return {}
+
+
+@scenario("POST", "/api/auth/refresh")
+def _refresh(ds, rng, i):
+    return {}
+
+
+# ---- products ----
+
+@scenario("GET", "/api/products")
+def _list_products(ds, rng, i):
+    params = {"page": rng.randint(1, 20), "page_size": 20}
+    if i % 2:
+        params["q"] = rng.choice(ds.skus)[:-2]
+    return {"params": params}
+
+
+@scenario("POST", "/api/products")
+def _create_product(ds, rng, i):
+    return {"json": {"sku": f"BNEW-{i:07d}", "name": f"新品 {i}", "category": "日用", "unit": "pcs"}}
+
+
+@scenario("GET", "/api/products/{product_id}")
+def _get_product(ds, rng, i):
+    return {"path": {"product_id": rng.choice(ds.product_ids)}}
+
+
+@scenario("PUT", "/api/products/{product_id}")
+def _update_product(ds, rng, i):
+    return {"path": {"product_id": rng.choice(ds.product_ids)}, "json": {"name": f"压测商品 改 {i}"}}
+
+
+@scenario("DELETE", "/api/products/{product_id}")
+def _delete_product(ds, rng, i):
+    return {"path": {"product_id": rng.choice(ds.product_ids)}}
+
+
+# ---- warehouses / locations ----
+
+@scenario("GET", "/api/warehouses")
+def _list_warehouses(ds, rng, i):
+    return {}
+
+
+@scenario("GET", "/api/locations")
+def _list_locations(ds, rng, i):
+    return {}
+
+
+@scenario("GET", "/api/locations/{location_id}")
+def _get_location(ds, rng, i):
+    return {"path": {"location_id": rng.choice(ds.location_ids)}}
+
+
+# ---- inventory ----
+
+@scenario("GET", "/api/inventory")
+def _list_inventory(ds, rng, i):
+    return {"params": {"warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("GET", "/api/inventory/warnings")
+def _list_warnings(ds, rng, i):
+    return {"params": {"warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("GET", "/api/inventory/as-of")
+def _as_of(ds, rng, i):
+    return {"params": {"ts": datetime.utcnow().isoformat(), "warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("GET", "/api/inventory/export")
+def _export_inventory(ds, rng, i):
+    return {"params": {"format": "csv", "warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("GET", "/api/inventory/audit-logs/export")
+def _export_audit(ds, rng, i):
+    return {"params": {"format": "ndjson", "warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("PUT", "/api/inventory/warning-threshold")
+def _warning_threshold(ds, rng, i):
+    return {"json": {"warehouse_id": rng.choice(ds.warehouse_ids), "sku": rng.choice(ds.skus), "warning_threshold": rng.randint(0, 50)}}
+
+
+@scenario("POST", "/api/inventory/transfer")
+def _transfer(ds, rng, i):
+    src, dst = rng.sample(ds.warehouse_ids, 2) if len(ds.warehouse_ids) > 1 else (ds.warehouse_ids[0],) * 2
+    return {"json": {"from_warehouse_id": src, "to_warehouse_id": dst, "sku": rng.choice(ds.skus), "quantity": 1}}
+
+
+@scenario("POST", "/api/inventory/transfer-orders")
+def _transfer_order(ds, rng, i):
+    src, dst = rng.sample(ds.warehouse_ids, 2)
+    items = [{"sku": sku, "quantity": 1} for sku in rng.sample(ds.skus, min(20, len(ds.skus)))]
+    return {"json": {"from_warehouse_id": src, "to_warehouse_id": dst, "items": items}}
+
+
+@scenario("GET", "/api/inventory/transfer-orders/{transfer_id}")
+def _get_transfer_order(ds, rng, i):
+    return {"path": {"transfer_id": i % 20 + 1}}
+
+
+@scenario("POST", "/api/inventory/stocktake")
+def _stocktake(ds, rng, i):
+    return {"json": {"warehouse_id": rng.choice(ds.warehouse_ids), "items": _counted(ds, rng, 50)}}
+
+
+@scenario("POST", "/api/inventory/stocktake/upload")
+def _stocktake_upload(ds, rng, i):
+    body = "sku,counted_qty\n" + "".join(f"{it['sku']},{it['counted_qty']}\n" for it in _counted(ds, rng, 50))
+    return {
+        "data": {"warehouse_id": str(rng.choice(ds.warehouse_ids))},
+        "files": {"file": ("stocktake.csv", body.encode("utf-8"), "text/csv")},
+    }
+
+
+# ---- inbound ----
+
+@scenario("GET", "/api/inbound")
+def _list_inbound(ds, rng, i):
+    return {"params": {"warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("POST", "/api/inbound")
+def _create_inbound(ds, rng, i):
+    return {"json": {"warehouse_id": rng.choice(ds.warehouse_ids), "items": _items(ds, rng, 3)}}
+
+
+@scenario("GET", "/api/inbound/export")
+def _export_inbound(ds, rng, i):
+    return {"params": {"format": "csv", "warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("GET", "/api/inbound/{inbound_id}")
+def _get_inbound(ds, rng, i):
+    return {"path": {"inbound_id": rng.choice(ds.inbound["CONFIRMED"])}}
+
+
+@scenario("PUT", "/api/inbound/{inbound_id}")
+def _update_inbound(ds, rng, i):
+    return {"path": {"inbound_id": rng.choice(ds.inbound["PENDING"] or ds.inbound["CONFIRMED"])}, "json": {"items": _items(ds, rng, 3)}}
+
+
+@scenario("PUT", "/api/inbound/{inbound_id}/confirm")
+def _confirm_inbound(ds, rng, i):
+    return {"path": {"inbound_id": _take(ds.inbound["PENDING"], rng, ds.inbound["CONFIRMED"])}}
+
+
+# ---- outbound ----
+
+@scenario("GET", "/api/outbound")
+def _list_outbound(ds, rng, i):
+    return {"params": {"warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("POST", "/api/outbound")
+def _create_outbound(ds, rng, i):
+    return {"json": {"warehouse_id": rng.choice(ds.warehouse_ids), "items": _items(ds, rng, 3)}}
+
+
+@scenario("GET", "/api/outbound/export")
+def _export_outbound(ds, rng, i):
+    return {"params": {"format": "csv", "warehouse_id": rng.choice(ds.warehouse_ids)}}
+
+
+@scenario("PUT", "/api/outbound/{outbound_id}/pick")
+def _pick(ds, rng, i):
+    return {"path": {"outbound_id": _take(ds.outbound["PENDING_PICK"], rng, ds.outbound["SHIPPED"])}}
+
+
+@scenario("DELETE", "/api/outbound/{outbound_id}")
+def _delete_outbound(ds, rng, i):
+    return {"path": {"outbound_id": _take(ds.outbound["PENDING_PICK"], rng, ds.outbound["SHIPPED"])}}
+
+
+@scenario("PUT", "/api/outbound/{outbound_id}/cancel")
+def _cancel_outbound(ds, rng, i):
+    # 池耗尽后重复取消已取消的单据（幂等），避免落到已发货单据上全部 409
+    canceled = ds.outbound.setdefault("CANCELED", [])
+    if ds.outbound["PENDING_PICK"]:
+        oid = ds.outbound["PENDING_PICK"].pop()
+        canceled.append(oid)
+        return {"path": {"outbound_id": oid}}
+    return {"path": {"outbound_id": rng.choice(canceled or ds.outbound["SHIPPED"])}}
+
+
+@scenario("PUT", "/api/outbound/{outbound_id}/ship")
+def _ship(ds, rng, i):
+    return {"path": {"outbound_id": _take(ds.outbound["PICKED"], rng, ds.outbound["SHIPPED"])}}
+
+
+@scenario("POST", "/api/outbound/ship-batch")
+def _ship_batch(ds, rng, i):
+    return {"json": {"ids": [_take(ds.outbound["PICKED"], rng, ds.outbound["SHIPPED"]) for _ in range(5)]}}
+
+
+# ---- admin ----
+
+@scenario("GET", "/api/admin/users")
+def _users(ds, rng, i):
+    return {}
+
+
+@scenario("GET", "/api/admin/cache-stats")
+def _cache_stats(ds, rng, i):
+    return {}
+
+
+@scenario("GET", "/api/admin/audit-stats")
+def _audit_stats(ds, rng, i):
+    return {}
+
+
+@scenario("POST", "/api/admin/ledger/snapshot")
+def _ledger_snapshot(ds, rng, i):
+    return {}
+
+
+@scenario("POST", "/api/admin/products/search-index/rebuild")
+def _rebuild_search(ds, rng, i):
+    return {}
+
+
+@scenario("GET", "/api/admin/query-stats")
+def _query_stats(ds, rng, i):
+    return {}
+
+
+@scenario("POST", "/api/admin/query-stats/reset")
+def _query_stats_reset(ds, rng, i):
+    return {}
+
+
+# ---- metrics ----
+
+@scenario("GET", "/metrics")
+def _metrics(ds, rng, i):
+    return {}
@@ -0,0 +1,87 @@
+"""压测用合成数据：复用 app.db.seed 的批量灌数（Zipf 热度），再从库中读出各接口取用的 id 池。"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+
+from app.db.init_db import init_db
+from app.db.seed import seed as seed_database
+from app.db.session import Base, SessionLocal
+from app.models.inbound import InboundOrder
+from app.models.inventory import Inventory
+from app.models.location import Location
+from app.models.outbound import OutboundOrder
+from app.models.product import Product
+from app.models.warehouse import Warehouse
+
+
+@dataclass
+class Dataset:
+    warehouse_ids: List[int]
+    product_ids: List[int]
+    skus: List[str]
+    location_ids: List[int]
+    # 每个 (仓库, SKU) 的可用库存下限，写接口按此取数量不会因缺货失败
+    stock_floor: int = 0
+    # 按状态分组的单据 id，供会改变状态的接口逐个取用
+    inbound: Dict[str, List[int]] = field(default_factory=dict)
+    outbound: Dict[str, List[int]] = field(default_factory=dict)
+
+
+def seed_dataset(
+    engine: Engine, warehouses: int, products: int, orders: int, seed: int = 42, stock_floor: int = 0
+) -> Dataset:
+    # 每仓备齐全部 SKU（覆盖率 1.0），写接口随机取的 (仓库, SKU) 都有库存行；单据时间分布在最近 30 天。
+    # 出入库单约 2/3 处于未完成状态（与单据状态相关的接口各有足够的单据可取），可用库存补到 stock_floor
+    # 先建好默认数据（管理员、示例仓库/商品），id 池只取本次生成的数据
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal(bind=engine)
+    try:
+        init_db(db)
+    finally:
+        db.close()
+    with engine.connect() as conn:
+        before = {
+            t.name: conn.execute(select(t.c.id).order_by(t.c.id.desc()).limit(1)).scalar() or 0
+            for t in (Warehouse.__table__, Product.__table__, InboundOrder.__table__, OutboundOrder.__table__)
+        }
+    seed_database(
+        engine,
+        products=products,
+        warehouses=warehouses,
+        stock_coverage=1.0,
+        inbound_orders=orders,
+        outbound_orders=orders,
+        days=30,
+        seed_=seed,
+        open_share=2 / 3,
+        log=lambda msg: print(f"seed: {msg}"),
+    )
+
+    with engine.begin() as conn:
+        wids = list(conn.execute(select(Warehouse.id).where(Warehouse.id > before["warehouses"]).order_by(Warehouse.id)).scalars())
+        rows = conn.execute(select(Product.id, Product.sku).where(Product.id > before["products"]).order_by(Product.id)).all()
+        location_ids = list(conn.execute(select(Location.id).where(Location.warehouse_id.in_(wids)).order_by(Location.id)).scalars())
+        ds = Dataset(
+            warehouse_ids=wids,
+            product_ids=[pid for pid, _ in rows],
+            skus=[sku for _, sku in rows],
+            location_ids=location_ids,
+            stock_floor=stock_floor,
+        )
+        conn.execute(
+            update(Inventory)
+            .where(Inventory.warehouse_id.in_(wids), Inventory.available_qty < stock_floor)
+            .values(available_qty=stock_floor)
+        )
+        ds.inbound = _by_status(conn, InboundOrder, before["inbound_orders"], ["PENDING", "CONFIRMED"])
+        ds.outbound = _by_status(conn, OutboundOrder, before["outbound_orders"], ["PENDING_PICK", "PICKED", "SHIPPED"])
+    return ds
+
+
+def _by_status(conn, model, after_id: int, statuses: List[str]) -> Dict[str, List[int]]:
+    by_status: Dict[str, List[int]] = {s: [] for s in statuses}
+    for oid, status in conn.execute(select(model.id, model.status).where(model.id > after_id).order_by(model.id)):
+        by_status.setdefault(status, []).append(oid)
+    return by_status
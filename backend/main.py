@@ -3,18 +3,44 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from app.core.exception_handlers import http_exception_handler, validation_exception_handler
-from app.db.init_db import init_db
+from app.core import config
+from app.core.exception_handlers import (
+    concurrent_update_handler,
+    http_exception_handler,
+    unknown_warehouse_handler,
+    validation_exception_handler,
+)
+from app.core.metrics import MetricsMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.response import FastJSONResponse
+from app.core.security import shutdown_hash_pool
+from app.db.async_session import dispose_async_engine
+from app.db.init_db import ensure_columns, ensure_indexes, init_db, merge_duplicate_inventory
 from app.db.session import Base, SessionLocal, engine
+from app.db.shards import UnknownWarehouse, central_tables, for_each_shard, shard_router
 from app.routers.admin import router as admin_router
 from app.routers.auth import router as auth_router
 from app.routers.health import router as health_router
+from app.routers.inbound import async_router as inbound_async_router
 from app.routers.inbound import router as inbound_router
+from app.routers.inventory import async_router as inventory_async_router
 from app.routers.inventory import router as inventory_router
+from app.routers.locations import async_router as locations_async_router
 from app.routers.locations import router as locations_router
+from app.routers.metrics import router as metrics_router
+from app.routers.outbound import async_router as outbound_async_router
 from app.routers.outbound import router as outbound_router
+from app.routers.products import async_router as products_async_router
 from app.routers.products import router as products_router
+from app.routers.warehouses import async_router as warehouses_async_router
 from app.routers.warehouses import router as warehouses_router
+from app.services.audit import audit_recorder
+from app.services.counting import ensure_counters
+from app.services.ledger import ensure_baseline_snapshot, snapshot_scheduler
+from app.services.product_search import ensure_search_index
+from app.services.reservation import reservation_sweeper
+from app.services.stock import ConcurrentUpdate
+from app.services.transfer import recover_transfers
 
 # 关键：导入 models 以注册 ORM 映射（后续会补齐）
 # noqa: F401
@@ -23,14 +49,27 @@ try:
 except Exception:
     pass
 
-# 简化：开发环境直接 create_all（无需 Alembic）
-Base.metadata.create_all(bind=engine)
+# 简化：开发环境直接 create_all（无需 Alembic）；分库时中心库只建共享表，分库表在首次访问该仓时建立
+if shard_router.enabled:
+    shard_router.check()
+    Base.metadata.create_all(bind=engine, tables=central_tables())
+    ensure_columns(engine)
+    ensure_indexes(engine, central_tables())
+else:
+    Base.metadata.create_all(bind=engine)
+    ensure_columns(engine)
+    merge_duplicate_inventory(engine)
+    ensure_indexes(engine)
+ensure_search_index(engine)
+ensure_counters(engine)
 
-app = FastAPI(title="WMS API", version="0.1.0")
+app = FastAPI(title="WMS API", version="0.1.0", default_response_class=FastJSONResponse)
 
 # 统一异常响应（符合 PRD），但仍会保留部分“预埋缺陷”
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
+app.add_exception_handler(ConcurrentUpdate, concurrent_update_handler)
+app.add_exception_handler(UnknownWarehouse, unknown_warehouse_handler)
 
 # CORS middleware configuration (BE03 fixed)
 app.add_middleware(
@@ -39,7 +78,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
+# 每请求 SQL 条数/耗时统计（Server-Timing + 路由汇总）
+app.add_middleware(QueryStatsMiddleware)
+# Prometheus 指标（最外层，计入全部中间件耗时）
+if config.METRICS:
+    app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
@@ -49,6 +94,37 @@ def _startup_seed_data() -> None:
         init_db(db)
     finally:
         db.close()
+    for_each_shard(ensure_baseline_snapshot)
+    # 上次退出时未完成的跨仓调拨（仅分库模式会产生）
+    if shard_router.enabled:
+        db = SessionLocal()
+        try:
+            recover_transfers(db)
+        finally:
+            db.close()
+    snapshot_scheduler.start()
+    reservation_sweeper.start()
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    snapshot_scheduler.stop()
+    reservation_sweeper.stop()
+    await dispose_async_engine()
+    shutdown_hash_pool()
+    # write-behind 模式下把队列中剩余的审计记录落库
+    audit_recorder.shutdown()
+    shard_router.dispose()
+
+
+# WMS_DB_ASYNC=1 时读接口走 AsyncSession：同路径的 async 路由先注册、优先匹配（async 引擎只连中心库，分库时不启用）
+if config.DB_ASYNC and not shard_router.enabled:
+    app.include_router(products_async_router)
+    app.include_router(warehouses_async_router)
+    app.include_router(locations_async_router)
+    app.include_router(inventory_async_router)
+    app.include_router(inbound_async_router)
+    app.include_router(outbound_async_router)
 
 app.include_router(health_router)
 app.include_router(auth_router)
@@ -59,3 +135,5 @@ app.include_router(inventory_router)
 app.include_router(inbound_router)
 app.include_router(outbound_router)
 app.include_router(admin_router)
+if config.METRICS:
+    app.include_router(metrics_router)
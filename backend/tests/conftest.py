@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 每次测试会话使用独立的临时库；须在导入 app 之前设置
+_tmpdir = tempfile.mkdtemp(prefix="wms-test-")
+os.environ["WMS_DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'wms.db')}"
+os.environ["WMS_LEDGER_SNAPSHOT_INTERVAL"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as c:
+        r = c.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+        c.headers["Authorization"] = f"Bearer {r.json()['data']['access_token']}"
+        yield c
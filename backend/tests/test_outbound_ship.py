@@ -0,0 +1,60 @@
+import pytest
+
+from app.db.session import SessionLocal
+from app.models.inventory import Inventory
+from app.models.outbound import OutboundOrder
+from app.models.product import Product
+
+WAREHOUSE_ID = 1
+SKU = "SKU-002"
+
+
+def _stock():
+    db = SessionLocal()
+    try:
+        pid = db.query(Product.id).filter(Product.sku == SKU).scalar()
+        inv = db.query(Inventory).filter(Inventory.warehouse_id == WAREHOUSE_ID, Inventory.product_id == pid).one()
+        return inv.available_qty, inv.locked_qty
+    finally:
+        db.close()
+
+
+def _inbound(client, quantity: int) -> None:
+    r = client.post("/api/inbound", json={"warehouse_id": WAREHOUSE_ID, "items": [{"sku": SKU, "quantity": quantity}]})
+    assert r.status_code == 200, r.text
+    assert client.put(f"/api/inbound/{r.json()['id']}/confirm").status_code == 200
+
+
+def _reserved_order_with_negative_available(client) -> int:
+    # 补货后建单占用库存并拣货，再用负数入库（BE09）把可用量扣到 -1，占用量不变
+    _inbound(client, 10)
+    r = client.post("/api/outbound", json={"warehouse_id": WAREHOUSE_ID, "items": [{"sku": SKU, "quantity": 3}]})
+    assert r.status_code == 200, r.text
+    oid = r.json()["data"]["id"]
+    assert client.put(f"/api/outbound/{oid}/pick").status_code == 200
+
+    _inbound(client, -(_stock()[0] + 1))
+    assert _stock()[0] == -1
+    return oid
+
+
+@pytest.mark.parametrize("mode", ["single", "batch"])
+def test_reserved_order_ships_when_available_negative(client, mode):
+    oid = _reserved_order_with_negative_available(client)
+    _, locked = _stock()
+
+    if mode == "single":
+        r = client.put(f"/api/outbound/{oid}/ship")
+        assert r.status_code == 200, r.text
+    else:
+        r = client.post("/api/outbound/ship-batch", json={"ids": [oid]})
+        assert r.status_code == 200, r.text
+        assert r.json()["data"]["results"] == [{"id": oid, "code": "OK", "message": "ok"}]
+
+    # 两种发货方式都只核销占用，可用量不变
+    assert _stock() == (-1, locked - 3)
+    db = SessionLocal()
+    try:
+        assert db.get(OutboundOrder, oid).status == "SHIPPED"
+    finally:
+        db.close()
@@ -18,7 +18,11 @@ type InboundOrder = {
   confirmed_at?: string | null
 }
 
-type InboundListResp = { code: string; message: string; data: InboundOrder[] }
+type InboundListResp = {
+  code: string
+  message: string
+  data: { items: InboundOrder[]; next_after_id: number | null; limit: number }
+}
 
 type InboundItem = { sku: string; quantity: any; unit_price: any }
 
@@ -26,6 +30,8 @@ export default function InboundPage() {
   const [warehouses, setWarehouses] = useState<Warehouse[]>([])
   const [warehouseId, setWarehouseId] = useState<number | undefined>(undefined)
   const [list, setList] = useState<InboundOrder[]>([])
+  // 下一页游标，连同加载当前列表时的仓库条件一起保存
+  const [cursor, setCursor] = useState<{ after_id: number; warehouse_id?: number } | null>(null)
   const [loading, setLoading] = useState(false)
 
   const [items, setItems] = useState<InboundItem[]>([{ sku: 'SKU-001', quantity: '1', unit_price: '9.9' }])
@@ -66,7 +72,11 @@ export default function InboundPage() {
             warehouse_id: warehouseId,
           },
         })
-        if (!cancelled) setList(resp.data.data)
+        if (!cancelled) {
+          setList(resp.data.data.items)
+          const next = resp.data.data.next_after_id
+          setCursor(next === null ? null : { after_id: next, warehouse_id: warehouseId })
+        }
       } finally {
         if (!cancelled) setLoading(false)
       }
@@ -77,6 +87,19 @@ export default function InboundPage() {
     }
   }, [])
 
+  const loadMore = async () => {
+    if (!cursor) return
+    setLoading(true)
+    try {
+      const resp = await api.get<InboundListResp>('/api/inbound', { params: cursor })
+      const page = resp.data.data
+      setList((prev) => [...prev, ...page.items])
+      setCursor(page.next_after_id === null ? null : { ...cursor, after_id: page.next_after_id })
+    } finally {
+      setLoading(false)
+    }
+  }
+
   const columns: ColumnsType<InboundOrder> = useMemo(
     () => [
       {
@@ -120,6 +143,13 @@ export default function InboundPage() {
         </Space>
 
         <Table rowKey="id" loading={loading} columns={columns} dataSource={list} pagination={false} />
+        {cursor && (
+          <div style={{ marginTop: 12, textAlign: 'center' }}>
+            <Button loading={loading} onClick={loadMore}>
+              加载更多
+            </Button>
+          </div>
+        )}
       </Card>
 
       <Card title="创建入库单">
@@ -19,12 +19,17 @@ type OutboundOrder = {
   items?: { sku: string; quantity: number }[]
 }
 
-type OutboundListResp = { code: string; message: string; data: OutboundOrder[] }
+type OutboundListResp = {
+  code: string
+  message: string
+  data: { items: OutboundOrder[]; next_after_id: number | null; limit: number }
+}
 
 export default function OutboundPage() {
   const [warehouses, setWarehouses] = useState<Warehouse[]>([])
   const [warehouseId, setWarehouseId] = useState<number | undefined>(undefined)
   const [list, setList] = useState<OutboundOrder[]>([])
+  const [nextAfterId, setNextAfterId] = useState<number | null>(null)
   const [loading, setLoading] = useState(false)
 
   const [items, setItems] = useState<OutboundItem[]>([{ sku: 'SKU-001', quantity: '1' }])
@@ -42,13 +47,16 @@ export default function OutboundPage() {
       .catch(() => setWarehouses([]))
   }, [])
 
-  const loadList = async () => {
+  // 游标分页：afterId 为空时重新加载第一页，否则追加下一页
+  const loadList = async (afterId?: number) => {
     setLoading(true)
     try {
       const resp = await api.get<OutboundListResp>('/api/outbound', {
-        params: { warehouse_id: warehouseId },
+        params: { warehouse_id: warehouseId, after_id: afterId },
       })
-      setList(resp.data.data)
+      const page = resp.data.data
+      setList((prev) => (afterId ? [...prev, ...page.items] : page.items))
+      setNextAfterId(page.next_after_id)
     } finally {
       setLoading(false)
     }
@@ -176,6 +184,13 @@ export default function OutboundPage() {
           }}
           pagination={false}
         />
+        {nextAfterId !== null && (
+          <div style={{ marginTop: 12, textAlign: 'center' }}>
+            <Button loading={loading} onClick={() => loadList(nextAfterId)}>
+              加载更多
+            </Button>
+          </div>
+        )}
       </Card>
 
       <Modal